@@ -0,0 +1,14 @@
+"""配置加载的基准测试"""
+
+from hongxiu.cmd import load_config
+
+
+def test_load_config(benchmark):
+    cfg = benchmark(load_config, None)
+    assert cfg.chains.summary is not None
+
+
+def test_config_reload(benchmark):
+    cfg = load_config(None)
+    benchmark(cfg.load)
+    assert cfg.llm
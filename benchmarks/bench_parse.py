@@ -0,0 +1,44 @@
+"""PDF 解析及文本压缩的基准测试"""
+
+import pytest
+
+from hongxiu.compact import CompactionSettings, compact_text
+from hongxiu.pdf_parser import PdfSettings, read_pdf_pymupdf, read_pdf_pypdf2
+
+from conftest import PDF_PAGES
+
+# 300 页的论文解析一次需要数十秒，减少重复次数
+ROUNDS = {5: 5, 50: 3, 300: 1}
+
+
+@pytest.mark.parametrize("workers", [1, 0], ids=["serial", "parallel"])
+@pytest.mark.parametrize("pages", PDF_PAGES)
+def test_read_pdf_pymupdf(benchmark, pdf_files, pages, workers):
+    f = str(pdf_files[pages])
+    # workers 为 0 时按 CPU 核数并行解析
+    settings = PdfSettings(workers=workers)
+    text = benchmark.pedantic(
+        read_pdf_pymupdf,
+        args=(f,),
+        kwargs={"override": True, "settings": settings},
+        rounds=ROUNDS[pages],
+    )
+    assert text
+
+
+@pytest.mark.parametrize("pages", PDF_PAGES)
+def test_read_pdf_pypdf2(benchmark, pdf_files, pages):
+    text = benchmark.pedantic(
+        read_pdf_pypdf2,
+        args=(str(pdf_files[pages]),),
+        kwargs={"override": True},
+        rounds=ROUNDS[pages],
+    )
+    assert text
+
+
+@pytest.mark.parametrize("pages", PDF_PAGES)
+def test_compact_text(benchmark, pdf_files, pages):
+    text = read_pdf_pymupdf(str(pdf_files[pages]), override=False)
+    compacted, report = benchmark(compact_text, text, CompactionSettings())
+    assert report.tokens_after <= report.tokens_before
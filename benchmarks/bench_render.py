@@ -0,0 +1,51 @@
+"""论文总结及思维导图渲染的基准测试"""
+
+import shutil
+
+import pytest
+
+from hongxiu.latex import LatexSettings, latex_to_pdf
+from hongxiu.render import (
+    render_mindmap_to_digraph,
+    render_summary_to_latex,
+    render_summary_to_markdown,
+)
+
+
+def test_render_summary_to_latex(benchmark, deep_summary, tmp_path):
+    output = tmp_path / "summary.tex"
+    latex = benchmark(render_summary_to_latex, deep_summary, output, override=True)
+    assert r"\block{" in latex
+
+
+@pytest.mark.skipif(shutil.which("xelatex") is None, reason="xelatex is not found")
+@pytest.mark.parametrize("use_format", [False, True], ids=["plain", "format"])
+def test_latex_to_pdf(benchmark, deep_summary, tmp_path, use_format):
+    # 对比直接编译与使用预编译格式文件编译单个海报的耗时
+    p_latex = tmp_path / "summary.tex"
+    p_pdf = tmp_path / "summary.pdf"
+    render_summary_to_latex(deep_summary, p_latex, override=True)
+    settings = LatexSettings(format=use_format, format_dir=str(tmp_path / "format"))
+    # 格式文件只在第一次编译时构建，不计入耗时
+    latex_to_pdf(p_latex, p_pdf, override=True, settings=settings)
+    benchmark.pedantic(
+        latex_to_pdf,
+        args=(p_latex, p_pdf),
+        kwargs={"override": True, "settings": settings},
+        rounds=3,
+    )
+    assert p_pdf.exists()
+
+
+def test_render_summary_to_markdown(benchmark, deep_summary, tmp_path):
+    output = tmp_path / "summary.md"
+    markdown = benchmark(
+        render_summary_to_markdown, deep_summary, output, override=True
+    )
+    assert markdown
+
+
+def test_render_mindmap_to_digraph(benchmark, large_mindmap):
+    # 只构建 DOT（遍历节点并计算样式），不调用 Graphviz 程序
+    dot = benchmark(render_mindmap_to_digraph, large_mindmap)
+    assert len(dot.body) > 2000
@@ -0,0 +1,86 @@
+"""微基准测试的公共夹具
+
+所有数据都在运行时生成（固定随机数种子），不依赖仓库中的论文文件：
+- 5/50/300 页的合成论文 PDF
+- 多层嵌套的论文总结 Summary
+- 约 2000 个节点的思维导图 Mindmap
+"""
+
+import random
+from pathlib import Path
+from typing import Any, Dict
+
+import pytest
+from loguru import logger
+
+from hongxiu.bench import generate_corpus
+from hongxiu.model import Metadata, Mindmap, Summary
+
+PDF_PAGES = [5, 50, 300]
+SEED = 42
+
+_WORDS = (
+    "模型 方法 数据集 实验 结果 注意力 表示 训练 推理 性能 基线 任务 指标 效率 "
+    "transformer attention benchmark baseline accuracy latency 50% $x^2$ a_b #1"
+).split()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def quiet_logger():
+    # 日志输出会影响计时
+    logger.remove()
+
+
+@pytest.fixture(scope="session")
+def pdf_files(tmp_path_factory) -> Dict[int, Path]:
+    """页数 -> 合成论文 PDF"""
+    base = tmp_path_factory.mktemp("pdf")
+    return {
+        pages: generate_corpus(base / str(pages), 1, pages, seed=SEED)[0]
+        for pages in PDF_PAGES
+    }
+
+
+def sentence(rng: random.Random, low: int = 8, high: int = 24) -> str:
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(low, high)))
+
+
+def nested_sections(rng: random.Random, depth: int, breadth: int) -> Any:
+    """生成多层嵌套的章节：字典的值为下一层字典，最底层为句子列表"""
+    if depth <= 1:
+        return [sentence(rng) for _ in range(breadth)]
+    return {
+        f"{sentence(rng, 2, 4)} {i}": nested_sections(rng, depth - 1, breadth)
+        for i in range(breadth)
+    }
+
+
+def count_nodes(node: Any) -> int:
+    if isinstance(node, dict):
+        return sum(1 + count_nodes(v) for v in node.values())
+    if isinstance(node, list):
+        return sum(count_nodes(v) for v in node)
+    return 1
+
+
+@pytest.fixture(scope="session")
+def deep_summary() -> Summary:
+    """6 个章节，每个章节 4 层嵌套、每层 4 个分支"""
+    rng = random.Random(SEED)
+    return Summary(
+        metadata=Metadata(
+            title="Synthetic Paper", authors="A, B", institution="X", date="2024"
+        ),
+        summary={
+            f"章节 {i}": nested_sections(rng, depth=4, breadth=4) for i in range(6)
+        },
+    )
+
+
+@pytest.fixture(scope="session")
+def large_mindmap() -> Mindmap:
+    """约 2000 个节点的思维导图"""
+    rng = random.Random(SEED)
+    mindmap = {f"分支 {i}": nested_sections(rng, depth=3, breadth=6) for i in range(8)}
+    assert 1800 <= count_nodes(mindmap) <= 2200
+    return Mindmap(metadata=Metadata(title="Synthetic Paper"), mindmap=mindmap)
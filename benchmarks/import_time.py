@@ -0,0 +1,114 @@
+"""启动时间基准测试
+
+测量 CLI 的启动时间，以及读取已有结果（所有 JSON/PDF 均已生成）时的完整运行时间，
+超出阈值时以非零状态退出，便于在 CI 中防止启动时间回退。
+
+用法：
+    python benchmarks/import_time.py [--runs 5] [--threshold-ms 300]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# 只读取已有结果时不应加载的模块
+HEAVY_MODULES = [
+    "langchain_core",
+    "langchain_openai",
+    "langchain_anthropic",
+    "langchain_community",
+    "portkey_ai",
+    "graphviz",
+    "pymupdf4llm",
+    "pix2text",
+]
+
+CHECK_MODULES = """
+import sys
+import hongxiu.cmd, hongxiu.engine
+heavy = [m for m in {modules!r} if m in sys.modules]
+print(",".join(heavy))
+"""
+
+
+def measure(cmd: list, runs: int, env: dict) -> float:
+    """运行 runs 次并返回耗时的中位数（毫秒）"""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, env=env, check=True, capture_output=True)
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def prepare_cached_paper(workdir: Path) -> Path:
+    """生成所有中间结果均已存在的论文目录"""
+    empty = {"title": "", "authors": "", "institution": "", "date": "", "tldr": ""}
+    p_pdf = workdir / "paper.pdf"
+    p_pdf.write_bytes(b"%PDF-1.4\n")
+    for kind, key in [("summary", "summary"), ("mindmap", "mindmap")]:
+        data = {"metadata": empty, key: {}}
+        (workdir / f"paper.{kind}.json").write_text(json.dumps(data))
+        (workdir / f"paper.{kind}.pdf").write_bytes(b"%PDF-1.4\n")
+    (workdir / "paper.summary.tex").write_text("")
+    return p_pdf
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--threshold-ms", type=float, default=300)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    src = Path(__file__).resolve().parent.parent / "src"
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(src), env.get("PYTHONPATH")]))
+    # 读取已有结果时不需要真实的 API Key
+    env.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+    check = subprocess.run(
+        [sys.executable, "-c", CHECK_MODULES.format(modules=HEAVY_MODULES)],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    heavy = check.stdout.strip()
+
+    results = {
+        "python": measure([sys.executable, "-c", "pass"], args.runs, env),
+        "import hongxiu.cmd": measure(
+            [sys.executable, "-c", "import hongxiu.cmd"], args.runs, env
+        ),
+        "hongxiu version": measure(
+            [sys.executable, "-m", "hongxiu.cmd", "version"], args.runs, env
+        ),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        p_pdf = prepare_cached_paper(Path(tmp))
+        results["hongxiu all (cached)"] = measure(
+            [sys.executable, "-m", "hongxiu.cmd", "all", str(p_pdf)], args.runs, env
+        )
+
+    baseline = results["python"]
+    failed = bool(heavy)
+    for name, ms in results.items():
+        overhead = ms - baseline if name != "python" else ms
+        over = name != "python" and overhead > args.threshold_ms
+        failed = failed or over
+        print(
+            f"{name:<24}{ms:>8.1f} ms  (+{overhead:.1f} ms){'  SLOW' if over else ''}"
+        )
+    if heavy:
+        print(f"heavy modules imported at startup: {heavy}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
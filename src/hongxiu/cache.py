@@ -0,0 +1,512 @@
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+from pathlib import Path
+from typing import ClassVar, Iterator, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+
+DEFAULT_LLM_CACHE_PATH = "~/.cache/hongxiu/llm.sqlite"
+DEFAULT_PARSE_CACHE_PATH = "~/.cache/hongxiu/parsed.sqlite"
+
+
+class SqliteCache(BaseModel):
+    """基于 SQLite 的缓存的公共部分：连接、按年龄和总大小淘汰，以及定期自动淘汰
+
+    子类在 _create_tables() 中建表，表中需要有 key、size、accessed_at 列。
+
+    Args:
+        path (Path): SQLite 数据库文件路径
+        max_size_mb (float): 缓存总大小上限（MB），0 表示不限制
+        max_age_days (float): 缓存条目的最长保留天数，0 表示不限制
+        prune_interval_hours (float): 自动淘汰的最短间隔（小时），0 表示不自动淘汰
+    """
+
+    # 缓存条目所在的表
+    _table: ClassVar[str]
+
+    path: Path
+    max_size_mb: float
+    max_age_days: float
+    prune_interval_hours: float = 24
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            self._create_tables(conn)
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS idx_{self._table}_accessed_at"
+                f" ON {self._table} (accessed_at)"
+            )
+            # 缓存自身的元数据，如上次淘汰的时间
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta"
+                " (key TEXT PRIMARY KEY, value REAL NOT NULL)"
+            )
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        raise NotImplementedError
+
+    def prune(
+        self,
+        max_size_mb: Optional[float] = None,
+        max_age_days: Optional[float] = None,
+    ) -> int:
+        """淘汰过期条目，并按最近访问时间淘汰条目直至总大小不超过上限
+
+        Args:
+            max_size_mb (Optional[float]): 总大小上限，默认使用配置值
+            max_age_days (Optional[float]): 最长保留天数，默认使用配置值
+
+        Returns:
+            int: 被删除的条目数
+        """
+        if max_size_mb is None:
+            max_size_mb = self.max_size_mb
+        if max_age_days is None:
+            max_age_days = self.max_age_days
+
+        table = self._table
+        removed = 0
+        with closing(self._connect()) as conn, conn:
+            if max_age_days > 0:
+                deadline = time.time() - max_age_days * 86400
+                removed += conn.execute(
+                    f"DELETE FROM {table} WHERE accessed_at < ?", (deadline,)
+                ).rowcount
+            if max_size_mb > 0:
+                limit = int(max_size_mb * 1024 * 1024)
+                (total,) = conn.execute(
+                    f"SELECT COALESCE(SUM(size), 0) FROM {table}"
+                ).fetchone()
+                if total > limit:
+                    # 按最近访问时间从旧到新淘汰（LRU）
+                    rows = conn.execute(
+                        f"SELECT key, size FROM {table} ORDER BY accessed_at"
+                    )
+                    victims = []
+                    for key, size in rows:
+                        if total <= limit:
+                            break
+                        victims.append((key,))
+                        total -= size
+                    conn.executemany(f"DELETE FROM {table} WHERE key = ?", victims)
+                    removed += len(victims)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('pruned_at', ?)",
+                (time.time(),),
+            )
+        if removed:
+            logger.info(
+                f"{type(self).__name__}.prune(): removed {removed} entries "
+                f"from {self.path}"
+            )
+            with closing(self._connect()) as conn:
+                conn.execute("VACUUM")
+        return removed
+
+    def maybe_prune(self) -> int:
+        """距离上次淘汰超过 prune_interval_hours 时才淘汰
+
+        淘汰需要扫描全表并执行 VACUUM，因此不在每次启动时执行。
+
+        Returns:
+            int: 被删除的条目数，未到淘汰时间时为 0
+        """
+        if self.prune_interval_hours <= 0:
+            return 0
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM meta WHERE key = 'pruned_at'"
+            ).fetchone()
+        if row is not None and time.time() - row[0] < self.prune_interval_hours * 3600:
+            return 0
+        return self.prune()
+
+    def _connect(self) -> sqlite3.Connection:
+        # 每次操作使用独立连接，保证多线程下的安全性
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+
+class LLMCache(SqliteCache):
+    """基于 SQLite 的 LLM 响应缓存
+
+    缓存以内容哈希为键（由调用方根据 provider、model、渲染后的提示词以及输出结构计算），
+    因此与论文文件名无关。支持按条目年龄和缓存总大小进行淘汰。
+
+    Args:
+        path (Path): SQLite 数据库文件路径
+        max_size_mb (float): 缓存总大小上限（MB），0 表示不限制
+        max_age_days (float): 缓存条目的最长保留天数，0 表示不限制
+        prune_interval_hours (float): 自动淘汰的最短间隔（小时），0 表示不自动淘汰
+    """
+
+    _table: ClassVar[str] = "responses"
+
+    max_size_mb: float = 512
+    max_age_days: float = 90
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                chain TEXT NOT NULL,
+                model TEXT NOT NULL,
+                value TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，命中时更新访问时间和命中次数
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[str]: 缓存的响应内容，未命中时返回 None
+        """
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT value FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE responses SET accessed_at = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+            return row[0]
+
+    def set(self, key: str, chain: str, model: str, value: str):
+        """写入缓存
+
+        Args:
+            key (str): 缓存键
+            chain (str): 调用链名称，仅用于统计
+            model (str): 模型名称（provider:model），仅用于统计
+            value (str): 响应内容
+        """
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO responses
+                    (key, chain, model, value, size, created_at, accessed_at, hits)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, chain, model, value, len(value.encode("utf-8")), now, now),
+            )
+
+    def stats(self) -> dict:
+        """统计缓存使用情况
+
+        Returns:
+            dict: 条目数、总大小、命中次数，以及按调用链和模型分组的统计
+        """
+        with closing(self._connect()) as conn:
+            entries, size, hits, oldest, newest = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(hits), 0),"
+                " MIN(created_at), MAX(created_at) FROM responses"
+            ).fetchone()
+            groups = conn.execute(
+                "SELECT chain, model, COUNT(*), SUM(size), SUM(hits)"
+                " FROM responses GROUP BY chain, model ORDER BY chain, model"
+            ).fetchall()
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "size": size,
+            "hits": hits,
+            "oldest": oldest,
+            "newest": newest,
+            "groups": [
+                {
+                    "chain": chain,
+                    "model": model,
+                    "entries": n,
+                    "size": group_size,
+                    "hits": group_hits,
+                }
+                for chain, model, n, group_size, group_hits in groups
+            ],
+        }
+
+
+def create_llm_cache(config: Config) -> Optional[LLMCache]:
+    """根据配置创建 LLM 响应缓存
+
+    Args:
+        config (Config): 应用配置，读取其中的 cache 部分
+
+    Returns:
+        Optional[LLMCache]: 缓存对象，未启用缓存时返回 None
+    """
+    cfg = config.cache or ConfigItem()
+    if not cfg.get("enabled", True):
+        return None
+    return LLMCache(
+        path=Path(cfg.get("path", DEFAULT_LLM_CACHE_PATH)).expanduser(),
+        max_size_mb=float(cfg.get("max_size_mb", 512)),
+        max_age_days=float(cfg.get("max_age_days", 90)),
+        prune_interval_hours=float(cfg.get("prune_interval_hours", 24)),
+    )
+
+
+class ParseCache(SqliteCache):
+    """PDF 解析结果的缓存
+
+    以 PDF 的内容哈希、解析器类型及其版本为键，与文件名和所在目录无关：
+    PDF 内容变化或更换解析器（及其版本）时会重新解析，
+    内容相同但文件名不同的论文共享同一份解析结果，输入目录只读时也可以缓存。
+    文本经 zlib 压缩后存储，并记录每页的长度，以便逐页解压读取；
+    按最近访问时间（LRU）淘汰。
+
+    Args:
+        path (Path): SQLite 数据库文件路径
+        max_size_mb (float): 缓存总大小上限（MB，压缩后），0 表示不限制
+        max_age_days (float): 缓存条目的最长保留天数，0 表示不限制
+        prune_interval_hours (float): 自动淘汰的最短间隔（小时），0 表示不自动淘汰
+    """
+
+    _table: ClassVar[str] = "parsed"
+
+    max_size_mb: float = 1024
+    max_age_days: float = 180
+
+    def _create_tables(self, conn: sqlite3.Connection):
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS parsed (
+                key TEXT PRIMARY KEY,
+                parser TEXT NOT NULL,
+                value BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                raw_size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0,
+                pages TEXT
+            )
+            """
+        )
+        # 早期版本的缓存没有记录每页的长度，这些条目读取时视为一页
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(parsed)")]
+        if "pages" not in columns:
+            conn.execute("ALTER TABLE parsed ADD COLUMN pages TEXT")
+
+    @staticmethod
+    def key(filename: str | Path, parser: str, version: str) -> str:
+        """计算缓存键
+
+        Args:
+            filename (str | Path): PDF 文件路径
+            parser (str): 解析器类型
+            version (str): 解析器版本
+
+        Returns:
+            str: 缓存键，格式为 parser:version:内容的 SHA-256
+        """
+        digest = hashlib.sha256()
+        with open(filename, "rb") as f:
+            while chunk := f.read(1024 * 1024):
+                digest.update(chunk)
+        return f"{parser}:{version}:{digest.hexdigest()}"
+
+    def get(self, key: str) -> Optional[str]:
+        """读取缓存，命中时更新访问时间和命中次数
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[str]: 解析得到的文本，未命中时返回 None
+        """
+        pages = self.get_pages(key)
+        if pages is None:
+            return None
+        return "".join(pages)
+
+    def get_pages(self, key: str) -> Optional["CachedPages"]:
+        """逐页读取缓存，命中时更新访问时间和命中次数
+
+        只在内存中保留压缩后的数据，每次解压一页。
+
+        Args:
+            key (str): 缓存键
+
+        Returns:
+            Optional[CachedPages]: 各页的文本，未命中时返回 None
+        """
+        with closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT value, raw_size, pages FROM parsed WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE parsed SET accessed_at = ?, hits = hits + 1 WHERE key = ?",
+                (time.time(), key),
+            )
+        data, raw_size, pages = row
+        return CachedPages(data, json.loads(pages) if pages else [raw_size])
+
+    def set(self, key: str, parser: str, value: str):
+        """写入缓存
+
+        Args:
+            key (str): 缓存键
+            parser (str): 解析器类型，仅用于统计
+            value (str): 解析得到的文本
+        """
+        writer = self.writer(key, parser)
+        writer.write(value)
+        writer.commit()
+
+    def writer(self, key: str, parser: str) -> "ParseCacheWriter":
+        """逐页写入缓存，各页在写入时即被压缩，调用 commit() 后才会保存
+
+        Args:
+            key (str): 缓存键
+            parser (str): 解析器类型，仅用于统计
+
+        Returns:
+            ParseCacheWriter: 缓存写入器
+        """
+        return ParseCacheWriter(self, key, parser)
+
+    def _insert(self, key: str, parser: str, data: bytes, pages: List[int]):
+        now = time.time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO parsed
+                    (key, parser, value, size, raw_size, created_at, accessed_at,
+                     hits, pages)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0, ?)
+                """,
+                (
+                    key,
+                    parser,
+                    data,
+                    len(data),
+                    sum(pages),
+                    now,
+                    now,
+                    json.dumps(pages),
+                ),
+            )
+
+    def stats(self) -> dict:
+        """统计缓存使用情况
+
+        Returns:
+            dict: 条目数、压缩前后的总大小、命中次数，以及按解析器分组的统计
+        """
+        with closing(self._connect()) as conn:
+            entries, size, raw_size, hits = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(raw_size), 0),"
+                " COALESCE(SUM(hits), 0) FROM parsed"
+            ).fetchone()
+            groups = conn.execute(
+                "SELECT parser, COUNT(*), SUM(size), SUM(hits)"
+                " FROM parsed GROUP BY parser ORDER BY parser"
+            ).fetchall()
+        return {
+            "path": str(self.path),
+            "entries": entries,
+            "size": size,
+            "raw_size": raw_size,
+            "hits": hits,
+            "groups": [
+                {"parser": parser, "entries": n, "size": group_size, "hits": group_hits}
+                for parser, n, group_size, group_hits in groups
+            ],
+        }
+
+
+class ParseCacheWriter:
+    """逐页压缩解析结果，所有页写入后调用 commit() 一次性保存到缓存
+
+    内存中只保留压缩后的数据及各页的长度（UTF-8 字节数）；
+    解析中途失败或被取消时不调用 commit()，缓存中不会留下不完整的结果。
+    """
+
+    def __init__(self, cache: ParseCache, key: str, parser: str):
+        self.cache = cache
+        self.key = key
+        self.parser = parser
+        self.pages: List[int] = []
+        self.__compressor = zlib.compressobj()
+        self.__chunks: List[bytes] = []
+
+    def write(self, text: str):
+        """写入一页文本"""
+        raw = text.encode("utf-8")
+        self.pages.append(len(raw))
+        self.__chunks.append(self.__compressor.compress(raw))
+
+    def commit(self):
+        """保存已写入的所有页"""
+        self.__chunks.append(self.__compressor.flush())
+        self.cache._insert(self.key, self.parser, b"".join(self.__chunks), self.pages)
+
+
+class CachedPages:
+    """缓存中的各页文本，迭代时每次只解压一页"""
+
+    def __init__(self, data: bytes, pages: List[int]):
+        self.data = data
+        self.pages = pages
+
+    def __len__(self) -> int:
+        return len(self.pages)
+
+    def __iter__(self) -> Iterator[str]:
+        decompressor = zlib.decompressobj()
+        pending = self.data
+        for size in self.pages:
+            chunks = []
+            remaining = size
+            while remaining > 0:
+                chunk = decompressor.decompress(pending, remaining)
+                pending = decompressor.unconsumed_tail
+                if not chunk:
+                    raise ValueError("Corrupted parse cache entry")
+                chunks.append(chunk)
+                remaining -= len(chunk)
+            yield b"".join(chunks).decode("utf-8")
+
+
+def create_parse_cache(config: Config) -> Optional[ParseCache]:
+    """根据配置创建 PDF 解析结果的缓存
+
+    Args:
+        config (Config): 应用配置，读取其中的 parse_cache 部分
+
+    Returns:
+        Optional[ParseCache]: 缓存对象，未启用缓存时返回 None
+    """
+    cfg = config.parse_cache or ConfigItem()
+    if not cfg.get("enabled", True):
+        return None
+    return ParseCache(
+        path=Path(cfg.get("path", DEFAULT_PARSE_CACHE_PATH)).expanduser(),
+        max_size_mb=float(cfg.get("max_size_mb", 1024)),
+        max_age_days=float(cfg.get("max_age_days", 180)),
+        prune_interval_hours=float(cfg.get("prune_interval_hours", 24)),
+    )
@@ -0,0 +1,316 @@
+import asyncio
+import hashlib
+import json
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompt_values import PromptValue
+from langchain_core.runnables.base import Runnable
+from loguru import logger
+from pydantic import BaseModel, ConfigDict
+
+from .cache import LLMCache
+from .hedge import HedgeSettings, LatencyHistogram
+from .ratelimit import RateLimiter
+from .tracing import span
+from .usage import TokenUsage, UsageCallbackHandler
+from .utils import estimate_tokens
+
+
+class ChainBackend(BaseModel):
+    """调用链在某个模型上的实现
+
+    不同提供商的提示词（如格式说明、缓存标记）和结构化输出方式不同，
+    因此每个模型都有各自的提示词模板和模型调用部分。
+
+    Args:
+        provider (str): 模型提供商
+        model (str): 模型名称
+        prompt (ChatPromptTemplate): 提示词模板
+        runnable (Runnable): 接收渲染后的提示词，返回结构化结果的模型调用部分
+        stream_runnable (Optional[Runnable]): 流式调用部分，逐步返回不完整的 JSON 对象（dict）
+        limiter (Optional[RateLimiter]): 提供商的限流调度器，为 None 时不限流
+        latency (Optional[LatencyHistogram]): 模型的响应时间分布，用于计算对冲延迟
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    provider: str
+    model: str
+    prompt: ChatPromptTemplate
+    runnable: Runnable
+    stream_runnable: Optional[Runnable] = None
+    limiter: Optional[RateLimiter] = None
+    latency: Optional[LatencyHistogram] = None
+
+    @property
+    def llm(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+
+class Chain(BaseModel):
+    """LLM 调用链
+
+    由提示词模板和模型调用两部分组成。提示词单独渲染，便于根据渲染结果计算缓存键，
+    命中缓存时无需调用模型。
+
+    可以配置多个模型（backends），排在最前面的为主模型：
+    主模型的响应时间超过其历史分位数时，向下一个模型发起对冲请求，
+    采用最先返回的有效结果并取消其余请求；某个模型调用失败时，立即切换到下一个模型。
+
+    Args:
+        name (str): 调用链名称，如 summary、mindmap
+        backends (List[ChainBackend]): 按优先级排列的模型
+        output (type[BaseModel]): 输出结构
+        cache (Optional[LLMCache]): LLM 响应缓存，为 None 时不使用缓存
+        hedge (HedgeSettings): 对冲请求的参数
+        usage (TokenUsage): 该调用链累计的 token 用量
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    name: str
+    backends: List[ChainBackend]
+    output: type[BaseModel]
+    cache: Optional[LLMCache] = None
+    hedge: HedgeSettings = HedgeSettings()
+    usage: TokenUsage = TokenUsage()
+
+    @property
+    def provider(self) -> str:
+        """主模型的提供商"""
+        return self.backends[0].provider
+
+    @property
+    def model(self) -> str:
+        """主模型的名称"""
+        return self.backends[0].model
+
+    def cache_key(self, prompt_value: PromptValue, backend: ChainBackend) -> str:
+        """计算缓存键
+
+        缓存键由 provider、model、渲染后的提示词以及输出结构共同决定，
+        任一变化都会导致缓存失效。
+
+        Args:
+            prompt_value (PromptValue): 渲染后的提示词
+            backend (ChainBackend): 生成结果的模型
+
+        Returns:
+            str: 缓存键（SHA-256）
+        """
+        payload = {
+            "provider": backend.provider,
+            "model": backend.model,
+            "messages": [
+                {"role": m.type, "content": m.content}
+                for m in prompt_value.to_messages()
+            ],
+            "schema": self.output.model_json_schema(),
+        }
+        data = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    async def ainvoke(
+        self, inputs: dict, on_partial: Optional[Callable[[dict], Any]] = None
+    ) -> Any:
+        """调用模型生成结构化结果
+
+        Args:
+            inputs (dict): 提示词模板的变量
+            on_partial (Optional[Callable[[dict], Any]]): 流式模式的回调函数，
+                每收到一段输出就以当前不完整的 JSON 对象调用一次，
+                为 None 或该调用链不支持流式输出时，等待完整结果后一次性返回
+
+        Returns:
+            Any: 经过校验的输出结构
+        """
+        # 任一模型的缓存结果都可以直接使用；SQLite 的读写在线程中执行，不阻塞事件循环
+        prompt_values = [await b.prompt.ainvoke(inputs) for b in self.backends]
+        keys = [""] * len(self.backends)
+        if self.cache is not None:
+            for i, backend in enumerate(self.backends):
+                keys[i] = self.cache_key(prompt_values[i], backend)
+                cached = await asyncio.to_thread(self.cache.get, keys[i])
+                if cached is not None:
+                    logger.debug(
+                        f"Chain({self.name}): cache hit {keys[i][:12]} ({backend.llm})"
+                    )
+                    with span("llm", chain=self.name, llm=backend.llm, cache_hit=True):
+                        result = self.output.model_validate_json(cached)
+                    if on_partial is not None:
+                        on_partial(result.model_dump())
+                    return result
+
+        if len(self.backends) == 1:
+            index, result = (
+                0,
+                await self.__ainvoke_backend(0, prompt_values[0], on_partial),
+            )
+        else:
+            index, result = await self.__ainvoke_hedged(prompt_values, on_partial)
+
+        if self.cache is not None and isinstance(result, self.output):
+            await asyncio.to_thread(
+                self.cache.set,
+                keys[index],
+                chain=self.name,
+                model=self.backends[index].llm,
+                value=result.model_dump_json(),
+            )
+        return result
+
+    async def __ainvoke_hedged(
+        self,
+        prompt_values: List[PromptValue],
+        on_partial: Optional[Callable[[dict], Any]],
+    ) -> tuple[int, Any]:
+        """按优先级依次调用各模型，返回最先完成的有效结果及其模型序号"""
+        tasks: Dict[asyncio.Task, int] = {}
+        error: Optional[BaseException] = None
+
+        def launch(index: int):
+            backend = self.backends[index]
+            # 同一时间只有一个请求流式输出，避免多个模型的中间结果交错写入；
+            # 对冲请求胜出时再一次性输出完整结果
+            partial = on_partial if not tasks else None
+            if tasks:
+                logger.info(f"Chain({self.name}): hedging with {backend.llm}")
+            task = asyncio.create_task(
+                self.__ainvoke_backend(index, prompt_values[index], partial)
+            )
+            tasks[task] = index
+
+        next_index = 0
+        launch(next_index)
+        next_index += 1
+        try:
+            while tasks:
+                timeout = None
+                if next_index < len(self.backends) and self.hedge.enabled:
+                    last = self.backends[next_index - 1]
+                    timeout = (
+                        last.latency.hedge_delay(self.hedge)
+                        if last.latency is not None
+                        else self.hedge.default_delay
+                    )
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # 超过对冲延迟，向下一个模型发起请求
+                    launch(next_index)
+                    next_index += 1
+                    continue
+                for task in done:
+                    index = tasks.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        result = task.result()
+                        if isinstance(result, self.output):
+                            if tasks and on_partial is not None:
+                                on_partial(result.model_dump())
+                            return index, result
+                        error = ValueError(f"invalid output: {result!r}")
+                    logger.warning(
+                        f"Chain({self.name}): {self.backends[index].llm} failed: "
+                        f"{type(error).__name__}: {error}"
+                    )
+                if not tasks and next_index < len(self.backends):
+                    # 所有请求都已失败，切换到下一个模型
+                    launch(next_index)
+                    next_index += 1
+        finally:
+            # 取消落败的请求
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        assert error is not None
+        raise error
+
+    async def __ainvoke_backend(
+        self,
+        index: int,
+        prompt_value: PromptValue,
+        on_partial: Optional[Callable[[dict], Any]],
+    ) -> Any:
+        backend = self.backends[index]
+        handler = UsageCallbackHandler()
+        # 实际发出请求（最后一次重试）的时间，不包括限流排队和重试前的退避
+        request_start: Optional[float] = None
+
+        def record_latency():
+            if backend.latency is not None and request_start is not None:
+                backend.latency.record(time.perf_counter() - request_start)
+
+        async def call() -> Any:
+            nonlocal request_start
+            request_start = time.perf_counter()
+            try:
+                if on_partial is not None and backend.stream_runnable is not None:
+                    return await self.__astream(
+                        backend, prompt_value, handler, on_partial
+                    )
+                return await backend.runnable.ainvoke(
+                    prompt_value, config={"callbacks": [handler]}
+                )
+            except Exception:
+                # 失败的尝试不计入，重试前的退避期间被取消时也不记录
+                request_start = None
+                raise
+
+        start = time.perf_counter()
+        with span("llm", chain=self.name, llm=backend.llm) as s:
+            try:
+                if backend.limiter is not None:
+                    estimated = estimate_tokens(prompt_value.to_string())
+                    result = await backend.limiter.run(call, estimated)
+                    if handler.usage.calls > 0:
+                        actual = (
+                            handler.usage.input_tokens + handler.usage.output_tokens
+                        )
+                        backend.limiter.adjust_tokens(actual - estimated)
+                else:
+                    result = await call()
+            except asyncio.CancelledError:
+                # 对冲请求中落败的一方被取消时，已等待的时间是其响应时间的下限，
+                # 同样记录，否则慢模型的分布只剩下偶尔胜出的快速样本；
+                # 失败的请求（如很快返回的错误）不代表正常的响应时间，不记录
+                record_latency()
+                raise
+            finally:
+                # 被取消或失败的请求同样消耗了 token
+                self.usage.add(handler.usage)
+                s.set_usage(backend.llm, handler.usage)
+        record_latency()
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"Chain({self.name}): {backend.llm}: {elapsed:.1f}s, {handler.usage}"
+        )
+        return result
+
+    async def __astream(
+        self,
+        backend: ChainBackend,
+        prompt_value: PromptValue,
+        handler: UsageCallbackHandler,
+        on_partial: Callable[[dict], Any],
+    ) -> Any:
+        if backend.stream_runnable is None:
+            raise ValueError(f"Chain({self.name}) does not support streaming.")
+        start = time.perf_counter()
+        first = True
+        partial = None
+        async for partial in backend.stream_runnable.astream(
+            prompt_value, config={"callbacks": [handler]}
+        ):
+            if partial:
+                if first:
+                    elapsed = time.perf_counter() - start
+                    logger.debug(f"Chain({self.name}): first output in {elapsed:.1f}s")
+                    first = False
+                on_partial(partial)
+        # 完整输出到达后再进行校验
+        return self.output.model_validate(partial)
@@ -0,0 +1,114 @@
+import re
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+from .utils import estimate_tokens
+
+# Markdown 标题行，如 "# Introduction"、"## 2.1 Method"
+_RE_HEADING = re.compile(r"^#{1,6}\s+\S", re.MULTILINE)
+# 段落之间的空行
+_RE_PARAGRAPH = re.compile(r"\n\s*\n")
+
+
+class MapReduceSettings(BaseModel):
+    """分块总结（map-reduce）的参数
+
+    Args:
+        mode (str): auto 表示超出 context_tokens 时启用，always/never 表示总是/从不启用
+        context_tokens (int): 单次调用可接受的输入 token 数量
+        chunk_tokens (int): 每个分块的 token 数量上限
+        fan_out (int): 同时总结的分块数量，以及每次归并的部分总结数量
+    """
+
+    mode: str = "auto"
+    context_tokens: int = 32000
+    chunk_tokens: int = 8000
+    fan_out: int = 8
+
+    def should_split(self, tokens: int) -> bool:
+        if self.mode == "always":
+            return True
+        if self.mode == "never":
+            return False
+        return tokens > self.context_tokens
+
+
+def load_map_reduce_settings(config: Config, llm: str) -> MapReduceSettings:
+    """读取分块总结的参数
+
+    先读取 map_reduce.default，再用 map_reduce.models 中与 llm 对应的配置覆盖。
+
+    Args:
+        config (Config): 应用配置
+        llm (str): 模型，格式为 provider:model_name
+
+    Returns:
+        MapReduceSettings: 分块总结的参数
+    """
+    cfg = config.map_reduce or ConfigItem()
+    values: Dict[str, Any] = {}
+    if cfg.get("mode") is not None:
+        values["mode"] = str(cfg.get("mode"))
+    for section in [cfg.default, (cfg.models or ConfigItem()).get(llm)]:
+        if isinstance(section, ConfigItem):
+            values.update(
+                {k: v for k, v in section.to_dict().items() if v not in (None, "")}
+            )
+    return MapReduceSettings(**values)
+
+
+def split_sections(text: str) -> List[str]:
+    """按 Markdown 标题将文本拆分为章节，标题归属于其后的章节"""
+    starts = [m.start() for m in _RE_HEADING.finditer(text)]
+    if not starts or starts[0] != 0:
+        starts.insert(0, 0)
+    starts.append(len(text))
+    return [text[a:b] for a, b in zip(starts, starts[1:]) if text[a:b].strip()]
+
+
+def chunk_text(text: str, max_tokens: int) -> List[str]:
+    """将文本按章节切分为不超过 max_tokens 的分块
+
+    尽量保持章节完整，相邻的小章节会合并到同一分块中；
+    超长的章节再按段落切分，超长的段落最后按字符切分。
+
+    Args:
+        text (str): Markdown 文本
+        max_tokens (int): 每个分块的 token 数量上限
+
+    Returns:
+        List[str]: 分块列表
+    """
+    pieces: List[str] = []
+    for section in split_sections(text):
+        if estimate_tokens(section) <= max_tokens:
+            pieces.append(section)
+            continue
+        for paragraph in _RE_PARAGRAPH.split(section):
+            if estimate_tokens(paragraph) <= max_tokens:
+                pieces.append(paragraph + "\n\n")
+            else:
+                pieces.extend(_split_by_chars(paragraph, max_tokens))
+
+    chunks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for piece in pieces:
+        tokens = estimate_tokens(piece)
+        if current and current_tokens + tokens > max_tokens:
+            chunks.append("".join(current))
+            current, current_tokens = [], 0
+        current.append(piece)
+        current_tokens += tokens
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+def _split_by_chars(text: str, max_tokens: int) -> List[str]:
+    # 根据整段文本的字符/token 比例估算每块的字符数
+    chars_per_token = len(text) / max(1, estimate_tokens(text))
+    step = max(1, int(max_tokens * chars_per_token))
+    return [text[i : i + step] for i in range(0, len(text), step)]
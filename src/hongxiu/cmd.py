@@ -1,14 +1,21 @@
+import asyncio
 from pathlib import Path
-from pprint import pprint
+from pprint import pformat
 import sys
+from typing import TYPE_CHECKING, List, Tuple
 
 import click
 from loguru import logger
 
+from .cache import create_llm_cache, create_parse_cache
 from .utils import download_paper, package_path
 from .pdf_parser import PdfParserType
-from .engine import Engine
-from .config import Config
+from .config import Config, ConfigItem
+
+# Engine 会导入 LangChain 等较慢的依赖，因此只在需要时才在命令中导入，
+# 使 version、cache 等命令可以快速启动
+if TYPE_CHECKING:
+    from .engine import Engine
 
 
 def init_logger(debug: bool):
@@ -39,7 +46,7 @@ class BaseCommand(click.core.Command):
             0,
             click.core.Option(
                 ("--pdf-parser",),
-                type=click.Choice(["pymupdf", "pypdf2", "pix2text"]),
+                type=click.Choice(["pymupdf", "pypdf2", "pix2text", "hybrid"]),
                 default=None,
                 help="PDF parser library, default is pymupdf",
             ),
@@ -58,9 +65,7 @@ class BaseCommand(click.core.Command):
         )
 
 
-def init_command(config, debug, pdf_parser, model, override):
-    init_logger(debug)
-    # init_env_var()
+def load_config(config) -> Config:
     if not config:
         config = ["hongxiu.json"]
     preset_envvars = {
@@ -69,13 +74,20 @@ def init_command(config, debug, pdf_parser, model, override):
         "TEMPLATE_SUMMARY_MERGE_FIGURES_PATH": package_path(
             "config/summary_merge_figures.tmpl"
         ),
+        "TEMPLATE_SUMMARY_CHUNK_PATH": package_path("config/summary_chunk.tmpl"),
+        "TEMPLATE_SUMMARY_REDUCE_PATH": package_path("config/summary_reduce.tmpl"),
         "TEMPLATE_MINDMAP_PATH": package_path("config/mindmap.tmpl"),
     }
-    cfg = Config(
+    return Config(
         config_files=config, prefix="HONGXIU", dotenv=True, envvars=preset_envvars
     )
-    pprint(cfg.to_dict(), sort_dicts=False)
-    pprint(cfg.chains.mindmap.template.system[:200] + "...")
+
+
+def init_command(config, debug, pdf_parser, model, override):
+    init_logger(debug)
+    # init_env_var()
+    cfg = load_config(config)
+    logger.debug(f"init_command(): config: {pformat(cfg.to_dict(), sort_dicts=False)}")
     if pdf_parser:
         cfg.pdf_parser = PdfParserType.from_string(pdf_parser)
     if model:
@@ -92,13 +104,24 @@ def main():
     pass
 
 
-@main.command(cls=BaseCommand)
-@click.argument("input_path", type=str)
-@click.option("--output_dir", type=click.Path(), default=None, help="保存总结的目录")
-def summary(config, debug, pdf_parser, model, override, input_path, output_dir):
-    cfg = init_command(config, debug, pdf_parser, model, override)
-    engine = Engine(cfg)
+def report_usage(engine: "Engine"):
+    from .tracing import get_tracer
+
+    for name, usage in engine.usage().items():
+        logger.info(f"Token usage [{name}]: {usage}")
+    tracer = get_tracer()
+    if tracer is not None:
+        logger.info(
+            f"Trace written to {tracer.path} (run: {tracer.run_id}), "
+            "see `hongxiu report` for details"
+        )
+
+
+def collect_inputs(input_path: str, output_dir: str) -> Tuple[List[Path], Path]:
+    """整理输入的 PDF 文件列表及输出目录
 
+    input_path 可以是 PDF 文件、包含 PDF 的目录，或者论文的 URL/arXiv ID。
+    """
     pi = Path(input_path)
     if not pi.exists():
         pi = download_paper(input_path, output_dir)
@@ -111,44 +134,104 @@ def summary(config, debug, pdf_parser, model, override, input_path, output_dir):
     po = Path(output_dir) if output_dir else pi.parent
     if not po.exists():
         po.mkdir(parents=True)
+    return inputs, po
 
-    for f in inputs:
-        output_filename = f.stem + ".summary.pdf"
-        output_fullpath = po / output_filename
-        logger.debug(f"engine.summarize(): input: {f}, output: {output_fullpath}")
-        engine.summarize(f, output_fullpath, override)
+
+@main.command(cls=BaseCommand)
+@click.argument("input_path", type=str)
+@click.option("--output_dir", type=click.Path(), default=None, help="保存总结的目录")
+@click.option(
+    "--jobs", type=click.IntRange(min=1), default=1, help="同时处理的论文数量"
+)
+@click.option("--stream", is_flag=True, help="流式输出，边生成边更新中间结果")
+def summary(
+    config, debug, pdf_parser, model, override, input_path, output_dir, jobs, stream
+):
+    from .engine import Engine
+
+    cfg = init_command(config, debug, pdf_parser, model, override)
+    if stream:
+        cfg.stream = True
+    engine = Engine(cfg)
+    inputs, po = collect_inputs(input_path, output_dir)
+
+    async def run():
+        async for f, result in engine.summarize_many(inputs, po, override, jobs):
+            if result is None:
+                logger.error(f"Failed to summarize {f}")
+            else:
+                logger.info(f"Summary done: {f}")
+
+    asyncio.run(run())
+    report_usage(engine)
 
 
 @main.command(cls=BaseCommand)
 @click.argument("input_path", type=str)
 @click.option("--output_dir", type=click.Path(), default=None, help="保存脑图的目录")
-def mindmap(config, debug, pdf_parser, model, override, input_path, output_dir):
+@click.option(
+    "--jobs", type=click.IntRange(min=1), default=1, help="同时处理的论文数量"
+)
+@click.option("--stream", is_flag=True, help="流式输出，边生成边更新中间结果")
+def mindmap(
+    config, debug, pdf_parser, model, override, input_path, output_dir, jobs, stream
+):
+    from .engine import Engine
+
     cfg = init_command(config, debug, pdf_parser, model, override)
+    if stream:
+        cfg.stream = True
     engine = Engine(cfg)
+    inputs, po = collect_inputs(input_path, output_dir)
 
-    pi = Path(input_path)
-    if not pi.exists():
-        paper = download_paper(input_path, output_dir)
-        inputs = [paper]
-    else:
-        if pi.is_dir():
-            inputs = [f for f in pi.iterdir() if f.suffix == ".pdf"]
-        else:
-            inputs = [pi]
+    async def run():
+        async for f, result in engine.mindmap_many(inputs, po, override, jobs):
+            if result is None:
+                logger.error(f"Failed to generate mindmap for {f}")
+            else:
+                logger.info(f"Mindmap done: {f}")
+
+    asyncio.run(run())
+    report_usage(engine)
 
-    po = Path(output_dir) if output_dir else pi.parent
-    if not po.exists():
-        po.mkdir(parents=True)
-    for f in inputs:
-        output_pdf_filename = f.stem + ".mindmap.pdf"
-        output_pdf_fullpath = po / output_pdf_filename
-        logger.debug(f"engine.mindmap(): input: {f}, output: {output_pdf_fullpath}")
-        engine.mindmap(f, output_pdf_fullpath, override)
+
+@main.command(name="all", cls=BaseCommand)
+@click.argument("input_path", type=str)
+@click.option(
+    "--output_dir", type=click.Path(), default=None, help="保存总结和脑图的目录"
+)
+@click.option(
+    "--jobs", type=click.IntRange(min=1), default=1, help="同时处理的论文数量"
+)
+@click.option("--stream", is_flag=True, help="流式输出，边生成边更新中间结果")
+def all_(
+    config, debug, pdf_parser, model, override, input_path, output_dir, jobs, stream
+):
+    """同时生成论文总结和脑图，每篇论文只解析一次"""
+    from .engine import Engine
+
+    cfg = init_command(config, debug, pdf_parser, model, override)
+    if stream:
+        cfg.stream = True
+    engine = Engine(cfg)
+    inputs, po = collect_inputs(input_path, output_dir)
+
+    async def run():
+        async for f, result in engine.process_many(inputs, po, override, jobs):
+            if result is None:
+                logger.error(f"Failed to process {f}")
+            else:
+                logger.info(f"Summary and mindmap done: {f}")
+
+    asyncio.run(run())
+    report_usage(engine)
 
 
 @main.command(cls=BaseCommand)
 @click.argument("input_path", type=click.Path(exists=True))
 def dev(config, debug, pdf_parser, model, override, input_path):
+    from .engine import Engine
+
     cfg = init_command(config, debug, pdf_parser, model, override)
     engine = Engine(cfg)
 
@@ -158,10 +241,194 @@ def dev(config, debug, pdf_parser, model, override, input_path):
     for f in figures:
         print(f"Figure:  [{f.type}]\t{f.link}\t{f.desc}")
 
+
+@main.group()
+def cache():
+    """LLM 响应及 PDF 解析结果的缓存管理"""
+    pass
+
+
+@cache.command()
+@click.option(
+    "--config", type=click.Path(exists=True), default=None, help="配置文件路径"
+)
+def stats(config):
+    """显示缓存统计信息"""
+    init_logger(False)
+    cfg = load_config(config)
+    llm_cache = create_llm_cache(cfg)
+    parse_cache = create_parse_cache(cfg)
+    if llm_cache is None:
+        print("LLM cache is disabled.")
+    else:
+        print_llm_cache_stats(llm_cache.stats())
+    if parse_cache is None:
+        print("Parse cache is disabled.")
+    else:
+        print_parse_cache_stats(parse_cache.stats())
+
+
+def print_llm_cache_stats(info: dict):
+    print(f"path:    {info['path']}")
+    print(f"entries: {info['entries']}")
+    print(f"size:    {info['size'] / 1024 / 1024:.2f} MB")
+    print(f"hits:    {info['hits']}")
+    for group in info["groups"]:
+        print(
+            f"  {group['chain']:<24}{group['model']:<40}"
+            f"{group['entries']:>8} entries {group['size'] / 1024:>10.1f} KB"
+            f"{group['hits']:>8} hits"
+        )
+
+
+def print_parse_cache_stats(info: dict):
+    print(f"path:    {info['path']}")
+    print(f"entries: {info['entries']}")
+    print(
+        f"size:    {info['size'] / 1024 / 1024:.2f} MB"
+        f" ({info['raw_size'] / 1024 / 1024:.2f} MB uncompressed)"
+    )
+    print(f"hits:    {info['hits']}")
+    for group in info["groups"]:
+        print(
+            f"  {group['parser']:<24}{group['entries']:>8} entries"
+            f" {group['size'] / 1024:>10.1f} KB{group['hits']:>8} hits"
+        )
+
+
+@cache.command()
+@click.option(
+    "--config", type=click.Path(exists=True), default=None, help="配置文件路径"
+)
+@click.option("--max-size-mb", type=float, default=None, help="缓存总大小上限（MB）")
+@click.option("--max-age-days", type=float, default=None, help="缓存最长保留天数")
+def prune(config, max_size_mb, max_age_days):
+    """按大小和时间淘汰缓存"""
+    init_logger(False)
+    cfg = load_config(config)
+    for name, c in [
+        ("LLM cache", create_llm_cache(cfg)),
+        ("Parse cache", create_parse_cache(cfg)),
+    ]:
+        if c is None:
+            print(f"{name} is disabled.")
+            continue
+        removed = c.prune(max_size_mb=max_size_mb, max_age_days=max_age_days)
+        print(f"{name}: removed {removed} entries.")
+
+
+@main.command()
+@click.option(
+    "--config", type=click.Path(exists=True), default=None, help="配置文件路径"
+)
+@click.option("--debug", is_flag=True, help="Enable debug mode")
+@click.option(
+    "--pdf-parser",
+    type=click.Choice(["pymupdf", "pypdf2", "pix2text", "hybrid"]),
+    default=None,
+    help="PDF parser library, default is pymupdf",
+)
+@click.option("--papers", type=click.IntRange(min=1), default=10, help="论文数量")
+@click.option("--pages", type=click.IntRange(min=1), default=8, help="每篇论文的页数")
+@click.option(
+    "--jobs", type=click.IntRange(min=1), default=4, help="同时处理的论文数量"
+)
+@click.option("--latency", type=float, default=None, help="模拟响应时间的中位数（秒）")
+@click.option("--error-rate", type=float, default=None, help="注入 429/5xx 错误的概率")
+@click.option("--stream", is_flag=True, help="流式输出")
+@click.option(
+    "--output_dir", type=click.Path(), default=None, help="合成论文及输出结果的目录"
+)
+@click.option(
+    "--serve",
+    is_flag=True,
+    help="只启动模拟服务（监听 fake_llm.base_url），供 --model fake:<model_name> 使用",
+)
+def bench(
+    config,
+    debug,
+    pdf_parser,
+    papers,
+    pages,
+    jobs,
+    latency,
+    error_rate,
+    stream,
+    output_dir,
+    serve,
+):
+    """使用本地模拟 LLM 服务测量端到端吞吐量，不消耗 token"""
+    import tempfile
+    import time
+    from urllib.parse import urlparse
+
+    from .bench import run_bench
+    from .fake_llm import FakeLLMServer, load_fake_llm_settings
+
+    init_logger(debug)
+    cfg = load_config(config)
+    cfg.debug = debug
+    if pdf_parser:
+        cfg.pdf_parser = PdfParserType.from_string(pdf_parser)
+    if stream:
+        cfg.stream = True
+    settings = load_fake_llm_settings(cfg)
+    if latency is not None:
+        settings.latency_median = latency
+    if error_rate is not None:
+        # 429 与 5xx 各占一半
+        settings.rate_limit_rate = error_rate / 2
+        settings.server_error_rate = error_rate / 2
+
+    if serve:
+        url = urlparse(cfg.fake_llm.get("base_url", "http://127.0.0.1:8765/v1"))
+        with FakeLLMServer(settings, url.hostname or "127.0.0.1", url.port or 80):
+            try:
+                while True:
+                    time.sleep(3600)
+            except KeyboardInterrupt:
+                pass
+        return
+
+    with tempfile.TemporaryDirectory(prefix="hongxiu-bench-") as tmp:
+        report = run_bench(cfg, Path(output_dir or tmp), papers, pages, jobs, settings)
+    print(report)
+
+
+@main.command()
+@click.option(
+    "--config", type=click.Path(exists=True), default=None, help="配置文件路径"
+)
+@click.option(
+    "--trace",
+    type=click.Path(exists=True),
+    default=None,
+    help="追踪文件路径，默认为配置中的 tracing.path",
+)
+@click.option(
+    "--run", "run_id", default=None, help="运行 ID，all 表示全部运行，默认为最近一次"
+)
+@click.option("--top", type=click.IntRange(min=0), default=5, help="列出最慢的论文数量")
+def report(config, trace, run_id, top):
+    """汇总追踪文件中各阶段的耗时、token 用量和费用"""
+    from .tracing import DEFAULT_TRACE_PATH, load_trace, summarize_trace
+
+    init_logger(False)
+    if not trace:
+        cfg = load_config(config).tracing or ConfigItem()
+        trace = Path(cfg.get("path", DEFAULT_TRACE_PATH)).expanduser()
+    if not Path(trace).exists():
+        print(f"Trace file not found: {trace}")
+        return
+    print(summarize_trace(load_trace(Path(trace)), run_id, top))
+
+
 @main.command()
 def version():
     from . import __version__
+
     print(f"hongxiu version: {__version__}")
 
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,248 @@
+import re
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+from .utils import estimate_tokens
+
+# Markdown 标题行，可能带有章节编号或加粗，如 "## 7 References"、"**Acknowledgments**"
+_RE_HEADING = re.compile(r"^(#{1,6})\s+(.*)$")
+_RE_BOLD_LINE = re.compile(r"^\*\*(.+)\*\*$")
+_RE_SECTION_NUMBER = re.compile(r"^(?:[0-9]+(?:\.[0-9]+)*\.?|[ivxlc]+\.|[a-z]\.?)\s+")
+_RE_REFERENCES = re.compile(r"^(references?|bibliography|works cited|参考文献)$")
+_RE_ACKNOWLEDGEMENTS = re.compile(r"^(acknowledge?ments?|致谢|鸣谢)$")
+# 附录标题，如 "Appendix"、"A Proofs"、"A.1 Details"
+_RE_APPENDIX = re.compile(
+    r"^(?:(?i:appendix|appendices|supplementary)\b|附录|[A-Z](?:\.\d+)*\.?\s+\S)"
+)
+# 只有页码的行，如 "12"、"- 12 -"、"Page 12"、"12 / 30"、"第 12 页"
+_RE_PAGE_NUMBER = re.compile(
+    r"^\s*(?:[-–—]?\s*\d{1,4}\s*[-–—]?|page\s+\d{1,4}(?:\s+of\s+\d{1,4})?"
+    r"|\d{1,4}\s*/\s*\d{1,4}|第\s*\d{1,4}\s*页)\s*$",
+    re.IGNORECASE,
+)
+# Markdown 图片链接及 HTML 图片标签
+_RE_IMAGE_LINK = re.compile(r"!\[[^\]]*\]\([^)]*\)|<img\b[^>]*>", re.IGNORECASE)
+_RE_BLANK_LINES = re.compile(r"\n\s*\n(\s*\n)+")
+_RE_DIGITS = re.compile(r"\d+")
+# pymupdf4llm 的分页符
+_RE_PAGE_BREAK = re.compile(r"^-{5,}$")
+
+# 不视为页眉页脚的行：标题、表格、代码块、公式块
+_HEADER_FOOTER_EXCLUDES = ("#", "|", "```", "$$")
+
+
+class CompactionSettings(BaseModel):
+    """文本压缩的参数，每条规则都可以单独开关
+
+    Args:
+        enabled (bool): 是否压缩
+        references (bool): 删除参考文献
+        acknowledgements (bool): 删除致谢
+        headers_footers (bool): 删除在多页重复出现的页眉页脚，只在文本中有分页符时生效
+        page_numbers (bool): 删除只有页码的行
+        image_links (bool): 删除图片链接（图片抽取仍使用保留图片的文本）
+        blank_lines (bool): 合并连续的空行
+        min_repeats (int): 重复出现多少次的短行视为页眉页脚
+        max_header_length (int): 页眉页脚的最大长度
+        edge_lines (int): 只在每页开头和结尾的若干行中查找页眉页脚
+    """
+
+    enabled: bool = True
+    references: bool = True
+    acknowledgements: bool = True
+    headers_footers: bool = True
+    page_numbers: bool = True
+    image_links: bool = True
+    blank_lines: bool = True
+    min_repeats: int = 3
+    max_header_length: int = 120
+    edge_lines: int = 3
+
+
+class CompactionReport(BaseModel):
+    """文本压缩前后的 token 数量
+
+    Args:
+        tokens_before (int): 压缩前的 token 数量
+        tokens_after (int): 压缩后的 token 数量
+        removed (Dict[str, int]): 各条规则删除的 token 数量
+    """
+
+    tokens_before: int = 0
+    tokens_after: int = 0
+    removed: Dict[str, int] = {}
+
+    @property
+    def ratio(self) -> float:
+        """删除的 token 比例"""
+        if self.tokens_before == 0:
+            return 0.0
+        return 1 - self.tokens_after / self.tokens_before
+
+    def __str__(self) -> str:
+        details = ", ".join(f"{k}: {v}" for k, v in self.removed.items() if v)
+        return (
+            f"tokens: {self.tokens_before} -> {self.tokens_after} "
+            f"(-{self.ratio:.0%}{'; ' + details if details else ''})"
+        )
+
+
+def load_compaction_settings(config: Config) -> CompactionSettings:
+    """读取配置中的 compaction 部分"""
+    cfg = config.compaction or ConfigItem()
+    values = {k: v for k, v in cfg.to_dict().items() if v not in (None, "")}
+    return CompactionSettings(**values)
+
+
+def compact_text(
+    text: str, settings: CompactionSettings
+) -> Tuple[str, CompactionReport]:
+    """在发送给模型之前压缩论文文本
+
+    Args:
+        text (str): PDF 解析得到的 Markdown 文本
+        settings (CompactionSettings): 压缩参数
+
+    Returns:
+        Tuple[str, CompactionReport]: 压缩后的文本，以及压缩前后的 token 数量
+    """
+    report = CompactionReport(tokens_before=estimate_tokens(text))
+    if settings.enabled:
+        rules: List[Tuple[str, Callable[[str], str]]] = [
+            ("references", strip_references),
+            ("acknowledgements", strip_acknowledgements),
+            ("headers_footers", lambda t: strip_headers_footers(t, settings)),
+            ("page_numbers", strip_page_numbers),
+            ("image_links", strip_image_links),
+            ("blank_lines", collapse_blank_lines),
+        ]
+        for name, rule in rules:
+            if not getattr(settings, name):
+                continue
+            before = estimate_tokens(text)
+            text = rule(text)
+            report.removed[name] = before - estimate_tokens(text)
+    report.tokens_after = estimate_tokens(text)
+    return text, report
+
+
+def strip_references(text: str) -> str:
+    """删除参考文献，直至附录或文末"""
+    return _strip_section(text, _RE_REFERENCES, until_appendix=True)
+
+
+def strip_acknowledgements(text: str) -> str:
+    """删除致谢，直至下一个章节"""
+    return _strip_section(text, _RE_ACKNOWLEDGEMENTS, until_appendix=False)
+
+
+def strip_headers_footers(text: str, settings: CompactionSettings) -> str:
+    """删除在多页重复出现的短行（页码等数字不同也视为相同）
+
+    只检查每页开头和结尾的几行，避免误删正文中相似的句子。
+    文本中没有分页符（如 PyPDF2 的输出）时无法确定页面的边界，
+    正文中反复出现的短行（如数学论文中的 "where"、"Proof."）会被误删，因此不做处理。
+    """
+    lines = text.split("\n")
+    pages: List[List[int]] = [[]]
+    for i, line in enumerate(lines):
+        if _RE_PAGE_BREAK.match(line.strip()):
+            pages.append([])
+        elif line.strip():
+            pages[-1].append(i)
+    if len(pages) == 1:
+        return text
+    edges = set()
+    for page in pages:
+        edges.update(page[: settings.edge_lines])
+        edges.update(page[-settings.edge_lines :])
+    keys = [
+        _header_footer_key(line, settings) if i in edges else ""
+        for i, line in enumerate(lines)
+    ]
+    counts = Counter(k for k in keys if k)
+    # 分页符本身也一并删除
+    return "\n".join(
+        line
+        for line, key in zip(lines, keys)
+        if (not key or counts[key] < settings.min_repeats)
+        and not _RE_PAGE_BREAK.match(line.strip())
+    )
+
+
+def strip_page_numbers(text: str) -> str:
+    """删除只有页码的行"""
+    return "\n".join(
+        line for line in text.split("\n") if not _RE_PAGE_NUMBER.match(line)
+    )
+
+
+def strip_image_links(text: str) -> str:
+    """删除图片链接"""
+    return _RE_IMAGE_LINK.sub("", text)
+
+
+def collapse_blank_lines(text: str) -> str:
+    """将连续的多个空行合并为一个"""
+    return _RE_BLANK_LINES.sub("\n\n", text).strip() + "\n"
+
+
+def _heading_title(line: str) -> Tuple[int, str]:
+    """返回标题的级别及标题文本，不是标题时级别为 0
+
+    加粗的独立行（pymupdf4llm 常这样输出章节标题），以及单独成行的参考文献、致谢，
+    视为最低级别的标题。
+    """
+    line = line.strip()
+    m = _RE_HEADING.match(line)
+    if m:
+        return len(m.group(1)), m.group(2).strip("*_ ")
+    m = _RE_BOLD_LINE.match(line)
+    if m:
+        return 7, m.group(1).strip("*_ ")
+    # 纯文本解析器（如 PyPDF2）输出的独立标题行
+    if _RE_REFERENCES.match(line.lower()) or _RE_ACKNOWLEDGEMENTS.match(line.lower()):
+        return 7, line
+    return 0, ""
+
+
+def _normalize_title(title: str) -> str:
+    """去除章节编号并转为小写，如 "7. References" -> "references" """
+    title = _RE_SECTION_NUMBER.sub("", title.lower())
+    return title.strip(" .:：")
+
+
+def _strip_section(text: str, pattern: re.Pattern, until_appendix: bool) -> str:
+    lines = text.split("\n")
+    result: List[str] = []
+    skipping_level = 0
+    for line in lines:
+        level, title = _heading_title(line)
+        if skipping_level:
+            if not level:
+                continue
+            if until_appendix:
+                # 参考文献之后只保留附录
+                if not _RE_APPENDIX.match(title):
+                    continue
+            elif level > skipping_level and level == 7:
+                # 致谢中的加粗行不视为新的章节
+                continue
+            skipping_level = 0
+        if level and pattern.match(_normalize_title(title)):
+            skipping_level = level
+            continue
+        result.append(line)
+    return "\n".join(result)
+
+
+def _header_footer_key(line: str, settings: CompactionSettings) -> str:
+    stripped = line.strip()
+    if len(stripped) < 4 or len(stripped) > settings.max_header_length:
+        return ""
+    if stripped.startswith(_HEADER_FOOTER_EXCLUDES):
+        return ""
+    return _RE_DIGITS.sub("#", stripped.lower())
@@ -52,6 +52,21 @@ class ConfigItem(BaseModel):
         else:
             return None
 
+    def get(self, name: str, default: Any = None) -> Any:
+        """获取配置项，不存在或为空时返回默认值
+
+        Args:
+            name (str): 配置项名称
+            default (Any): 默认值
+
+        Returns:
+            Any: 配置项的值
+        """
+        value = self.__getattr__(name)
+        if value is None or value == "":
+            return default
+        return value
+
     def __setattr__(self, name: str, value):
         """通过属性方式设置配置项
 
@@ -62,7 +77,7 @@ class ConfigItem(BaseModel):
         if name == "value":
             super().__setattr__(name, value)
         else:
-            print(f"ConfigItem.__setattr__(): {name}: {value}")
+            logger.debug(f"ConfigItem.__setattr__(): {name}: {value}")
             self.value[name] = value
 
     def to_dict(self) -> dict:
@@ -234,6 +249,18 @@ class Config(BaseModel):
         """
         return self.config.to_dict()
 
+    def get(self, name: str, default: Any = None) -> Any:
+        """获取配置项，不存在或为空时返回默认值
+
+        Args:
+            name (str): 配置项名称
+            default (Any): 默认值
+
+        Returns:
+            Any: 配置项的值
+        """
+        return self.config.get(name, default)
+
     def __getattr__(self, name: str):
         """通过属性方式访问配置项
 
@@ -0,0 +1,271 @@
+import json
+import re
+import sys
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import Callable, Iterable, List, NamedTuple, Optional
+
+# Markdown 标题行
+_RE_HEADING = re.compile(r"^(#{1,6})[ \t]+(\S.*)$", re.MULTILINE)
+# 图表说明："Figure 3:"、"Fig. 3."、"Table 2:"、"图 3："、"表 2："，可能带有粗体标记；
+# 说明可能折行，延续到空行、标题、图片或下一个说明之前（最多 4 行）
+_CAPTION_START = r"(?:\*\*|_)?(Figure|Fig\.?|Table|图|表)[ \t]*(\d+)[ \t]*[:.：|]"
+_RE_CAPTION = re.compile(
+    rf"^[ \t]*{_CAPTION_START}[^\n]*"
+    r"(?:\n(?![ \t]*(?:#|!\[|<img|(?:\*\*|_)?(?:Figure|Fig\.?|Table|图|表)[ \t]*\d))"
+    r"[ \t]*\S[^\n]*){0,4}",
+    re.MULTILINE | re.IGNORECASE,
+)
+# Markdown 图片链接及 HTML 图片标签，第一个非空分组为图片链接
+_RE_IMAGE = re.compile(
+    r"!\[[^\]]*\]\(\s*([^)\s]+)[^)]*\)|<img\b[^>]*\bsrc=[\"']([^\"']+)[\"'][^>]*>",
+    re.IGNORECASE,
+)
+# 序列化格式的版本
+_FORMAT_VERSION = 1
+# 所有偏移量均为字符偏移，统一使用无符号 64 位整数
+_TYPECODE = "Q"
+
+
+class Section(NamedTuple):
+    """章节：从标题行开始，到下一个同级或更高级标题之前结束"""
+
+    title: str
+    level: int
+    start: int
+    end: int
+    page: int
+
+
+class Caption(NamedTuple):
+    """图表说明
+
+    Args:
+        kind (str): FIGURE 或 TABLE
+        number (int): 图表编号
+    """
+
+    kind: str
+    number: int
+    text: str
+    start: int
+    end: int
+    page: int
+
+
+class ImageRef(NamedTuple):
+    """文本中的图片链接"""
+
+    link: str
+    start: int
+    end: int
+    page: int
+
+
+class Document:
+    """解析得到的论文，保存全文以及页面、章节、图表说明和图片链接的位置
+
+    结构信息只以字符偏移量的形式保存在数组中，标题、说明等文字按需从全文中截取，
+    因此数百页的论文也只比全文本身多占用很少的内存。
+    Section、Caption、ImageRef 在访问时才创建。
+
+    Args:
+        text (str): 全文，即各页文本按顺序拼接的结果
+        page_starts (Iterable[int]): 各页在全文中的起始偏移量
+    """
+
+    __slots__ = ("text", "_pages", "_headings", "_captions", "_images")
+
+    def __init__(self, text: str, page_starts: Optional[Iterable[int]] = None):
+        self.text = text
+        self._pages = array(_TYPECODE, page_starts or [0])
+        # 标题：(起始偏移量, 级别, 标题文字起始偏移量, 标题行结束偏移量)
+        self._headings = array(_TYPECODE)
+        # 图表说明：(起始偏移量, 结束偏移量, 编号, 类型 0=FIGURE/1=TABLE)
+        self._captions = array(_TYPECODE)
+        # 图片链接：(起始偏移量, 结束偏移量, 链接起始偏移量, 链接结束偏移量)
+        self._images = array(_TYPECODE)
+        self._index()
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[str]) -> "Document":
+        """由按顺序排列的各页文本构造"""
+        texts, starts, offset = [], [], 0
+        for page in pages:
+            starts.append(offset)
+            texts.append(page)
+            offset += len(page)
+        return cls("".join(texts), starts)
+
+    def _index(self):
+        for m in _RE_HEADING.finditer(self.text):
+            self._headings.extend([m.start(), len(m.group(1)), m.start(2), m.end()])
+        for m in _RE_CAPTION.finditer(self.text):
+            kind = 1 if m.group(1).lower() in ("table", "表") else 0
+            self._captions.extend([m.start(), m.end(), int(m.group(2)), kind])
+        for m in _RE_IMAGE.finditer(self.text):
+            group = 1 if m.group(1) else 2
+            self._images.extend([m.start(), m.end(), m.start(group), m.end(group)])
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def page_of(self, offset: int) -> int:
+        """偏移量所在的页码（从 1 开始）"""
+        return max(1, bisect_right(self._pages, offset))
+
+    def page_text(self, number: int) -> str:
+        """第 number 页（从 1 开始）的文本"""
+        start = self._pages[number - 1]
+        end = self._pages[number] if number < len(self._pages) else len(self.text)
+        return self.text[start:end]
+
+    def sections(self) -> List[Section]:
+        """按出现顺序排列的所有章节"""
+        h = self._headings
+        count = len(h) // 4
+        # 章节延续到下一个同级或更高级的标题之前
+        ends = [len(self.text)] * count
+        open_sections: List[int] = []
+        for i in range(count):
+            while open_sections and h[open_sections[-1] * 4 + 1] >= h[i * 4 + 1]:
+                ends[open_sections.pop()] = h[i * 4]
+            open_sections.append(i)
+        return [
+            Section(
+                title=self.text[h[i * 4 + 2] : h[i * 4 + 3]].strip(),
+                level=h[i * 4 + 1],
+                start=h[i * 4],
+                end=ends[i],
+                page=self.page_of(h[i * 4]),
+            )
+            for i in range(count)
+        ]
+
+    def captions(self) -> List[Caption]:
+        c = self._captions
+        return [
+            Caption(
+                kind="TABLE" if c[i + 3] else "FIGURE",
+                number=c[i + 2],
+                text=" ".join(self.text[c[i] : c[i + 1]].split()),
+                start=c[i],
+                end=c[i + 1],
+                page=self.page_of(c[i]),
+            )
+            for i in range(0, len(c), 4)
+        ]
+
+    def images(self) -> List[ImageRef]:
+        m = self._images
+        return [
+            ImageRef(
+                link=self.text[m[i + 2] : m[i + 3]],
+                start=m[i],
+                end=m[i + 1],
+                page=self.page_of(m[i]),
+            )
+            for i in range(0, len(m), 4)
+        ]
+
+    def select(self, include: Callable[[Section], bool]) -> str:
+        """只保留满足条件的章节（含其子章节），第一个标题之前的内容（标题、摘要等）总是保留
+
+        Args:
+            include (Callable[[Section], bool]): 判断是否保留章节的函数
+
+        Returns:
+            str: 保留的章节按原顺序拼接的文本
+        """
+        sections = self.sections()
+        first = sections[0].start if sections else len(self.text)
+        parts = [self.text[:first]]
+        end = first
+        for section in sections:
+            # 已被上级章节包含
+            if section.start < end:
+                continue
+            if include(section):
+                parts.append(self.text[section.start : section.end])
+                end = section.end
+        return "".join(parts)
+
+    def image_context(self, before: int = 300, after: int = 600) -> str:
+        """图片链接及其前后的文本（通常包含图片说明），相邻的片段会被合并
+
+        用于图片抽取等只需要图片附近内容的调用链，代替发送全文。
+
+        Args:
+            before (int): 图片链接之前保留的字符数
+            after (int): 图片链接之后保留的字符数
+
+        Returns:
+            str: 以空行分隔的各个片段，没有图片时返回空字符串
+        """
+        windows: List[List[int]] = []
+        for image in self.images():
+            start = self._line_start(max(0, image.start - before))
+            end = self._line_end(min(len(self.text), image.end + after))
+            if windows and start <= windows[-1][1]:
+                windows[-1][1] = max(windows[-1][1], end)
+            else:
+                windows.append([start, end])
+        return "\n\n".join(self.text[a:b].strip() for a, b in windows)
+
+    def _line_start(self, offset: int) -> int:
+        return self.text.rfind("\n", 0, offset) + 1
+
+    def _line_end(self, offset: int) -> int:
+        end = self.text.find("\n", offset)
+        return len(self.text) if end < 0 else end
+
+    def to_bytes(self) -> bytes:
+        """序列化为压缩后的字节串，可以直接写入缓存"""
+        arrays = [self._pages, self._headings, self._captions, self._images]
+        header = {"version": _FORMAT_VERSION, "lengths": [len(a) for a in arrays]}
+        data = bytearray(json.dumps(header).encode("utf-8") + b"\n")
+        for a in arrays:
+            if sys.byteorder == "big":
+                a = array(_TYPECODE, a)
+                a.byteswap()
+            data += a.tobytes()
+        data += self.text.encode("utf-8")
+        return zlib.compress(bytes(data))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Document":
+        """从 to_bytes() 的结果恢复，无需重新扫描全文"""
+        data = zlib.decompress(data)
+        newline = data.index(b"\n")
+        header = json.loads(data[:newline])
+        if header.get("version") != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported document format: {header.get('version')}")
+        offset = newline + 1
+        arrays = []
+        for length in header["lengths"]:
+            a = array(_TYPECODE)
+            size = length * a.itemsize
+            a.frombytes(data[offset : offset + size])
+            if sys.byteorder == "big":
+                a.byteswap()
+            arrays.append(a)
+            offset += size
+        doc = cls.__new__(cls)
+        doc.text = data[offset:].decode("utf-8")
+        doc._pages, doc._headings, doc._captions, doc._images = arrays
+        return doc
+
+    def __len__(self) -> int:
+        return len(self.text)
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return (
+            f"Document(chars={len(self.text)}, pages={self.page_count}, "
+            f"sections={len(self._headings) // 4}, captions={len(self._captions) // 4}, "
+            f"images={len(self._images) // 4})"
+        )
@@ -1,78 +1,161 @@
+import asyncio
+import json
 import os
+import time
+from contextlib import contextmanager
+from functools import partial
 from pathlib import Path
-from typing import Optional, Dict, List, Callable, Tuple
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+    Type,
+)
 from loguru import logger
-from portkey_ai import PORTKEY_GATEWAY_URL, createHeaders
-from pydantic import BaseModel, SecretStr
-
-# 导入langchain_core中的相关模块
-from langchain_core.runnables.base import Runnable
-from langchain_core.language_models.chat_models import BaseChatModel
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-from langchain_openai import ChatOpenAI
-from langchain_anthropic import ChatAnthropic
-from langchain_community.chat_models import ChatTongyi
-
-from .config import Config
+from pydantic import BaseModel, ValidationError
+
+from .cache import LLMCache, create_llm_cache, create_parse_cache
+from .chunking import MapReduceSettings, chunk_text, load_map_reduce_settings
+from .compact import (
+    CompactionSettings,
+    compact_text,
+    load_compaction_settings,
+    strip_image_links,
+)
+from .config import Config, ConfigItem
+from .document import Document
+from .figure_extract import FigureExtractSettings, load_figure_extract_settings
+from .figure_merge import (
+    FigureMergeSettings,
+    image_links,
+    load_figure_merge_settings,
+    merge_figures,
+)
+from .hedge import (
+    HedgeSettings,
+    get_latency_histogram,
+    load_hedge_settings,
+    parse_llms,
+)
+from .latex import LatexSettings, alatex_to_pdf, load_latex_settings
+from .manifest import (
+    IncrementalSettings,
+    Manifest,
+    file_digest,
+    get_manifest,
+    load_incremental_settings,
+    text_digest,
+)
 from .model import Figure, Figures, Summary, Mindmap
-from .pdf_parser import PdfParser, PdfParserType
-from .render import render_mindmap_to_pdf, render_summary_to_latex
-from .utils import latex_to_pdf
+from .pdf_parser import PdfParser, PdfParserType, load_pdf_settings
+from .ratelimit import get_rate_limiter
+from .tracing import create_tracer, set_tracer, span, trace_paper
+from .render import (
+    render_mindmap_to_pdf,
+    render_summary_to_latex,
+    render_summary_to_markdown,
+)
+from .utils import estimate_tokens, package_path
+
+# LangChain 及各模型的客户端导入较慢，因此只在构建调用链时才导入
+if TYPE_CHECKING:
+    from langchain_core.language_models.chat_models import BaseChatModel
+    from langchain_core.prompts import ChatPromptTemplate
+
+    from .chain import Chain, ChainBackend
+    from .usage import TokenUsage
+
+# 各调用链的输出结构
+CHAIN_OUTPUTS: Dict[str, type] = {
+    "summary": Summary,
+    "summary_figures": Figures,
+    "summary_merge_figures": Summary,
+    "summary_chunk": Summary,
+    "summary_reduce": Summary,
+    "mindmap": Mindmap,
+}
+# 影响论文总结、脑图 .json 的调用链
+SUMMARY_CHAINS = [
+    "summary",
+    "summary_chunk",
+    "summary_reduce",
+    "summary_figures",
+    "summary_merge_figures",
+]
+MINDMAP_CHAINS = ["mindmap"]
+# 海报模板及渲染代码变化时，.tex、脑图需要重新渲染
+_POSTER_TEMPLATE = Path(package_path("config/poster-template.tex"))
+_RENDER_MODULE = Path(__file__).with_name("render.py")
 
 
 class Engine(BaseModel):
     hooks: Dict[str, List[Callable]] = {
         "on_summary": [],
         "on_mindmap": [],
+        "on_stage": [],
     }
-    config: Optional[Config] = None
-    __llm: Optional[BaseChatModel] = None
-    __llm_provider: str = ""
-    __llm_name: str = ""
-    __chains: Dict[str, Optional[Runnable]] = {
-        "mindmap": None,
-        "summary": None,
-        "summary_figures": None,
-        "summary_merge_figures": None,
-    }
+    config: Config
+    __llms: List[str] = []
+    __models: Dict[str, "BaseChatModel"] = {}
+    __cache: Optional[LLMCache] = None
+    __hedge: HedgeSettings = HedgeSettings()
+    __figure_merge: FigureMergeSettings = FigureMergeSettings()
+    __figure_extract: FigureExtractSettings = FigureExtractSettings()
+    __latex: LatexSettings = LatexSettings()
+    __compaction: CompactionSettings = CompactionSettings()
+    __incremental: IncrementalSettings = IncrementalSettings()
+    __chains: Dict[str, "Chain"] = {}
+    __map_reduce: MapReduceSettings = MapReduceSettings()
     __pdf_parser: PdfParser = PdfParser(type=PdfParserType.PYMUPDF)
 
     # pylint: disable=no-member
     def __init__(self, config: dict | Config, **kwargs):
-        super().__init__(**kwargs)
-        # 整理配置
-        if isinstance(config, dict):
-            self.config = Config(**config)
-        else:
-            self.config = config
-        # 初始化链
-        self.__llm_provider, self.__llm_name = self.config.llm.split(":")
-        if not self.__llm_provider or not self.__llm_name:
+        # 整理配置，dict 由 pydantic 转换为 Config
+        super().__init__(config=config, **kwargs)
+        # 初始化链，llm 可以是多个模型，排在最前面的为主模型
+        self.__llms = parse_llms(self.config.llm)
+        if not self.__llms:
             raise ValueError("Invalid LLM configuration.")
-        self.__llm = self.__create_model()
-        self.__chains["summary"] = self.__create_chain(
-            self.__create_prompt(self.config.chains.summary.template), Summary
-        )
-        self.__chains["summary_figures"] = self.__create_chain(
-            self.__create_prompt(self.config.chains.summary_figures.template), Figures
-        )
-        self.__chains["summary_merge_figures"] = self.__create_chain(
-            self.__create_prompt(self.config.chains.summary_merge_figures.template),
-            Summary,
+        self.__models = {}
+        self.__cache = create_llm_cache(self.config)
+        if self.__cache is not None:
+            self.__cache.maybe_prune()
+        self.__hedge = load_hedge_settings(self.config)
+        self.__figure_merge = load_figure_merge_settings(self.config)
+        self.__figure_extract = load_figure_extract_settings(self.config)
+        self.__latex = load_latex_settings(self.config)
+        self.__compaction = load_compaction_settings(self.config)
+        self.__incremental = load_incremental_settings(self.config)
+        # 各阶段的耗时、token 用量及费用写入追踪文件，供 hongxiu report 汇总
+        set_tracer(create_tracer(self.config))
+        # 调用链在第一次使用时才构建
+        self.__chains = {}
+        self.__map_reduce = load_map_reduce_settings(self.config, self.__llms[0])
+        # 初始化PDF解析器，解析结果按 PDF 内容缓存
+        parse_cache = create_parse_cache(self.config)
+        if parse_cache is not None:
+            parse_cache.maybe_prune()
+        self.__pdf_parser = PdfParser.create(
+            self.config.pdf_parser, load_pdf_settings(self.config), parse_cache
         )
-        self.__chains["mindmap"] = self.__create_chain(
-            self.__create_prompt(self.config.chains.mindmap.template), Mindmap
-        )
-        # 初始化PDF解析器
-        self.__pdf_parser = PdfParser.create(self.config.pdf_parser)
 
-    def __get_extra_kwargs(self) -> dict:
+    def __get_extra_kwargs(self, provider: str) -> dict:
         # 根据配置，添加 PORTKEY 的调试网关
         if os.environ.get("PORTKEY_API_KEY") is not None:
+            from portkey_ai import PORTKEY_GATEWAY_URL, createHeaders
+
             portkey_headers = createHeaders(
                 api_key=os.environ.get("PORTKEY_API_KEY"),
-                provider=self.__llm_provider,
+                provider=provider,
             )
             return dict(
                 base_url=PORTKEY_GATEWAY_URL,
@@ -81,101 +164,307 @@ class Engine(BaseModel):
         else:
             return dict()
 
-    def __create_model(self) -> BaseChatModel:
-        logger.info(f"model: {self.__llm_provider} : {self.__llm_name}")
+    def __get_model(self, llm: str) -> "BaseChatModel":
+        """获取模型实例，同一模型在各调用链之间共享"""
+        if llm not in self.__models:
+            provider, name = llm.split(":", 1)
+            self.__models[llm] = self.__create_model(provider, name)
+        return self.__models[llm]
+
+    # 重试由 RateLimiter 统一负责，因此关闭各客户端自带的重试
+    def __create_model(self, provider: str, name: str) -> "BaseChatModel":
+        logger.info(f"model: {provider} : {name}")
         m: BaseChatModel
-        if self.__llm_provider == "openai":
-            extra_kwargs = self.__get_extra_kwargs()
-            m = ChatOpenAI(model=self.__llm_name, **extra_kwargs)
-        elif self.__llm_provider == "tongyi":
+        if provider == "openai":
+            from langchain_openai import ChatOpenAI
+
+            extra_kwargs = self.__get_extra_kwargs(provider)
+            m = ChatOpenAI(model=name, stream_usage=True, max_retries=0, **extra_kwargs)
+        elif provider == "tongyi":
             import dashscope  # type: ignore # noqa: F401
+            from langchain_community.chat_models import ChatTongyi
+
+            m = ChatTongyi(model=name, api_key=None)
+        elif provider == "moonshot":
+            from langchain_openai import ChatOpenAI
+            from pydantic import SecretStr
 
-            m = ChatTongyi(model=self.__llm_name, api_key=None)
-        elif self.__llm_provider == "moonshot":
             m = ChatOpenAI(
-                model=self.__llm_name,
+                model=name,
                 api_key=SecretStr(os.environ.get("MOONSHOT_API_KEY") or ""),
                 base_url="https://api.moonshot.cn/v1",
+                max_retries=0,
             )
             # https://github.com/langchain-ai/langchain/issues/27058
-            # m = MoonshotChat(model=self.__llm_name)
-        elif self.__llm_provider == "deepseek":
+            # m = MoonshotChat(model=name)
+        elif provider == "deepseek":
+            from langchain_openai import ChatOpenAI
+            from pydantic import SecretStr
+
             m = ChatOpenAI(
-                model=self.__llm_name,
+                model=name,
                 api_key=SecretStr(os.environ.get("DEEPSEEK_API_KEY") or ""),
                 base_url="https://api.deepseek.com",
+                max_retries=0,
             )
-        elif self.__llm_provider == "anthropic":
-            m = ChatAnthropic(model_name=self.__llm_name, timeout=60, stop=None)
+        elif provider == "fake":
+            # 本地模拟服务（见 fake_llm.py），用于在不消耗 token 的情况下测量吞吐量
+            from langchain_openai import ChatOpenAI
+            from pydantic import SecretStr
+
+            fake_llm = self.config.fake_llm or ConfigItem()
+            m = ChatOpenAI(
+                model=name,
+                api_key=SecretStr("fake"),
+                base_url=fake_llm.get("base_url", "http://127.0.0.1:8765/v1"),
+                stream_usage=True,
+                max_retries=0,
+            )
+        elif provider == "anthropic":
+            from langchain_anthropic import ChatAnthropic
+
+            m = ChatAnthropic(model_name=name, timeout=60, stop=None, max_retries=0)
+        else:
+            raise ValueError(f"Unknown LLM provider: {provider}")
         return m
 
-    def __create_prompt(self, messages: List[Tuple[str, str]]) -> ChatPromptTemplate:
+    def __create_prompt(
+        self,
+        messages: ConfigItem | List[Tuple[str, str]],
+        provider: str,
+        format_instructions: str = "",
+    ) -> "ChatPromptTemplate":
+        """构造提示词模板
+
+        系统提示词（模板及格式说明）对所有论文都相同，因此将其作为固定的前缀放在最前面，
+        论文内容等动态部分放在其后，便于模型服务商缓存提示词前缀。
+        """
+        from langchain_core.messages import BaseMessage, SystemMessage
+        from langchain_core.prompts import ChatPromptTemplate
+
         if not isinstance(messages, List):
             messages = [
                 ("system", messages.system),
                 ("user", messages.user),
             ]
-        new_messages = []
+        new_messages: List[BaseMessage | Tuple[str, str]] = []
         for role, message in messages:
             if role == "system":
-                message = message.replace("{", "{{").replace("}", "}}")
-                if self.__llm_provider not in ["openai"]:
+                if format_instructions:
                     message += (
-                        "\n\n格式描述如下：\n{format_instructions}\n注意回答请用中文。"
+                        f"\n\n格式描述如下：\n{format_instructions}\n注意回答请用中文。"
                     )
-            new_messages.append((role, message))
+                if provider == "anthropic":
+                    # Anthropic 需要显式标记可缓存的前缀
+                    new_messages.append(
+                        SystemMessage(
+                            content=[
+                                {
+                                    "type": "text",
+                                    "text": message,
+                                    "cache_control": {"type": "ephemeral"},
+                                }
+                            ]
+                        )
+                    )
+                else:
+                    # OpenAI 等服务商会自动缓存相同的前缀
+                    new_messages.append(SystemMessage(content=message))
+            else:
+                new_messages.append((role, message))
         return ChatPromptTemplate.from_messages(new_messages)
 
-    def __create_chain(self, prompt: ChatPromptTemplate, cls: type) -> Runnable:
-        if self.__llm is None:
-            raise ValueError("LLM model is not initialized.")
-        if self.__llm_provider in ["openai"]:
-            return prompt | self.__llm.with_structured_output(cls)
+    def __get_chain(self, name: str) -> "Chain":
+        """获取调用链，第一次使用时才构建
+
+        只读取已有结果时无需加载 LangChain 和模型客户端，也无需读取提示词模板。
+        """
+        if name not in self.__chains:
+            chain_config = self.config.chains.get(name)
+            if chain_config is None:
+                raise ValueError(f"Chain {name} is not configured.")
+            self.__chains[name] = self.__create_chain(
+                name, chain_config, CHAIN_OUTPUTS[name]
+            )
+        return self.__chains[name]
+
+    def __create_chain(self, name: str, chain_config: ConfigItem, cls: type) -> "Chain":
+        from .chain import Chain
+
+        # 调用链可以通过 chains.<name>.llm 单独指定模型列表
+        llms = parse_llms(chain_config.llm) or self.__llms
+        return Chain(
+            name=name,
+            backends=[
+                self.__create_backend(name, llm, chain_config.template, cls)
+                for llm in llms
+            ],
+            output=cls,
+            cache=self.__cache,
+            hedge=self.__hedge,
+        )
+
+    def __create_backend(
+        self,
+        chain: str,
+        llm: str,
+        template: ConfigItem | List[Tuple[str, str]],
+        cls: type,
+    ) -> "ChainBackend":
+        from langchain_core.output_parsers import (
+            JsonOutputParser,
+            PydanticOutputParser,
+        )
+        from langchain_core.output_parsers.openai_tools import JsonOutputKeyToolsParser
+        from langchain_core.runnables.base import Runnable
+
+        from .chain import ChainBackend
+
+        provider, model_name = llm.split(":", 1)
+        model = self.__get_model(llm)
+        runnable: Runnable
+        stream_runnable: Runnable
+        if provider in ["openai", "fake"]:
+            prompt = self.__create_prompt(template, provider)
+            runnable = model.with_structured_output(cls)
+            # 流式模式下直接解析工具调用参数中不完整的 JSON
+            stream_runnable = model.bind_tools(
+                [cls], tool_choice=cls.__name__, parallel_tool_calls=False
+            ) | JsonOutputKeyToolsParser(key_name=cls.__name__, first_tool_only=True)
         else:
             parser: PydanticOutputParser = PydanticOutputParser(pydantic_object=cls)
-            return (
-                prompt.partial(format_instructions=parser.get_format_instructions())
-                | self.__llm
-                | parser
+            prompt = self.__create_prompt(
+                template, provider, parser.get_format_instructions()
             )
+            runnable = model | parser
+            stream_runnable = model | JsonOutputParser()
+        return ChainBackend(
+            provider=provider,
+            model=model_name,
+            prompt=prompt,
+            runnable=runnable,
+            stream_runnable=stream_runnable,
+            limiter=get_rate_limiter(self.config, provider),
+            latency=get_latency_histogram(llm, chain, self.__hedge.window),
+        )
 
     def summarize(
-        self, content: str | Path, output: str, override: bool = False
+        self, content: str | Path, output: str | Path, override: bool = False
+    ) -> Summary:
+        """asummarize() 的同步封装"""
+        return asyncio.run(self.asummarize(content, output, override))
+
+    async def asummarize(
+        self,
+        content: str | Path,
+        output: str | Path,
+        override: bool = False,
+        source: Optional[Path] = None,
     ) -> Summary:
-        po = Path(output)
+        """生成论文总结，并渲染为 LaTeX 海报
+
+        各产物的输入记录在清单中，只重新生成输入有变化的产物。
+
+        Args:
+            content (str | Path): PDF 文件路径或论文文本
+            output (str | Path): 输出的 PDF 文件路径
+            override (bool): 是否重新生成所有产物
+            source (Optional[Path]): content 为已解析的文本时，原始的 PDF 文件，
+                用于判断总结是否需要重新生成
+
+        Returns:
+            Summary: 论文总结
+        """
+        paper = Path(output).stem.removesuffix(".summary")
+        with trace_paper(paper, op="summary"):
+            return await self.__asummarize(content, output, override, source)
+
+    async def __asummarize(
+        self,
+        content: str | Path,
+        output: str | Path,
+        override: bool,
+        source: Optional[Path] = None,
+    ) -> Summary:
+        # 统一使用绝对路径
+        po = Path(output).resolve()
         p_json = po.parent / (po.stem + ".json")
         p_latex = po.parent / (po.stem + ".tex")
         p_pdf = po.parent / (po.stem + ".pdf")
+        p_markdown = po.parent / (po.stem + ".md")
+        manifest = self.__manifest(po.parent, po.stem.removesuffix(".summary"))
+        summary_inputs = self.__llm_inputs(content, Summary, source)
 
-        # 如果content是Path对象，说明其内不是文本内容，因此需要读取PDF文件
-        if isinstance(content, Path) and content.suffix == ".pdf":
-            content = self.__pdf_parser.read_pdf(str(content), override=override)
-
-        # 调用模型生成总结
-        if p_json.exists() and not override:
-            logger.debug(f"File {p_json} exists, return its content")
-            summary = Summary.model_validate_json(p_json.read_text(encoding="utf-8"))
+        # 如果pdf_parser是pix2text，则有机会抽取图片，此时我们调用 figures() 方法获取图片信息
+        extract_figures = self.__pdf_parser.get_type() == PdfParserType.PIX2TEXT
+        # pymupdf、hybrid 解析器可以直接从 PDF 的页面对象中抽取图片，无需调用模型；
+        # content 已经是解析后的文本时（如 aprocess()），从原始的 PDF 中抽取
+        p_pdf_input = source or content
+        native_figures = (
+            self.__figure_extract.native
+            and isinstance(p_pdf_input, Path)
+            and p_pdf_input.suffix == ".pdf"
+            and self.__pdf_parser.get_type()
+            in [PdfParserType.PYMUPDF, PdfParserType.HYBRID]
+        )
+        extract_figures = extract_figures or native_figures
+        # 论文、模型及提示词都没有变化时沿用已有的总结，无需解析 PDF 和调用模型
+        existed = not override and manifest.is_fresh(p_json, summary_inputs, adopt=True)
+        if existed:
+            # 图片在写入 .json 之前已经合并，无需重新抽取和合并
+            extract_figures = native_figures = False
         else:
+            # 如果content是Path对象，说明其内不是文本内容，因此需要读取PDF文件
+            content = await self.__aread_content(content, override)
+
+        async def agenerate_summary() -> Summary:
+            # 调用模型生成总结
+            if existed:
+                # 已有结果时无需解析 PDF
+                logger.debug(f"File {p_json} exists, return its content")
+                return Summary.model_validate_json(p_json.read_text(encoding="utf-8"))
+            if self.config.stream:
+                # 流式模式：边生成边更新中间 JSON 和 Markdown，完成后再校验
+                logger.info(f"Generating Summary ({p_json}, streaming to {p_markdown})")
+                on_partial = self.__create_partial_writer(p_json, p_markdown)
+                with self.__stage("summary"):
+                    summary = await self.__agenerate_summary(
+                        self.__llm_text(content), on_partial
+                    )
+                render_summary_to_markdown(summary, p_markdown, override=True)
+                p_json.with_suffix(".partial.json").unlink(missing_ok=True)
+                return summary
             logger.info(f"Generating Summary ({p_json})")
-            if self.__chains["summary"] is None:
-                raise ValueError("Summary chain is not initialized.")
-            summary = self.__chains["summary"].invoke({"text": content})
+            with self.__stage("summary"):
+                return await self.__agenerate_summary(self.__llm_text(content))
 
-        # 如果pdf_parser是pix2text，则有机会抽取图片，此时我们调用 figures() 方法获取图片信息
-        figures_path: List[str] = []
-        if self.__pdf_parser.get_type() == PdfParserType.PIX2TEXT:
+        async def aextract_figures() -> Optional[Figures]:
+            if not extract_figures:
+                return None
+            if native_figures:
+                # 图片保存在输出目录中与论文同名的目录，图片链接相对于该目录
+                logger.info("Extracting Figures from PDF..")
+                with self.__stage("figures"):
+                    return await self.__pdf_parser.aextract_figures(
+                        str(Path(p_pdf_input).resolve()),
+                        po.parent / po.stem.removesuffix(".summary"),
+                        self.__figure_extract,
+                    )
             # 从 Markdown 中提取重要图片
             logger.info("Extracting Figures..")
-            if self.__chains["summary_figures"] is None:
-                raise ValueError("Summary_figures chain is not initialized.")
-            figures = self.__chains["summary_figures"].invoke({"text": content})
+            with self.__stage("figures"):
+                return await self.__aextract_figures_llm(str(content))
+
+        # 总结与图片抽取互不依赖，因此并发调用模型，两者都完成后再合并
+        summary, figures = await asyncio.gather(agenerate_summary(), aextract_figures())
+
+        figures_path: List[str] = []
+        if extract_figures:
             if figures is None:
                 logger.warning("Failed to extract summary_figures. None returned.")
             else:
-                # print(f"figures: ({type(figures)}) {figures}")
                 # 修订图片路径，使其相对于 .tex 文件
-                print(f"cwd: {Path.cwd()}, output: {output}")
-                p_figures_dir = Path(output).parent / po.stem.rstrip(".summary")
+                p_figures_dir = po.parent / po.stem.removesuffix(".summary")
                 p_figures_dir = p_figures_dir.relative_to(p_latex.parent)
                 figures.figures = [
                     figure for figure in figures.figures if figure.type == "FIGURE"
@@ -189,30 +478,18 @@ class Engine(BaseModel):
                     if p_figure_abs.exists():
                         figure.link = str(p_figure)
                         figures_existed.append(figure)
-                        print(f"figure.link: {figure.link}")
+                        logger.debug(f"figure.link: {figure.link}")
                 figures.figures = figures_existed
 
                 if len(figures.figures) > 0:
-                    # 重新生成 JSON 内容
-                    figures_json = figures.model_dump_json(indent=2)
-                    summary_json = summary.model_dump_json(indent=2)
-                    # 结合 summary 和 figures 生成新的 summary
                     logger.info("Inserting Figures into Summary...")
-                    # print(f"figures_json: \n{figures_json}")
-                    # print(f"summary_json: \n{summary_json}")
-                    if self.__chains["summary_merge_figures"] is None:
-                        raise ValueError(
-                            "Summary_merge_figures chain is not initialized."
-                        )
-                    summary_new = self.__chains["summary_merge_figures"].invoke(
-                        {"summary": summary_json, "figures": figures_json}
-                    )
-                    if summary is None:
+                    with self.__stage("merge_figures"):
+                        summary_new = await self.__amerge_figures(summary, figures)
+                    if summary_new is None:
                         logger.warning("Failed to summary_merge_figures into summary.")
                     else:
                         summary = summary_new
                         summary_json = summary.model_dump_json(indent=2)
-                        # print(f"new summary: \n{summary_json}")
                         p_summary_figures = p_json.parent / (
                             p_json.stem + ".figures.json"
                         )
@@ -225,26 +502,83 @@ class Engine(BaseModel):
                 if callable(hook):
                     hook(summary)
 
-        if not p_json.exists() or override:
+        if not existed:
             p_json.write_text(summary.model_dump_json(indent=2), encoding="utf-8")
+            manifest.record(p_json, summary_inputs)
 
-        render_summary_to_latex(
-            summary, p_latex, figures=figures_path, override=override
-        )
-        latex_to_pdf(p_latex, p_pdf, override)
+        # 流式输出的 Markdown 按最终的总结（含图片）重新渲染
+        markdown_inputs = {"summary": file_digest(p_json)}
+        if p_markdown.exists() and (
+            override or not manifest.is_fresh(p_markdown, markdown_inputs)
+        ):
+            render_summary_to_markdown(summary, p_markdown, override=True)
+            manifest.record(p_markdown, markdown_inputs)
+
+        # 渲染过程在线程中执行，以便与其他论文或脑图的渲染并行
+        latex_inputs = {
+            "summary": text_digest(summary.model_dump_json()),
+            "template": file_digest(_POSTER_TEMPLATE),
+            "renderer": file_digest(_RENDER_MODULE),
+        }
+        if override or not manifest.is_fresh(p_latex, latex_inputs):
+            with self.__stage("render_latex"):
+                await asyncio.to_thread(
+                    render_summary_to_latex,
+                    summary,
+                    p_latex,
+                    figures=figures_path,
+                    template_file=_POSTER_TEMPLATE,
+                    override=True,
+                )
+            manifest.record(p_latex, latex_inputs)
+        # 海报中的图片链接相对于 .tex 文件
+        figure_files = [p_latex.parent / link for link in image_links(summary.summary)]
+        pdf_inputs = {
+            "tex": file_digest(p_latex),
+            "figures": text_digest(
+                "\n".join(file_digest(f) for f in figure_files if f.exists())
+            ),
+            "engine": self.__latex.engine,
+        }
+        if override or not manifest.is_fresh(p_pdf, pdf_inputs):
+            with self.__stage("xelatex"):
+                await alatex_to_pdf(p_latex, p_pdf, True, self.__latex)
+            manifest.record(p_pdf, pdf_inputs)
         return summary
 
+    async def __amerge_figures(
+        self, summary: Summary, figures: Figures
+    ) -> Optional[Summary]:
+        """将图片插入论文总结
+
+        默认在本地按图片说明与各段落的相似度插入，无需再调用模型；
+        配置 figures.merge 为 llm 时，由 summary_merge_figures 调用链插入。
+        """
+        if self.__figure_merge.merge != "llm":
+            return merge_figures(summary, figures.figures, self.__figure_merge)
+        # 结合 summary 和 figures 生成新的 summary
+        figures_json = figures.model_dump_json(indent=2)
+        summary_json = summary.model_dump_json(indent=2)
+        return await self.__get_chain("summary_merge_figures").ainvoke(
+            {"summary": summary_json, "figures": figures_json}
+        )
+
     def figures(
-        self, content: str | Path, output: str, override: bool = False
+        self, content: str | Path, output: str | Path, override: bool = False
+    ) -> List[Figure]:
+        """afigures() 的同步封装"""
+        return asyncio.run(self.afigures(content, output, override))
+
+    async def afigures(
+        self, content: str | Path, output: str | Path, override: bool = False
     ) -> List[Figure]:
-        po = Path(output)
+        po = Path(output).resolve()
         # p_figures_dir = po / "figures"
         # p_json = po / "figures.json"
         p_json = po.parent / (po.stem + ".figures.json")
 
         # 如果content是Path对象，说明其内不是文本内容，因此需要读取PDF文件
-        if isinstance(content, Path) and content.suffix == ".pdf":
-            content = self.__pdf_parser.read_pdf(str(content), override=override)
+        content = await self.__aread_content(content, override)
 
         # 如果中间文件已经存在，且不覆盖，则直接返回其内容
         # if p_json.exists():
@@ -259,58 +593,470 @@ class Engine(BaseModel):
             po.mkdir(parents=True)
 
         logger.info(f"Generating Figures ({p_json})")
-        if self.__chains["summary_figures"] is None:
-            raise ValueError("Summary_figures chain is not initialized.")
-        figures = self.__chains["summary_figures"].invoke({"text": content})
+        figures = await self.__aextract_figures_llm(content)
 
         # p_json.write_text(figures.model_dump_json(indent=2), encoding='utf-8')
         return figures.figures
 
     def mindmap(
-        self, content: str | Path, output: str, override: bool = False
+        self, content: str | Path, output: str | Path, override: bool = False
+    ) -> Mindmap:
+        """amindmap() 的同步封装"""
+        return asyncio.run(self.amindmap(content, output, override))
+
+    async def amindmap(
+        self,
+        content: str | Path,
+        output: str | Path,
+        override: bool = False,
+        source: Optional[Path] = None,
     ) -> Mindmap:
-        p_pdf = Path(output)
+        """生成论文脑图，并由 Graphviz 渲染为 PDF
+
+        各产物的输入记录在清单中，只重新生成输入有变化的产物。
+
+        Args:
+            content (str | Path): PDF 文件路径或论文文本
+            output (str | Path): 输出的 PDF 文件路径
+            override (bool): 是否重新生成所有产物
+            source (Optional[Path]): content 为已解析的文本时，原始的 PDF 文件，
+                用于判断脑图是否需要重新生成
+
+        Returns:
+            Mindmap: 论文脑图
+        """
+        paper = Path(output).stem.removesuffix(".mindmap")
+        with trace_paper(paper, op="mindmap"):
+            return await self.__amindmap(content, output, override, source)
+
+    async def __amindmap(
+        self,
+        content: str | Path,
+        output: str | Path,
+        override: bool,
+        source: Optional[Path] = None,
+    ) -> Mindmap:
+        p_pdf = Path(output).resolve()
         p_json = p_pdf.parent / (p_pdf.stem + ".json")
-        # p_markdown = p_pdf.parent / (p_pdf.stem + '.md')
+        p_dot = p_pdf.with_suffix(".dot")
+        manifest = self.__manifest(p_pdf.parent, p_pdf.stem.removesuffix(".mindmap"))
+        mindmap_inputs = self.__llm_inputs(content, Mindmap, source)
 
-        # 如果content是Path对象，说明其内不是文本内容，因此需要读取PDF文件
-        if isinstance(content, Path) and content.suffix == ".pdf":
-            content = self.__pdf_parser.read_pdf(str(content), override=override)
+        # 论文、模型及提示词都没有变化时沿用已有的脑图，只检查是否需要重新渲染
+        if not override and manifest.is_fresh(p_json, mindmap_inputs, adopt=True):
+            logger.debug(f"File {p_json} is up to date, return its content")
+            mindmap = Mindmap.model_validate_json(p_json.read_text(encoding="utf-8"))
+        else:
+            mindmap = await self.__agenerate_mindmap(content, p_json, override)
+            manifest.record(p_json, mindmap_inputs)
 
-        # 检查中间文件是否存在
-        if p_json.exists():
-            if not override:
-                logger.warning(
-                    f"{p_json} is exist, please use --override to override it."
-                )
-                return Mindmap.model_validate_json(p_json.read_text(encoding="utf-8"))
-            else:
-                p_json.unlink()
+        # 转换脑图 为 PDF
+        render_inputs = {
+            "mindmap": file_digest(p_json),
+            "renderer": file_digest(_RENDER_MODULE),
+        }
+        if (
+            override
+            or not manifest.is_fresh(p_pdf, render_inputs)
+            or not manifest.is_fresh(p_dot, render_inputs)
+        ):
+            with self.__stage("graphviz"):
+                await asyncio.to_thread(render_mindmap_to_pdf, mindmap, p_pdf, True)
+            manifest.record(p_pdf, render_inputs)
+            manifest.record(p_dot, render_inputs)
 
-        # 检查PDF文件是否存在
-        if p_pdf.exists() and not override:
-            logger.warning(f"{p_pdf} is exist, please use --override to override it.")
-            return Mindmap()
+        return mindmap
+
+    async def __agenerate_mindmap(
+        self, content: str | Path, p_json: Path, override: bool
+    ) -> Mindmap:
+        # 如果content是Path对象，说明其内不是文本内容，因此需要读取PDF文件
+        content = await self.__aread_content(content, override)
 
         # 调用模型生成脑图
         logger.info(f"Generating Mindmap JSON ({p_json})")
-        if self.__chains["mindmap"] is None:
-            raise ValueError("Mindmap chain is not initialized.")
-        mindmap = self.__chains["mindmap"].invoke({"text": content})
+        chain = self.__get_chain("mindmap")
+        with self.__stage("mindmap"):
+            if self.config.stream:
+                on_partial = self.__create_partial_writer(p_json)
+                mindmap = await chain.ainvoke(
+                    {"text": self.__llm_text(content)}, on_partial
+                )
+                p_json.with_suffix(".partial.json").unlink(missing_ok=True)
+            else:
+                mindmap = await chain.ainvoke({"text": self.__llm_text(content)})
         p_json.write_text(mindmap.model_dump_json(indent=2), encoding="utf-8")
 
         if self.hooks["on_mindmap"]:
             for hook in self.hooks["on_mindmap"]:
                 if callable(hook):
                     hook(mindmap)
+        return mindmap
 
-        # 转换脑图 为 PDF
-        render_mindmap_to_pdf(mindmap, p_pdf, override)
+    def process(
+        self, content: str | Path, output_dir: str | Path, override: bool = False
+    ) -> Tuple[Summary, Mindmap]:
+        """aprocess() 的同步封装"""
+        return asyncio.run(self.aprocess(content, output_dir, override))
 
-        return mindmap
+    async def aprocess(
+        self, content: str | Path, output_dir: str | Path, override: bool = False
+    ) -> Tuple[Summary, Mindmap]:
+        """同时生成论文的总结和脑图
+
+        PDF 只解析一次，总结和脑图的调用链共享解析后的文本并发执行，
+        随后 LaTeX 海报和 Graphviz 脑图的渲染也并行进行。
+
+        Args:
+            content (str | Path): PDF 文件路径或论文文本
+            output_dir (str | Path): 输出目录
+            override (bool): 是否覆盖已有文件
+
+        Returns:
+            Tuple[Summary, Mindmap]: 论文总结和脑图
+        """
+        po = Path(output_dir).resolve()
+        stem = content.stem if isinstance(content, Path) else "paper"
+        with trace_paper(stem, op="process"):
+            return await self.__aprocess(content, po, stem, override)
+
+    async def __aprocess(
+        self, content: str | Path, po: Path, stem: str, override: bool
+    ) -> Tuple[Summary, Mindmap]:
+        p_summary = po / (stem + ".summary.pdf")
+        p_mindmap = po / (stem + ".mindmap.pdf")
+        manifest = self.__manifest(po, stem)
+        # 总结和脑图都是最新时无需解析 PDF，只检查是否需要重新渲染
+        outputs: Dict[Path, Type[BaseModel]] = {p_summary: Summary, p_mindmap: Mindmap}
+        existed = not override and all(
+            manifest.is_fresh(
+                p.with_suffix(".json"), self.__llm_inputs(content, output), adopt=True
+            )
+            for p, output in outputs.items()
+        )
+        source = content if isinstance(content, Path) else None
+        if not existed:
+            content = await self.__aread_content(content, override)
+        summary, mindmap = await asyncio.gather(
+            self.asummarize(content, p_summary, override, source),
+            self.amindmap(content, p_mindmap, override, source),
+        )
+        return summary, mindmap
+
+    async def summarize_many(
+        self,
+        inputs: Iterable[Path],
+        output_dir: Optional[Path] = None,
+        override: bool = False,
+        jobs: int = 1,
+    ) -> AsyncIterator[Tuple[Path, Optional[Summary]]]:
+        """并发生成多篇论文的总结，按完成顺序逐个返回
+
+        Args:
+            inputs (Iterable[Path]): PDF 文件列表
+            output_dir (Optional[Path]): 输出目录，默认为 PDF 所在目录
+            override (bool): 是否覆盖已有文件
+            jobs (int): 同时处理的论文数量
+
+        Yields:
+            Tuple[Path, Optional[Summary]]: 输入文件及其总结，失败时总结为 None
+        """
+        tasks = {
+            f: partial(
+                self.asummarize,
+                f,
+                (output_dir or f.parent) / (f.stem + ".summary.pdf"),
+                override,
+            )
+            for f in inputs
+        }
+        async for f, summary in bounded_as_completed(tasks, jobs):
+            yield f, summary
+
+    async def mindmap_many(
+        self,
+        inputs: Iterable[Path],
+        output_dir: Optional[Path] = None,
+        override: bool = False,
+        jobs: int = 1,
+    ) -> AsyncIterator[Tuple[Path, Optional[Mindmap]]]:
+        """并发生成多篇论文的脑图，按完成顺序逐个返回
+
+        Args:
+            inputs (Iterable[Path]): PDF 文件列表
+            output_dir (Optional[Path]): 输出目录，默认为 PDF 所在目录
+            override (bool): 是否覆盖已有文件
+            jobs (int): 同时处理的论文数量
+
+        Yields:
+            Tuple[Path, Optional[Mindmap]]: 输入文件及其脑图，失败时脑图为 None
+        """
+        tasks = {
+            f: partial(
+                self.amindmap,
+                f,
+                (output_dir or f.parent) / (f.stem + ".mindmap.pdf"),
+                override,
+            )
+            for f in inputs
+        }
+        async for f, mindmap in bounded_as_completed(tasks, jobs):
+            yield f, mindmap
+
+    async def process_many(
+        self,
+        inputs: Iterable[Path],
+        output_dir: Optional[Path] = None,
+        override: bool = False,
+        jobs: int = 1,
+    ) -> AsyncIterator[Tuple[Path, Optional[Tuple[Summary, Mindmap]]]]:
+        """并发生成多篇论文的总结和脑图，按完成顺序逐个返回
+
+        Args:
+            inputs (Iterable[Path]): PDF 文件列表
+            output_dir (Optional[Path]): 输出目录，默认为 PDF 所在目录
+            override (bool): 是否覆盖已有文件
+            jobs (int): 同时处理的论文数量
+
+        Yields:
+            Tuple[Path, Optional[Tuple[Summary, Mindmap]]]: 输入文件及其总结和脑图，
+            失败时为 None
+        """
+        tasks = {
+            f: partial(self.aprocess, f, output_dir or f.parent, override)
+            for f in inputs
+        }
+        async for f, result in bounded_as_completed(tasks, jobs):
+            yield f, result
+
+    async def __agenerate_summary(
+        self, text: str, on_partial: Optional[Callable[[dict], None]] = None
+    ) -> Summary:
+        tokens = estimate_tokens(text)
+        if not self.__map_reduce.should_split(tokens):
+            return await self.__get_chain("summary").ainvoke({"text": text}, on_partial)
+        # 分块总结（map-reduce）所需的调用链，未配置时无法分块总结
+        chunk_chain = self.__get_chain("summary_chunk")
+        reduce_chain = self.__get_chain("summary_reduce")
+
+        # Map：按章节切分后并行总结各个分块，每个分块的结果单独缓存
+        chunks = chunk_text(text, self.__map_reduce.chunk_tokens)
+        logger.info(
+            f"Summarizing ~{tokens} tokens in {len(chunks)} chunks "
+            f"(chunk_tokens: {self.__map_reduce.chunk_tokens}, "
+            f"fan_out: {self.__map_reduce.fan_out})"
+        )
+        semaphore = asyncio.Semaphore(self.__map_reduce.fan_out)
+
+        async def summarize_chunk(index: int, chunk: str) -> Summary:
+            async with semaphore:
+                return await chunk_chain.ainvoke(
+                    {"text": chunk, "index": index + 1, "total": len(chunks)}
+                )
+
+        summaries: List[Summary] = await asyncio.gather(
+            *[summarize_chunk(i, c) for i, c in enumerate(chunks)]
+        )
+
+        # Reduce：每次最多合并 fan_out 个部分总结，逐层归并直至只剩一份
+        async def merge(group: List[Summary], last: bool) -> Summary:
+            async with semaphore:
+                data = [s.model_dump() for s in group]
+                return await reduce_chain.ainvoke(
+                    {"summaries": json.dumps(data, ensure_ascii=False, indent=2)},
+                    # 只有最后一次合并的结果才是最终总结，才需要流式输出
+                    on_partial if last else None,
+                )
+
+        fan_out = max(2, self.__map_reduce.fan_out)
+        while len(summaries) > 1:
+            groups = [
+                summaries[i : i + fan_out] for i in range(0, len(summaries), fan_out)
+            ]
+            logger.debug(f"Merging {len(summaries)} summaries in {len(groups)} groups")
+            summaries = await asyncio.gather(
+                *[merge(g, len(groups) == 1) for g in groups]
+            )
+        return summaries[0]
+
+    def __create_partial_writer(
+        self, p_json: Path, p_markdown: Optional[Path] = None
+    ) -> Callable[[dict], None]:
+        """创建流式输出的回调函数，按固定间隔将不完整的结果写入中间文件
+
+        不完整的 JSON 写入 <name>.partial.json，避免被误认为是已完成的结果。
+        """
+        p_partial = p_json.with_suffix(".partial.json")
+        interval = float(self.config.get("stream_interval", 0.5))
+        last_write = 0.0
+
+        def write(data: dict):
+            nonlocal last_write
+            now = time.monotonic()
+            if now - last_write < interval:
+                return
+            last_write = now
+            p_partial.write_text(
+                json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+            )
+            if p_markdown is not None:
+                try:
+                    # 渲染前按 Summary 校验，不完整时抛出 ValidationError
+                    render_summary_to_markdown(data, p_markdown, override=True)
+                except ValidationError:
+                    # 部分字段尚未完整，等待下一次更新
+                    pass
+
+        return write
+
+    def __manifest(self, output_dir: Path, paper: str) -> Manifest:
+        """论文各产物的清单，总结与脑图共用"""
+        return get_manifest(
+            output_dir / f"{paper}.manifest.json", self.__incremental.enabled
+        )
+
+    def __llm_inputs(
+        self,
+        content: str | Path,
+        output: Type[BaseModel],
+        source: Optional[Path] = None,
+    ) -> Dict[str, str]:
+        """调用模型生成的产物（总结、脑图的 .json）的输入
+
+        论文内容、解析器、模型、提示词、输出结构，以及文本压缩、分块总结、
+        图片抽取与合并等参数中任何一项变化，都需要重新调用模型。
+        """
+        origin: str | Path = source or content
+        if isinstance(origin, Path):
+            source_digest = file_digest(origin)
+        else:
+            source_digest = text_digest(origin)
+        chains = SUMMARY_CHAINS if output is Summary else MINDMAP_CHAINS
+        settings: Dict[str, BaseModel] = {"compaction": self.__compaction}
+        if output is Summary:
+            # 图片在写入 .json 之前合并到总结中
+            settings["map_reduce"] = self.__map_reduce
+            settings["figure_extract"] = self.__figure_extract
+            settings["figure_merge"] = self.__figure_merge
+        prompts = []
+        for name in chains:
+            chain_config = self.config.chains.get(name)
+            if chain_config is None:
+                continue
+            template = chain_config.template or ConfigItem()
+            prompts.append(
+                [name, str(chain_config.llm or ""), template.system, template.user]
+            )
+        return {
+            "source": source_digest,
+            "pdf_parser": self.__pdf_parser.get_type().value,
+            "llm": str(self.__llms),
+            "lang": str(self.config.lang),
+            "prompts": text_digest(json.dumps(prompts, ensure_ascii=False)),
+            "schema": text_digest(
+                json.dumps(output.model_json_schema(), sort_keys=True)
+            ),
+            **{
+                name: text_digest(value.model_dump_json())
+                for name, value in settings.items()
+            },
+        }
+
+    async def __aextract_figures_llm(self, content: str) -> Figures:
+        """调用 summary_figures 调用链抽取图片，只发送图片链接附近的内容（含图片说明）"""
+        context = Document(content).image_context()
+        if not context:
+            logger.info("No image links found, skip summary_figures")
+            return Figures(figures=[])
+        logger.debug(
+            f"summary_figures: tokens: {estimate_tokens(content)} -> "
+            f"{estimate_tokens(context)} (image context only)"
+        )
+        return await self.__get_chain("summary_figures").ainvoke({"text": context})
+
+    async def __aread_content(self, content: str | Path, override: bool) -> str:
+        if isinstance(content, Path) and content.suffix == ".pdf":
+            with self.__stage("parse"):
+                document = await self.__pdf_parser.aread_document(
+                    str(content.resolve()), override=override
+                )
+            logger.debug(f"Parsed {content.name}: {document!r}")
+            text = document.text
+            # 删除参考文献、页眉页脚等与总结无关的内容，减少输入 token
+            compacted, report = compact_text(text, self.__compaction)
+            logger.info(f"Compacted {content.name}: {report}")
+            if self.__pdf_parser.get_type() == PdfParserType.PIX2TEXT:
+                # 图片抽取需要图片链接，调用总结、脑图的调用链时再删除
+                settings = self.__compaction.model_copy(update={"image_links": False})
+                compacted, _ = compact_text(text, settings)
+            return compacted
+        return str(content)
+
+    def __llm_text(self, content: str | Path) -> str:
+        """总结、脑图等调用链的输入文本，不包含图片链接"""
+        text = str(content)
+        if self.__compaction.enabled and self.__compaction.image_links:
+            text = strip_image_links(text)
+        return text
+
+    def usage(self) -> Dict[str, "TokenUsage"]:
+        """各调用链累计的 token 用量，包含命中提示词缓存的 token 数量"""
+        return {
+            name: chain.usage
+            for name, chain in self.__chains.items()
+            if chain.usage.calls > 0
+        }
 
     def on_summary(self, hook: Callable):
         self.hooks["on_summary"].append(hook)
 
     def on_mindmap(self, hook: Callable):
         self.hooks["on_mindmap"].append(hook)
+
+    def on_stage(self, hook: Callable):
+        """注册各阶段（parse、summary、mindmap、render_latex、xelatex 等）完成时的回调函数
+
+        回调函数的参数为阶段名称和耗时（秒），失败的阶段不会回调。
+        """
+        self.hooks["on_stage"].append(hook)
+
+    @contextmanager
+    def __stage(self, name: str) -> Iterator[None]:
+        with span(name) as s:
+            yield
+        for hook in self.hooks["on_stage"]:
+            if callable(hook):
+                hook(name, s.duration)
+
+
+async def bounded_as_completed(
+    tasks: Mapping[Any, Callable[[], Awaitable[Any]]], jobs: int = 1
+) -> AsyncIterator[Tuple[Any, Any]]:
+    """限制并发数量地执行任务，并按完成顺序返回结果
+
+    单个任务失败不会影响其他任务，失败任务的结果为 None。
+
+    Args:
+        tasks (Mapping[Any, Callable[[], Awaitable[Any]]]): 任务键到协程工厂的映射
+        jobs (int): 最大并发数量
+
+    Yields:
+        Tuple[Any, Any]: 任务键及其结果
+    """
+    semaphore = asyncio.Semaphore(max(1, jobs))
+
+    async def run(key: Any, factory: Callable[[], Awaitable[Any]]):
+        async with semaphore:
+            try:
+                return key, await factory()
+            except Exception as e:
+                logger.exception(f"Failed to process {key}: {e}")
+                return key, None
+
+    pending = [asyncio.create_task(run(k, f)) for k, f in tasks.items()]
+    try:
+        for next_done in asyncio.as_completed(pending):
+            yield await next_done
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,381 @@
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+from .utils import estimate_tokens
+
+# PydanticOutputParser 的格式说明中以代码块给出的 JSON Schema
+_RE_SCHEMA_BLOCK = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+
+_SECTIONS = ["研究背景", "研究问题", "研究方法", "实验设计", "实验结果", "结论"]
+_WORDS = (
+    "模型 方法 数据集 实验 结果 注意力 表示 训练 推理 性能 基线 任务 指标 效率 "
+    "transformer attention benchmark baseline accuracy latency"
+).split()
+
+
+class FakeLLMSettings(BaseModel):
+    """本地模拟 LLM 服务的参数
+
+    Args:
+        latency_median (float): 响应时间的中位数（秒）
+        latency_sigma (float): 响应时间对数正态分布的 sigma，0 表示固定延迟
+        first_token_ratio (float): 流式输出时首个片段之前的等待时间占总响应时间的比例
+        stream_chunk_chars (int): 流式输出时每个片段的字符数
+        rate_limit_rate (float): 返回 429 的概率
+        server_error_rate (float): 返回 500/503 的概率
+        retry_after (float): 429 响应中 Retry-After 的秒数
+        seed (Optional[int]): 随机数种子
+    """
+
+    latency_median: float = 1.0
+    latency_sigma: float = 0.3
+    first_token_ratio: float = 0.2
+    stream_chunk_chars: int = 24
+    rate_limit_rate: float = 0.0
+    server_error_rate: float = 0.0
+    retry_after: float = 1.0
+    seed: Optional[int] = None
+
+
+def load_fake_llm_settings(config: Config) -> FakeLLMSettings:
+    """读取配置中的 fake_llm 部分"""
+    cfg = config.fake_llm or ConfigItem()
+    values = {
+        k: v
+        for k, v in cfg.to_dict().items()
+        if k in FakeLLMSettings.model_fields and v not in (None, "")
+    }
+    return FakeLLMSettings(**values)
+
+
+class FakeLLMServer:
+    """兼容 OpenAI Chat Completions 协议的本地模拟服务
+
+    根据请求中的工具定义、response_format 或提示词中的 JSON Schema，
+    返回符合结构的随机 JSON，用于在不消耗 token 的情况下测量吞吐量。
+    支持流式输出（SSE），并可按概率注入 429/5xx 错误。
+
+    Examples:
+        >>> with FakeLLMServer(FakeLLMSettings(latency_median=0.1)) as server:
+        ...     print(server.base_url)
+        http://127.0.0.1:54321/v1
+    """
+
+    def __init__(
+        self,
+        settings: Optional[FakeLLMSettings] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.settings = settings or FakeLLMSettings()
+        self.random = random.Random(self.settings.seed)
+        self.lock = threading.Lock()
+        self.stats: Dict[str, int] = {"requests": 0, "429": 0, "5xx": 0}
+        self.__server = ThreadingHTTPServer((host, port), _FakeLLMHandler)
+        self.__server.daemon_threads = True
+        self.__server.fake = self  # type: ignore[attr-defined]
+        self.__thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.__server.server_address[:2]
+        if isinstance(host, bytes):
+            host = host.decode()
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeLLMServer":
+        self.__thread = threading.Thread(
+            target=self.__server.serve_forever, name="fake-llm", daemon=True
+        )
+        self.__thread.start()
+        logger.info(f"FakeLLMServer: listening on {self.base_url}")
+        return self
+
+    def stop(self):
+        self.__server.shutdown()
+        self.__server.server_close()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def sample(self) -> Tuple[float, Optional[int]]:
+        """抽样本次请求的响应时间，以及需要注入的错误状态码"""
+        s = self.settings
+        with self.lock:
+            self.stats["requests"] += 1
+            latency = s.latency_median * self.random.lognormvariate(0, s.latency_sigma)
+            r = self.random.random()
+            if r < s.rate_limit_rate:
+                self.stats["429"] += 1
+                return latency, 429
+            if r < s.rate_limit_rate + s.server_error_rate:
+                self.stats["5xx"] += 1
+                return latency, self.random.choice([500, 503])
+        return latency, None
+
+
+class _FakeLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any):
+        logger.trace(f"FakeLLMServer: {format % args}")
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self.__send_json(200, {"object": "list", "data": [{"id": "fake"}]})
+        else:
+            self.__send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        fake: FakeLLMServer = self.server.fake  # type: ignore[attr-defined]
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.__send_json(404, {"error": {"message": "not found"}})
+            return
+
+        latency, error = fake.sample()
+        if error is not None:
+            # 错误响应同样需要一定时间，但通常比正常响应快
+            time.sleep(latency * 0.1)
+            headers = {"Retry-After": str(fake.settings.retry_after)}
+            kind = "rate_limit_exceeded" if error == 429 else "server_error"
+            body = {"error": {"message": f"injected {error}", "type": kind}}
+            self.__send_json(error, body, headers if error == 429 else None)
+            return
+
+        rng = random.Random(json.dumps(request.get("messages"), sort_keys=True))
+        tool, output = _generate_response(request, rng)
+        prompt_tokens = sum(
+            estimate_tokens(json.dumps(m.get("content"), ensure_ascii=False))
+            for m in request.get("messages", [])
+        )
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": estimate_tokens(output),
+            "total_tokens": prompt_tokens + estimate_tokens(output),
+        }
+        model = request.get("model", "fake")
+        if request.get("stream"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            self.__stream(
+                model, tool, output, usage if include_usage else None, latency
+            )
+            return
+
+        time.sleep(latency)
+        message: Dict[str, Any] = {"role": "assistant", "content": None}
+        if tool:
+            message["tool_calls"] = [
+                {
+                    "id": f"call_{uuid.uuid4().hex[:12]}",
+                    "type": "function",
+                    "function": {"name": tool, "arguments": output},
+                }
+            ]
+        else:
+            message["content"] = output
+        self.__send_json(
+            200,
+            {
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": message,
+                        "finish_reason": "tool_calls" if tool else "stop",
+                    }
+                ],
+                "usage": usage,
+            },
+        )
+
+    def __stream(
+        self,
+        model: str,
+        tool: str,
+        output: str,
+        usage: Optional[dict],
+        latency: float,
+    ):
+        fake: FakeLLMServer = self.server.fake  # type: ignore[attr-defined]
+        size = max(1, fake.settings.stream_chunk_chars)
+        pieces = [output[i : i + size] for i in range(0, len(output), size)] or [""]
+        first = latency * fake.settings.first_token_ratio
+        interval = (latency - first) / len(pieces)
+        chunk_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def send(choices: List[dict], extra: Optional[dict] = None):
+            data = {
+                "id": chunk_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": choices,
+                **(extra or {}),
+            }
+            payload = json.dumps(data, ensure_ascii=False)
+            self.wfile.write(f"data: {payload}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        time.sleep(first)
+        call_id = f"call_{uuid.uuid4().hex[:12]}"
+        for i, piece in enumerate(pieces):
+            if tool:
+                call: Dict[str, Any] = {"index": 0, "function": {"arguments": piece}}
+                if i == 0:
+                    call.update(id=call_id, type="function")
+                    call["function"]["name"] = tool
+                delta: Dict[str, Any] = {"tool_calls": [call]}
+            else:
+                delta = {"content": piece}
+            if i == 0:
+                delta["role"] = "assistant"
+            send([{"index": 0, "delta": delta, "finish_reason": None}])
+            time.sleep(interval)
+        finish = "tool_calls" if tool else "stop"
+        send([{"index": 0, "delta": {}, "finish_reason": finish}])
+        if usage is not None:
+            send([], {"usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+    def __send_json(self, status: int, body: dict, headers: Optional[dict] = None):
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _generate_response(request: dict, rng: random.Random) -> Tuple[str, str]:
+    """根据请求生成结构化输出，返回 (工具名称, JSON 文本)，非工具调用时工具名称为空"""
+    tools = request.get("tools") or []
+    if tools:
+        choice = request.get("tool_choice")
+        name = ""
+        if isinstance(choice, dict):
+            name = (choice.get("function") or {}).get("name", "")
+        tool = next((t for t in tools if t["function"]["name"] == name), tools[0])[
+            "function"
+        ]
+        schema = tool.get("parameters") or {}
+        return tool["name"], json.dumps(
+            generate_from_schema(schema, rng, name=tool["name"]), ensure_ascii=False
+        )
+    response_format = request.get("response_format") or {}
+    if response_format.get("type") == "json_schema":
+        schema = response_format["json_schema"].get("schema") or {}
+        return "", json.dumps(generate_from_schema(schema, rng), ensure_ascii=False)
+    # 其他提供商的调用方式：格式说明中给出 JSON Schema
+    for message in request.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, list):
+            content = " ".join(str(c.get("text", "")) for c in content)
+        for m in _RE_SCHEMA_BLOCK.finditer(content or ""):
+            try:
+                schema = json.loads(m.group(1))
+            except json.JSONDecodeError:
+                continue
+            name = schema.get("title", "")
+            value = generate_from_schema(schema, rng, name=name)
+            return "", json.dumps(value, ensure_ascii=False)
+    return "", json.dumps({"text": _sentence(rng)}, ensure_ascii=False)
+
+
+def generate_from_schema(
+    schema: dict, rng: random.Random, name: str = "", root: Optional[dict] = None
+) -> Any:
+    """生成符合 JSON Schema 的随机数据
+
+    对于没有定义属性的对象（如 Summary.summary、Mindmap.mindmap），
+    生成与真实输出结构相近的多级章节。
+
+    Args:
+        schema (dict): JSON Schema
+        rng (random.Random): 随机数生成器
+        name (str): 字段名称，用于生成更贴近真实的数据
+        root (Optional[dict]): 根 Schema，用于解析 $ref
+
+    Returns:
+        Any: 随机数据
+    """
+    root = root or schema
+    if "$ref" in schema:
+        ref = schema["$ref"].split("/")[-1]
+        defs = root.get("$defs") or root.get("definitions") or {}
+        return generate_from_schema(defs.get(ref, {}), rng, name, root)
+    for key in ("anyOf", "oneOf", "allOf"):
+        if key in schema:
+            return generate_from_schema(schema[key][0], rng, name, root)
+    kind = schema.get("type", "object")
+    if kind == "object":
+        properties = schema.get("properties")
+        if not properties:
+            return _sections(rng, depth=2 if name.lower() == "mindmap" else 1)
+        return {k: generate_from_schema(v, rng, k, root) for k, v in properties.items()}
+    if kind == "array":
+        items = schema.get("items") or {"type": "string"}
+        return [
+            generate_from_schema(items, rng, name, root)
+            for _ in range(rng.randint(2, 4))
+        ]
+    if kind == "string":
+        if name == "link":
+            return f"figure-{rng.randint(1, 9)}.png"
+        if name == "type":
+            return rng.choice(["FIGURE", "TABLE"])
+        return _sentence(rng)
+    if kind == "integer":
+        return rng.randint(0, 100)
+    if kind == "number":
+        return round(rng.random() * 100, 2)
+    if kind == "boolean":
+        return rng.random() < 0.5
+    return None
+
+
+def _sections(rng: random.Random, depth: int) -> dict:
+    titles = rng.sample(_SECTIONS, k=rng.randint(4, len(_SECTIONS)))
+    result: Dict[str, Any] = {}
+    for title in titles:
+        if depth > 1:
+            result[title] = {
+                _sentence(rng, 2, 4): [_sentence(rng) for _ in range(rng.randint(1, 3))]
+                for _ in range(rng.randint(2, 3))
+            }
+        else:
+            result[title] = [_sentence(rng) for _ in range(rng.randint(2, 4))]
+    return result
+
+
+def _sentence(rng: random.Random, low: int = 8, high: int = 20) -> str:
+    return "".join(rng.choice(_WORDS) for _ in range(rng.randint(low, high)))
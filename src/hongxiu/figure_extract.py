@@ -0,0 +1,184 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+from .model import Figure, Figures
+
+# 图片说明："Figure 3:"、"Fig. 3."、"图 3："，不匹配正文中的 "Figure 3 shows"
+_RE_CAPTION = re.compile(r"^\s*(?:Figure|Fig\.?|图)\s*(\d+)\s*[:.：|]", re.IGNORECASE)
+# 嵌入的图片可以直接保存原始数据，无需重新渲染
+_RASTER_EXTS = {"png", "jpg", "jpeg"}
+# 图片区域周围多少点以内的文字视为图片的一部分
+_LABEL_PAD = 6
+
+
+class FigureExtractSettings(BaseModel):
+    """使用 PyMuPDF 从页面对象中直接抽取图片的参数
+
+    Args:
+        native (bool): pymupdf、hybrid 解析器是否直接从 PDF 中抽取图片
+        dpi (int): 渲染矢量图区域的分辨率
+        min_area (float): 图片区域占页面面积的最小比例，更小的区域（如图标）会被忽略
+        max_gap (float): 图片各部分之间、图片与说明之间的最大间距（占页面高度的比例）
+    """
+
+    native: bool = True
+    dpi: int = 150
+    min_area: float = 0.01
+    max_gap: float = 0.05
+
+
+def load_figure_extract_settings(config: Config) -> FigureExtractSettings:
+    """读取配置中的 figures 部分"""
+    cfg = config.figures or ConfigItem()
+    values = {k: v for k, v in cfg.to_dict().items() if v not in (None, "")}
+    return FigureExtractSettings(**values)
+
+
+def extract_figures_pymupdf(
+    filename: str | Path,
+    output_dir: str | Path,
+    settings: Optional[FigureExtractSettings] = None,
+) -> Figures:
+    """根据 "Figure N" 图片说明，从页面对象中抽取论文图片
+
+    图片位于说明的上方，由嵌入的位图和矢量绘图组成：
+    只有一张位图时直接保存其原始数据，否则按说明上方的区域渲染为 PNG。
+    图片保存在 output_dir 中，Figure.link 为相对于 output_dir 的文件名。
+
+    Args:
+        filename (str | Path): PDF 文件路径
+        output_dir (str | Path): 图片的保存目录
+        settings (Optional[FigureExtractSettings]): 抽取参数
+
+    Returns:
+        Figures: 按在论文中出现的顺序排列的图片，desc 为图片说明
+    """
+    import pymupdf  # type: ignore
+
+    settings = settings or FigureExtractSettings()
+    output_dir = Path(output_dir)
+    figures: List[Figure] = []
+    names: Dict[str, int] = {}
+    with pymupdf.open(filename) as doc:
+        for page in doc:
+            captions = _find_captions(page)
+            for caption, number in captions:
+                region = _figure_region(page, caption, captions, settings)
+                if region is None:
+                    continue
+                rect, xref = region
+                name = f"figure-{number}"
+                names[name] = names.get(name, 0) + 1
+                if names[name] > 1:
+                    name = f"{name}-{names[name]}"
+                output_dir.mkdir(parents=True, exist_ok=True)
+                link = _save_figure(doc, page, rect, xref, output_dir / name, settings)
+                desc = " ".join(caption[4].split())
+                figures.append(Figure(link=link, type="FIGURE", desc=desc))
+    logger.info(f"extract_figures_pymupdf(): {len(figures)} figures from {filename}")
+    return Figures(figures=figures)
+
+
+def _find_captions(page) -> List[tuple]:
+    """页面中的图片说明文本块及图片编号"""
+    captions = []
+    for block in page.get_text("blocks"):
+        # block: (x0, y0, x1, y1, text, block_no, block_type)，block_type 为 0 表示文本
+        if block[6] != 0:
+            continue
+        m = _RE_CAPTION.match(block[4])
+        if m:
+            captions.append((block, int(m.group(1))))
+    return captions
+
+
+def _figure_region(
+    page, caption: tuple, captions: List[tuple], settings: FigureExtractSettings
+):
+    """图片说明上方、与说明水平重叠且彼此相邻的位图及矢量绘图所占的区域
+
+    区域不会越过上方同一栏中另一张图片的说明。
+
+    Returns:
+        Optional[Tuple[Rect, Optional[int]]]: 图片区域，
+            以及区域仅由一张位图（不含文字）构成时该位图的 xref
+    """
+    import pymupdf  # type: ignore
+
+    page_rect = page.rect
+    cap = pymupdf.Rect(caption[:4])
+    gap = settings.max_gap * page_rect.height
+    limit = max(
+        [
+            other[3]
+            for other, _ in captions
+            if other[3] <= cap.y0 and other[0] < cap.x1 and other[2] > cap.x0
+        ],
+        default=page_rect.y0,
+    )
+    # 说明上方、水平方向与说明重叠的图形元素
+    elements = [
+        (pymupdf.Rect(info["bbox"]), info.get("xref", 0))
+        for info in page.get_image_info(xrefs=True)
+    ] + [(rect, None) for rect in page.cluster_drawings()]
+    candidates = [
+        (rect, xref)
+        for rect, xref in elements
+        if not rect.is_empty
+        and rect.y1 <= cap.y0 + 2
+        and rect.y0 >= limit - 2
+        and rect.x0 < cap.x1
+        and rect.x1 > cap.x0
+        and rect.width < page_rect.width
+    ]
+    # 自下而上合并与说明（及已合并部分）相邻的元素
+    candidates.sort(key=lambda c: c[0].y1, reverse=True)
+    region: Optional[pymupdf.Rect] = None
+    parts = []
+    for rect, xref in candidates:
+        top = cap.y0 if region is None else region.y0
+        if rect.y1 < top - gap:
+            break
+        region = pymupdf.Rect(rect) if region is None else region | rect
+        parts.append(xref)
+    if region is None:
+        return None
+    # 坐标轴刻度、图例等文字可能位于绘图区域之外，一并纳入；正文段落比图片宽，不会被纳入
+    padded = region + (-_LABEL_PAD, -_LABEL_PAD, _LABEL_PAD, _LABEL_PAD)
+    labels = False
+    for block in page.get_text("blocks"):
+        rect = pymupdf.Rect(block[:4])
+        if (
+            block[6] == 0
+            and rect.intersects(padded)
+            and rect.y1 <= cap.y0 + 2
+            and rect.y0 >= limit - 2
+            and rect.width <= region.width
+        ):
+            region |= rect
+            labels = True
+    region &= page_rect
+    if region.get_area() < settings.min_area * page_rect.get_area():
+        return None
+    xref = parts[0] if len(parts) == 1 and parts[0] and not labels else None
+    return region, xref
+
+
+def _save_figure(
+    doc, page, rect, xref: Optional[int], path: Path, settings: FigureExtractSettings
+) -> str:
+    """保存图片，返回文件名"""
+    if xref is not None:
+        image = doc.extract_image(xref)
+        if image and image.get("ext") in _RASTER_EXTS and not image.get("smask"):
+            p = path.with_suffix("." + image["ext"])
+            p.write_bytes(image["image"])
+            return p.name
+    p = path.with_suffix(".png")
+    page.get_pixmap(clip=rect, dpi=settings.dpi).save(p)
+    return p.name
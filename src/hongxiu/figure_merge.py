@@ -0,0 +1,232 @@
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+from .model import Figure, Summary
+
+# 英文单词（含数字、连字符）
+_RE_WORD = re.compile(r"[a-z][a-z0-9\-]+")
+# 连续的中日韩文字
+_RE_CJK_RUN = re.compile(r"[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+")
+
+# 图片说明中常见、但对定位章节没有帮助的词
+_STOPWORDS = {
+    "the", "of", "and", "in", "on", "for", "to", "with", "by", "an", "is", "are",
+    "fig", "figure", "table", "image", "shows", "show", "shown", "illustration",
+    "图片", "图表", "示意", "意图", "表示", "展示", "显示", "所示", "如图", "本文", "论文",
+}  # fmt: skip
+
+# 章节标题的权重高于正文
+TITLE_WEIGHT = 2
+
+
+class FigureMergeSettings(BaseModel):
+    """图片合并的参数
+
+    Args:
+        merge (str): local 表示在本地按相似度插入图片，
+            llm 表示调用 summary_merge_figures 调用链由模型插入图片
+        max_figures (int): 最多插入的图片数量，0 表示不限制
+        min_score (float): 图片与段落的最低相似度，低于该值时插入到第一个可插入的位置
+    """
+
+    merge: str = "local"
+    max_figures: int = 0
+    min_score: float = 0.05
+
+
+class _Slot(NamedTuple):
+    """可以插入图片的位置：container 中 position 所指元素之前"""
+
+    container: Any
+    position: int | str
+    tokens: Dict[str, float]
+    order: int
+
+
+def tokenize(text: str) -> Counter:
+    """将文本切分为用于比较相似度的词
+
+    英文按单词切分，中文没有分词，因此按相邻两个字（bigram）切分。
+
+    Args:
+        text (str): 文本
+
+    Returns:
+        Counter: 词及其出现次数
+    """
+    text = text.lower()
+    tokens: Counter = Counter()
+    tokens.update(w for w in _RE_WORD.findall(text) if w not in _STOPWORDS)
+    for run in _RE_CJK_RUN.findall(text):
+        if len(run) == 1:
+            grams = [run]
+        else:
+            grams = [run[i : i + 2] for i in range(len(run) - 1)]
+        tokens.update(g for g in grams if g not in _STOPWORDS)
+    return tokens
+
+
+def similarity(a: Dict[str, float], b: Dict[str, float]) -> float:
+    """两个词频向量的余弦相似度"""
+    if not a or not b:
+        return 0.0
+    dot = sum(v * b.get(k, 0) for k, v in a.items())
+    if dot == 0:
+        return 0.0
+    norm_a = math.sqrt(sum(v * v for v in a.values()))
+    norm_b = math.sqrt(sum(v * v for v in b.values()))
+    return dot / (norm_a * norm_b)
+
+
+def merge_figures(
+    summary: Summary,
+    figures: List[Figure],
+    settings: Optional[FigureMergeSettings] = None,
+) -> Summary:
+    """将图片插入到论文总结中最相关的段落之前
+
+    根据图片说明与各段落（章节标题及正文）的相似度确定插入位置，
+    插入格式与 summary_merge_figures 调用链一致：
+    列表中插入 "IMAGE|<link>"，字典中插入 "IMAGE": "<link>"。
+    由于字典的键不能重复，每个字典最多插入一张图片。
+    总结中已有的图片不会重复插入，因此可以对同一份总结多次合并。
+
+    Args:
+        summary (Summary): 论文总结
+        figures (List[Figure]): 按重要性排序的图片
+        settings (Optional[FigureMergeSettings]): 合并参数
+
+    Returns:
+        Summary: 插入图片后的论文总结（不修改原对象）
+    """
+    settings = settings or FigureMergeSettings()
+    if settings.max_figures > 0:
+        figures = figures[: settings.max_figures]
+    result = summary.model_copy(deep=True)
+    existing = set(image_links(result.summary))
+    figures = [figure for figure in figures if figure.link not in existing]
+    slots = _collect_slots(result.summary)
+    if not slots or not figures:
+        return result
+
+    # (container id, position) -> 待插入的图片链接
+    inserts: Dict[Tuple[int, int | str], List[str]] = {}
+    containers: Dict[int, Any] = {}
+    used_dicts = set()
+    for figure in figures:
+        query: Dict[str, float] = dict(tokenize(figure.desc))
+        candidates = [
+            (similarity(query, slot.tokens), -slot.order, slot)
+            for slot in slots
+            if not (
+                isinstance(slot.container, dict) and id(slot.container) in used_dicts
+            )
+        ]
+        if not candidates:
+            logger.debug(f"merge_figures(): no slot left for {figure.link}")
+            continue
+        score, _, slot = max(candidates, key=lambda c: (c[0], c[1]))
+        if score < settings.min_score:
+            # 与所有段落都不相关时，放在第一个可插入的位置
+            slot = min((c[2] for c in candidates), key=lambda s: s.order)
+        logger.debug(
+            f"merge_figures(): {figure.link} -> {slot.position!r} (score: {score:.3f})"
+        )
+        key = (id(slot.container), slot.position)
+        inserts.setdefault(key, []).append(figure.link)
+        containers[id(slot.container)] = slot.container
+        if isinstance(slot.container, dict):
+            used_dicts.add(id(slot.container))
+
+    for container_id, container in containers.items():
+        if isinstance(container, list):
+            positions = sorted(
+                (p for (c, p) in inserts if c == container_id),
+                key=lambda p: int(p),
+                reverse=True,
+            )
+            for position in positions:
+                links = inserts[(container_id, position)]
+                container[int(position) : int(position)] = [
+                    f"IMAGE|{link}" for link in links
+                ]
+        else:
+            items = list(container.items())
+            container.clear()
+            for k, v in items:
+                if (container_id, k) in inserts:
+                    container["IMAGE"] = inserts[(container_id, k)][0]
+                container[k] = v
+    return result
+
+
+def image_links(sections: Any) -> List[str]:
+    """论文总结中已插入的图片链接，按出现顺序排列"""
+    links: List[str] = []
+    if isinstance(sections, str):
+        if sections.startswith("IMAGE|"):
+            links.append(sections[len("IMAGE|") :])
+    elif isinstance(sections, list):
+        for value in sections:
+            links.extend(image_links(value))
+    elif isinstance(sections, dict):
+        for key, value in sections.items():
+            if key == "IMAGE" and isinstance(value, str):
+                links.append(value)
+            else:
+                links.extend(image_links(value))
+    return links
+
+
+def _collect_slots(sections: dict) -> List[_Slot]:
+    slots: List[_Slot] = []
+
+    def visit(node: Any, titles: Counter):
+        if isinstance(node, list):
+            items = list(enumerate(node))
+        elif isinstance(node, dict):
+            # 已有图片的字典不再插入
+            if "IMAGE" in node:
+                return
+            items = list(node.items())
+        else:
+            return
+        for position, value in items:
+            if isinstance(value, str) and value.startswith("IMAGE|"):
+                continue
+            own_titles = titles.copy()
+            if isinstance(position, str):
+                own_titles.update(tokenize(position))
+            tokens: Counter = Counter(
+                {k: v * TITLE_WEIGHT for k, v in own_titles.items()}
+            )
+            tokens.update(tokenize(_flatten(value)))
+            slots.append(_Slot(node, position, dict(tokens), len(slots)))
+            visit(value, own_titles)
+
+    for title, value in sections.items():
+        visit(value, tokenize(title))
+    return slots
+
+
+def _flatten(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, list):
+        return " ".join(_flatten(v) for v in value)
+    if isinstance(value, dict):
+        return " ".join(f"{k} {_flatten(v)}" for k, v in value.items())
+    return str(value)
+
+
+def load_figure_merge_settings(config: Config) -> FigureMergeSettings:
+    """读取配置中的 figures 部分"""
+    cfg = config.figures or ConfigItem()
+    values = {k: v for k, v in cfg.to_dict().items() if v not in (None, "")}
+    return FigureMergeSettings(**values)
@@ -0,0 +1,114 @@
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+from .utils import percentile
+
+
+class HedgeSettings(BaseModel):
+    """对冲请求的参数
+
+    Args:
+        enabled (bool): 是否启用对冲请求，关闭后只在主模型失败时才切换到下一个模型
+        percentile (float): 主模型的响应时间超过该分位数时，向下一个模型发起对冲请求
+        min_samples (int): 样本数量不足时使用 default_delay
+        default_delay (float): 默认的对冲延迟（秒）
+        window (int): 每个模型保留的最近响应时间样本数量
+    """
+
+    enabled: bool = True
+    percentile: float = 0.95
+    min_samples: int = 5
+    default_delay: float = 60.0
+    window: int = 200
+
+
+class LatencyHistogram:
+    """模型最近若干次调用的响应时间分布"""
+
+    def __init__(self, window: int = 200):
+        self.__samples: Deque[float] = deque(maxlen=window)
+        self.__lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.__samples)
+
+    def record(self, latency: float):
+        with self.__lock:
+            self.__samples.append(latency)
+
+    def percentile(self, p: float) -> float:
+        """计算响应时间的分位数（最近邻法），没有样本时返回 0
+
+        Args:
+            p (float): 分位数，取值 0~1
+
+        Returns:
+            float: 响应时间（秒）
+        """
+        with self.__lock:
+            samples = sorted(self.__samples)
+        return percentile(samples, p)
+
+    def hedge_delay(self, settings: HedgeSettings) -> float:
+        """发起对冲请求前需要等待的时间"""
+        if len(self) < settings.min_samples:
+            return settings.default_delay
+        return self.percentile(settings.percentile)
+
+
+_HISTOGRAMS: Dict[Tuple[str, str], LatencyHistogram] = {}
+_HISTOGRAMS_LOCK = threading.Lock()
+
+
+def get_latency_histogram(llm: str, chain: str, window: int = 200) -> LatencyHistogram:
+    """获取模型在某个调用链上的响应时间分布，同一进程内共享
+
+    不同调用链的提示词和输出长度相差很大，响应时间分别统计。
+
+    Args:
+        llm (str): 模型，格式为 provider:model_name
+        chain (str): 调用链名称
+
+    Returns:
+        LatencyHistogram: 响应时间分布
+    """
+    key = (llm, chain)
+    with _HISTOGRAMS_LOCK:
+        if key not in _HISTOGRAMS:
+            _HISTOGRAMS[key] = LatencyHistogram(window)
+        return _HISTOGRAMS[key]
+
+
+def load_hedge_settings(config: Config) -> HedgeSettings:
+    """读取配置中的 hedge 部分"""
+    cfg = config.hedge or ConfigItem()
+    values = {k: v for k, v in cfg.to_dict().items() if v not in (None, "")}
+    return HedgeSettings(**values)
+
+
+def parse_llms(value) -> List[str]:
+    """解析模型列表
+
+    支持单个模型、逗号分隔的字符串（便于通过环境变量或命令行设置）以及列表，
+    排在前面的为主模型，其后依次为备用模型。
+
+    Args:
+        value: 配置中的 llm，如 "openai:gpt-4o-mini"、
+            "openai:gpt-4o-mini,deepseek:deepseek-chat" 或对应的列表
+
+    Returns:
+        List[str]: provider:model_name 格式的模型列表
+    """
+    if value is None:
+        return []
+    items = value.split(",") if isinstance(value, str) else list(value)
+    llms = [str(item).strip() for item in items if str(item).strip()]
+    for llm in llms:
+        provider, _, name = llm.partition(":")
+        if not provider or not name:
+            raise ValueError(f"Invalid LLM configuration: {llm}")
+    return llms
@@ -0,0 +1,325 @@
+import asyncio
+import contextvars
+import functools
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+from .tracing import span
+
+# 编译在子进程中进行，线程只负责等待，因此线程数即同时编译的数量
+_LATEX_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_LATEX_EXECUTOR_JOBS = 0
+_LATEX_EXECUTOR_LOCK = threading.Lock()
+# 编译失败时输出日志的最后若干行
+_LOG_TAIL_LINES = 20
+# 此标记之前的导言区可以预编译为格式文件（mylatexformat），
+# 未使用格式文件编译时 \csname endofdump\endcsname 等同于 \relax，不起作用
+_END_OF_DUMP = r"\csname endofdump\endcsname"
+# 同一个格式文件只由一个线程构建
+_FORMAT_LOCKS: Dict[str, threading.Lock] = {}
+_FORMAT_LOCKS_LOCK = threading.Lock()
+# 构建失败或已失效的格式文件，本进程内不再尝试
+_FORMAT_FAILED: Set[str] = set()
+_ENGINE_VERSIONS: Dict[str, str] = {}
+
+
+class LatexSettings(BaseModel):
+    """LaTeX 编译的参数
+
+    Args:
+        engine (str): 编译程序
+        jobs (int): 同时编译的数量，0 表示 CPU 核数
+        timeout (float): 单个文件的编译超时时间（秒），0 表示不限制
+        format (bool): 是否将模板的导言区预编译为格式文件，各海报共用
+        format_dir (str): 格式文件的缓存目录
+    """
+
+    engine: str = "xelatex"
+    jobs: int = 0
+    timeout: float = 300
+    format: bool = True
+    format_dir: str = "~/.cache/hongxiu/latex"
+
+    @property
+    def max_jobs(self) -> int:
+        return self.jobs if self.jobs > 0 else (os.cpu_count() or 1)
+
+
+def load_latex_settings(config: Config) -> LatexSettings:
+    """读取配置中的 latex 部分"""
+    cfg = config.latex or ConfigItem()
+    values = {k: v for k, v in cfg.to_dict().items() if v not in (None, "")}
+    return LatexSettings(**values)
+
+
+def latex_to_pdf(
+    latex_file: Path,
+    output: Path,
+    override: bool = False,
+    settings: Optional[LatexSettings] = None,
+):
+    """将 .tex 文件编译为 PDF
+
+    在独立的临时目录中编译（工作目录为 .tex 所在目录，以便找到图片等相对路径的资源），
+    不切换进程的工作目录，因此可以在多个线程中同时编译。
+    编译成功后只将 PDF 原子地移动到 output，.aux、.log 等中间文件随临时目录删除；
+    编译失败时将日志保存为 .tex 同名的 .log 文件。
+    导言区中有 endofdump 标记时，标记之前的部分预编译为格式文件并缓存，各海报共用。
+
+    Args:
+        latex_file (Path): .tex 文件路径
+        output (Path): 输出的 PDF 文件路径
+        override (bool): 是否覆盖已有的 PDF
+        settings (Optional[LatexSettings]): 编译参数
+
+    Raises:
+        RuntimeError: 找不到编译程序、编译超时或没有生成 PDF
+    """
+    if not override and output.exists():
+        logger.warning(f"{output} is exist, please use --override to override it.")
+        return
+
+    settings = settings or LatexSettings()
+    latex_file = latex_file.resolve()
+    output = output.resolve()
+    logger.info(f"Converting {latex_file} to {output}")
+    p_format = _latex_format(latex_file, settings) if settings.format else None
+    with tempfile.TemporaryDirectory(prefix="hongxiu-latex-") as build_dir:
+        start = time.perf_counter()
+        p_pdf = _compile(latex_file, Path(build_dir) / "format", settings, p_format)
+        if p_format is not None and p_pdf is None:
+            # 格式文件与当前的 TeX 发行版或宏包不一致时，改为直接编译
+            logger.warning(
+                f"Compiling {latex_file} with {p_format} failed, "
+                "falling back to a normal compile"
+            )
+            p_pdf = _compile(latex_file, Path(build_dir) / "plain", settings, None)
+            # 直接编译成功说明是格式文件的问题（直接编译失败时 _compile() 会抛出异常）
+            _discard_format(p_format)
+            p_format = None
+        if p_pdf is None:
+            raise RuntimeError(f"{settings.engine} failed: {latex_file}")
+        logger.info(
+            f"Compiled {latex_file} in {time.perf_counter() - start:.2f}s"
+            + (f" with {p_format.name}" if p_format else "")
+        )
+
+        # 临时目录可能与输出目录不在同一文件系统，先复制到输出目录再原子地替换
+        p_tmp = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+        shutil.copyfile(p_pdf, p_tmp)
+        os.replace(p_tmp, output)
+
+
+def _compile(
+    latex_file: Path,
+    build_dir: Path,
+    settings: LatexSettings,
+    p_format: Optional[Path],
+) -> Optional[Path]:
+    """在 build_dir 中编译，返回生成的 PDF
+
+    使用格式文件编译失败时返回 None，由调用者改为直接编译；
+    直接编译失败时抛出异常，并将日志保存在 .tex 同名的 .log 文件中。
+    """
+    build_dir.mkdir(parents=True, exist_ok=True)
+    cmd = [settings.engine]
+    if p_format is not None:
+        # 指定格式文件时不带 .fmt 后缀
+        cmd.append(f"-fmt={p_format.with_suffix('')}")
+    cmd += [
+        "--shell-escape",
+        "-interaction=batchmode",
+        f"-output-directory={build_dir}",
+        latex_file.name,
+    ]
+    try:
+        result = subprocess.run(
+            cmd,
+            cwd=latex_file.parent,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            timeout=settings.timeout or None,
+        )
+    except FileNotFoundError as e:
+        logger.error(f"Please install TeX Live, {settings.engine} is not found")
+        raise RuntimeError(f"{settings.engine} is not found") from e
+    except subprocess.TimeoutExpired as e:
+        raise RuntimeError(
+            f"{settings.engine} timed out after {settings.timeout}s: {latex_file}"
+        ) from e
+
+    p_pdf = build_dir / (latex_file.stem + ".pdf")
+    if result.returncode == 0 and p_pdf.exists():
+        return p_pdf
+    p_log = build_dir / (latex_file.stem + ".log")
+    log = p_log.read_text(errors="replace") if p_log.exists() else ""
+    log = log or result.stdout.decode(errors="replace")
+    tail = "\n".join(log.splitlines()[-_LOG_TAIL_LINES:])
+    if p_format is not None and not p_pdf.exists():
+        logger.debug(f"{settings.engine} -fmt={p_format.name} failed:\n{tail}")
+        return None
+    if not p_pdf.exists():
+        p_output_log = latex_file.with_suffix(".log")
+        p_output_log.write_text(log)
+        raise RuntimeError(
+            f"{settings.engine} failed (exit code {result.returncode}), "
+            f"see {p_output_log}:\n{tail}"
+        )
+    # batchmode 下出现错误仍可能生成 PDF，与以往一样保留结果
+    logger.warning(
+        f"{settings.engine} reported errors (exit code {result.returncode}) "
+        f"for {latex_file}:\n{tail}"
+    )
+    return p_pdf
+
+
+def _latex_format(latex_file: Path, settings: LatexSettings) -> Optional[Path]:
+    """.tex 文件导言区对应的格式文件，不存在时构建
+
+    格式文件以导言区内容及编译程序版本的哈希命名，模板或 TeX 发行版更新后会重新构建。
+    .tex 文件中没有 endofdump 标记、或构建失败时返回 None。
+    """
+    text = latex_file.read_text(encoding="utf-8", errors="replace")
+    end = text.find(_END_OF_DUMP)
+    if end < 0:
+        return None
+    version = _engine_version(settings.engine)
+    if version is None:
+        return None
+    preamble = text[:end]
+    digest = hashlib.sha256(f"{version}\n{preamble}".encode("utf-8")).hexdigest()
+    name = f"{settings.engine}-{digest[:16]}"
+    p_format = Path(settings.format_dir).expanduser() / f"{name}.fmt"
+    if p_format.exists():
+        return p_format
+
+    with _FORMAT_LOCKS_LOCK:
+        lock = _FORMAT_LOCKS.setdefault(name, threading.Lock())
+    with lock:
+        if p_format.exists():
+            return p_format
+        if name in _FORMAT_FAILED:
+            return None
+        with span("latex_format", engine=settings.engine) as s:
+            built = _build_format(preamble, name, p_format, settings)
+            s.set(built=built)
+        if not built:
+            _FORMAT_FAILED.add(name)
+            return None
+        return p_format
+
+
+def _build_format(
+    preamble: str, name: str, p_format: Path, settings: LatexSettings
+) -> bool:
+    """使用 mylatexformat 将导言区预编译为格式文件"""
+    logger.info(f"Building LaTeX format {p_format}")
+    with tempfile.TemporaryDirectory(prefix="hongxiu-latex-format-") as build_dir:
+        p_build = Path(build_dir)
+        # mylatexformat 读取到 endofdump 为止，之后的内容不会执行
+        (p_build / f"{name}.tex").write_text(
+            preamble + _END_OF_DUMP + "\n\\begin{document}\n\\end{document}\n",
+            encoding="utf-8",
+        )
+        cmd = [
+            settings.engine,
+            "-ini",
+            "-interaction=batchmode",
+            f"-jobname={name}",
+            f"&{settings.engine}",
+            "mylatexformat.ltx",
+            f"{name}.tex",
+        ]
+        try:
+            result = subprocess.run(
+                cmd,
+                cwd=p_build,
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                timeout=settings.timeout or None,
+            )
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning(f"Failed to build LaTeX format {name}: {e}")
+            return False
+        p_built = p_build / f"{name}.fmt"
+        if result.returncode != 0 or not p_built.exists():
+            p_log = p_build / f"{name}.log"
+            log = p_log.read_text(errors="replace") if p_log.exists() else ""
+            log = log or result.stdout.decode(errors="replace")
+            tail = "\n".join(log.splitlines()[-_LOG_TAIL_LINES:])
+            logger.warning(f"Failed to build LaTeX format {name}:\n{tail}")
+            return False
+        p_format.parent.mkdir(parents=True, exist_ok=True)
+        p_tmp = p_format.with_name(f".{p_format.name}.{os.getpid()}.tmp")
+        shutil.copyfile(p_built, p_tmp)
+        os.replace(p_tmp, p_format)
+    return True
+
+
+def _discard_format(p_format: Path):
+    """删除失效的格式文件，本进程内不再使用"""
+    _FORMAT_FAILED.add(p_format.stem)
+    p_format.unlink(missing_ok=True)
+
+
+def _engine_version(engine: str) -> Optional[str]:
+    """编译程序的版本信息，格式文件只能由构建它的程序版本加载"""
+    if engine not in _ENGINE_VERSIONS:
+        try:
+            result = subprocess.run(
+                [engine, "--version"],
+                stdin=subprocess.DEVNULL,
+                capture_output=True,
+                timeout=30,
+            )
+        except (OSError, subprocess.TimeoutExpired):
+            return None
+        lines = result.stdout.decode(errors="replace").splitlines()
+        _ENGINE_VERSIONS[engine] = lines[0] if lines else engine
+    return _ENGINE_VERSIONS[engine]
+
+
+async def alatex_to_pdf(
+    latex_file: Path,
+    output: Path,
+    override: bool = False,
+    settings: Optional[LatexSettings] = None,
+):
+    """latex_to_pdf() 的异步封装，同时编译的数量不超过 settings.max_jobs"""
+    settings = settings or LatexSettings()
+    loop = asyncio.get_running_loop()
+    # 与 asyncio.to_thread() 一样传递 contextvars，使 span 归属于当前论文
+    context = contextvars.copy_context()
+    await loop.run_in_executor(
+        _get_latex_executor(settings.max_jobs),
+        functools.partial(
+            context.run, latex_to_pdf, latex_file, output, override, settings
+        ),
+    )
+
+
+def _get_latex_executor(jobs: int) -> ThreadPoolExecutor:
+    global _LATEX_EXECUTOR, _LATEX_EXECUTOR_JOBS
+    with _LATEX_EXECUTOR_LOCK:
+        if _LATEX_EXECUTOR is None or _LATEX_EXECUTOR_JOBS != jobs:
+            if _LATEX_EXECUTOR is not None:
+                _LATEX_EXECUTOR.shutdown(wait=False)
+            _LATEX_EXECUTOR_JOBS = jobs
+            _LATEX_EXECUTOR = ThreadPoolExecutor(
+                max_workers=jobs, thread_name_prefix="hongxiu-latex"
+            )
+        return _LATEX_EXECUTOR
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import threading
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+
+# 清单格式的版本
+_FORMAT_VERSION = 1
+# 同一个清单文件在进程内只有一个实例，总结与脑图并发更新时共用
+_MANIFESTS: Dict[Path, "Manifest"] = {}
+_MANIFESTS_LOCK = threading.Lock()
+
+
+class IncrementalSettings(BaseModel):
+    """增量构建的参数
+
+    Args:
+        enabled (bool): 是否根据清单只重新生成输入有变化的产物；
+            关闭时与以往一样，已存在的产物一律跳过
+    """
+
+    enabled: bool = True
+
+
+def load_incremental_settings(config: Config) -> IncrementalSettings:
+    """读取配置中的 incremental 部分"""
+    cfg = config.incremental or ConfigItem()
+    values = {k: v for k, v in cfg.to_dict().items() if v not in (None, "")}
+    return IncrementalSettings(**values)
+
+
+def text_digest(text: str) -> str:
+    """文本的 SHA-256"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    """文件内容的 SHA-256，文件未变化（修改时间及大小相同）时直接使用上次的结果"""
+    st = path.stat()
+    return _file_digest(str(path.resolve()), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=4096)
+def _file_digest(path: str, mtime_ns: int, size: int) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """增量构建的清单（类似 make），记录每个产物的输入及产物本身的哈希
+
+    产物存在、记录的输入与本次的输入一致、且产物本身未被修改时视为最新，无需重新生成。
+    例如只修改了 LaTeX 模板时，只有 .tex 的输入变化，论文总结的 .json 无需重新调用模型；
+    重新生成的 .tex 内容变化后，.pdf 随之重新编译。
+
+    清单保存为 JSON 文件，每次记录后原子地写回。
+
+    Args:
+        path (Path): 清单文件路径
+        enabled (bool): 是否启用，未启用时产物存在即视为最新，且不记录
+    """
+
+    def __init__(self, path: Path, enabled: bool = True):
+        self.path = path
+        self.enabled = enabled
+        self.__lock = threading.Lock()
+        self.__artifacts: Dict[str, dict] = self.__load() if enabled else {}
+
+    def __load(self) -> Dict[str, dict]:
+        if not self.path.exists():
+            return {}
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Failed to load manifest {self.path}: {e}")
+            return {}
+        if data.get("version") != _FORMAT_VERSION:
+            return {}
+        return data.get("artifacts", {})
+
+    def __save(self):
+        data = {"version": _FORMAT_VERSION, "artifacts": self.__artifacts}
+        p_tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        p_tmp.write_text(json.dumps(data, indent=2), encoding="utf-8")
+        os.replace(p_tmp, self.path)
+
+    def is_fresh(
+        self, artifact: Path, inputs: Dict[str, str], adopt: bool = False
+    ) -> bool:
+        """产物是否为最新
+
+        Args:
+            artifact (Path): 产物路径，与清单位于同一目录
+            inputs (Dict[str, str]): 输入名称到其哈希（或版本等标识）的映射
+            adopt (bool): 产物存在但没有记录（如升级前生成的结果）或被手动修改过时，
+                是否视为最新并重新记录；用于调用模型生成的 .json 等代价较高的产物，
+                手动修改的内容得以保留，并使其下游的产物重新生成
+
+        Returns:
+            bool: 是否无需重新生成
+        """
+        if not artifact.exists():
+            return False
+        if not self.enabled:
+            return True
+        with self.__lock:
+            entry = self.__artifacts.get(artifact.name)
+        if entry is None:
+            if adopt:
+                self.record(artifact, inputs)
+                return True
+            logger.debug(f"{artifact.name} is not in manifest, rebuilding")
+            return False
+        changed = [
+            name
+            for name in sorted(set(inputs) | set(entry.get("inputs", {})))
+            if inputs.get(name) != entry.get("inputs", {}).get(name)
+        ]
+        if changed:
+            logger.info(f"{artifact.name} is outdated ({', '.join(changed)} changed)")
+            return False
+        if file_digest(artifact) != entry.get("hash"):
+            if adopt:
+                logger.info(f"{artifact.name} was modified, keeping it")
+                self.record(artifact, inputs)
+                return True
+            logger.info(f"{artifact.name} was modified, rebuilding")
+            return False
+        return True
+
+    def record(self, artifact: Path, inputs: Dict[str, str]):
+        """记录已生成的产物及其输入"""
+        if not self.enabled or not artifact.exists():
+            return
+        entry = {"inputs": dict(inputs), "hash": file_digest(artifact)}
+        with self.__lock:
+            self.__artifacts[artifact.name] = entry
+            self.__save()
+
+
+def get_manifest(path: Path, enabled: bool = True) -> Manifest:
+    """获取清单，同一个文件在进程内共用一个实例"""
+    path = path.resolve()
+    with _MANIFESTS_LOCK:
+        manifest = _MANIFESTS.get(path)
+        if manifest is None or manifest.enabled != enabled:
+            manifest = _MANIFESTS[path] = Manifest(path, enabled)
+        return manifest
@@ -1,16 +1,141 @@
+import asyncio
+import importlib.metadata
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from enum import Enum
 from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 
 from loguru import logger
 from pydantic import BaseModel
 
+from .cache import ParseCache
+from .config import Config, ConfigItem
+from .document import Document
+from .figure_extract import FigureExtractSettings, extract_figures_pymupdf
+from .model import Figures
 from .utils import check_set_gpu
 
+# PyMuPDF 等解析库并非线程安全，所有异步解析请求都串行在同一个线程中执行
+_PARSE_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="hongxiu-parse")
+
+# 按页并行解析的进程池，第一次使用时创建，之后一直复用
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+_PROCESS_POOL_WORKERS = 0
+_PROCESS_POOL_LOCK = threading.Lock()
+
+# Pix2Text 模型在每个进程中只加载一次，之后的所有论文共用
+_PIX2TEXT = None
+_PIX2TEXT_LOCK = threading.Lock()
+# 多个 Pix2Text 常驻进程，各自加载一份模型，可以同时识别多篇论文
+_PIX2TEXT_POOL: Optional[ProcessPoolExecutor] = None
+_PIX2TEXT_POOL_WORKERS = 0
+
+
+class PdfSettings(BaseModel):
+    """PDF 解析的参数
+
+    Args:
+        workers (int): 按页并行解析的进程数，0 表示 CPU 核数，1 表示不并行
+        min_pages_per_worker (int): 每个进程至少分配的页数，页数较少的论文不值得启动多个进程
+        pix2text_workers (int): Pix2Text 常驻进程数，1 表示在解析线程中加载模型
+        pix2text_threads (int): 每份 Pix2Text 模型使用的 CPU 线程数，0 表示 CPU 核数平分给各进程
+        ocr_min_chars (int): hybrid 解析器中，文本层字符数少于该值且含有图片的页面视为扫描页
+        ocr_max_garbled_ratio (float): hybrid 解析器中，乱码字符占比超过该值的页面需要 OCR
+        ocr_max_formula_ratio (float): hybrid 解析器中，公式字符占比超过该值的页面需要 OCR
+    """
+
+    workers: int = 0
+    min_pages_per_worker: int = 16
+    pix2text_workers: int = 1
+    pix2text_threads: int = 0
+    ocr_min_chars: int = 50
+    ocr_max_garbled_ratio: float = 0.1
+    ocr_max_formula_ratio: float = 0.3
+
+    @property
+    def max_workers(self) -> int:
+        return self.workers if self.workers > 0 else (os.cpu_count() or 1)
+
+    @property
+    def max_pix2text_workers(self) -> int:
+        return max(1, self.pix2text_workers)
+
+    @property
+    def pix2text_cpu_threads(self) -> int:
+        if self.pix2text_threads > 0:
+            return self.pix2text_threads
+        return max(1, (os.cpu_count() or 1) // self.max_pix2text_workers)
+
+
+class Pix2TextStats(BaseModel):
+    """Pix2Text 的识别吞吐量
+
+    Args:
+        documents (int): 已识别的论文数量
+        pages (int): 已识别的页数
+        seconds (float): 识别耗时之和（秒），不包括模型加载
+    """
+
+    documents: int = 0
+    pages: int = 0
+    seconds: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.documents} documents, {self.pages} pages in {self.seconds:.1f}s "
+            f"({self.pages_per_second:.2f} pages/s)"
+        )
+
+
+_PIX2TEXT_STATS = Pix2TextStats()
+_PIX2TEXT_STATS_LOCK = threading.Lock()
+
+
+def pix2text_stats() -> Pix2TextStats:
+    """本进程中 Pix2Text 的累计识别吞吐量"""
+    with _PIX2TEXT_STATS_LOCK:
+        return _PIX2TEXT_STATS.model_copy()
+
+
+def load_pdf_settings(config: Config) -> PdfSettings:
+    """读取配置中的 pdf 部分"""
+    cfg = config.pdf or ConfigItem()
+    values = {k: v for k, v in cfg.to_dict().items() if v not in (None, "")}
+    return PdfSettings(**values)
+
+
+class PdfPage(BaseModel):
+    """解析得到的一页文本
+
+    Args:
+        number (int): 页码，从 1 开始
+        total (int): 总页数
+        text (str): 该页的文本，各页按顺序拼接即为全文
+    """
+
+    number: int
+    total: int
+    text: str
+
 
 class PdfParserType(Enum):
     PYMUPDF = "pymupdf"
     PYPDF2 = "pypdf2"
     PIX2TEXT = "pix2text"
+    HYBRID = "hybrid"
 
     @classmethod
     def from_string(cls, s: str) -> "PdfParserType":
@@ -19,24 +144,134 @@ class PdfParserType(Enum):
         except AttributeError:
             raise ValueError(f"Unknown PDF parser: {s}")
 
+    @property
+    def version(self) -> str:
+        """解析器所依赖库的版本，作为解析结果缓存键的一部分"""
+        versions = []
+        for package in _PARSER_PACKAGES[self]:
+            try:
+                versions.append(f"{package}-{importlib.metadata.version(package)}")
+            except importlib.metadata.PackageNotFoundError:
+                versions.append(f"{package}-unknown")
+        return ",".join(versions)
+
+
+_PARSER_PACKAGES = {
+    PdfParserType.PYMUPDF: ["pymupdf4llm", "pymupdf"],
+    PdfParserType.PYPDF2: ["PyPDF2"],
+    PdfParserType.PIX2TEXT: ["pix2text"],
+    PdfParserType.HYBRID: ["pymupdf4llm", "pymupdf", "pix2text"],
+}
+
 
 class PdfParser(BaseModel):
     type: PdfParserType
+    settings: PdfSettings = PdfSettings()
+    cache: Optional[ParseCache] = None
 
     def read_pdf(self, filename: str, override: bool = True) -> str:
+        return "".join(p.text for p in self.iter_pages(filename, override=override))
+
+    def iter_pages(self, filename: str, override: bool = True) -> Iterator[PdfPage]:
+        """逐页解析 PDF，每解析完一页即返回该页
+
+        未命中缓存时，各页在返回的同时被压缩，全部解析完成后一次性写入缓存。
+
+        Args:
+            filename (str): PDF 文件路径
+            override (bool): 是否忽略已有的缓存，重新解析
+
+        Yields:
+            PdfPage: 按页码顺序返回的各页文本
+        """
         raise NotImplementedError
 
+    def read_document(self, filename: str, override: bool = True) -> Document:
+        """解析 PDF，返回包含页面、章节、图表说明和图片链接位置的 Document
+
+        Args:
+            filename (str): PDF 文件路径
+            override (bool): 是否忽略已有的缓存，重新解析
+
+        Returns:
+            Document: 解析得到的论文
+        """
+        pages = self.iter_pages(filename, override=override)
+        return Document.from_pages(p.text for p in pages)
+
+    async def aread_pdf(self, filename: str, override: bool = True) -> str:
+        document = await self.aread_document(filename, override=override)
+        return document.text
+
+    async def aread_document(self, filename: str, override: bool = True) -> Document:
+        """异步解析 PDF，是所有异步解析的入口，aread_pdf() 同样经过该方法
+
+        默认在串行的解析线程中执行 read_document()；
+        有自己的并发方式的解析器（如 Pix2Text 的常驻进程池）覆盖该方法。
+
+        Args:
+            filename (str): PDF 文件路径
+            override (bool): 是否忽略已有的缓存，重新解析
+
+        Returns:
+            Document: 解析得到的论文
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _PARSE_EXECUTOR, lambda: self.read_document(filename, override=override)
+        )
+
+    def extract_figures(
+        self,
+        filename: str,
+        output_dir: str | Path,
+        settings: Optional[FigureExtractSettings] = None,
+    ) -> Optional[Figures]:
+        """直接从 PDF 中抽取图片
+
+        Args:
+            filename (str): PDF 文件路径
+            output_dir (str | Path): 图片的保存目录
+            settings (Optional[FigureExtractSettings]): 抽取参数
+
+        Returns:
+            Optional[Figures]: 抽取的图片，解析器不支持直接抽取时返回 None
+        """
+        return None
+
+    async def aextract_figures(
+        self,
+        filename: str,
+        output_dir: str | Path,
+        settings: Optional[FigureExtractSettings] = None,
+    ) -> Optional[Figures]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            _PARSE_EXECUTOR,
+            lambda: self.extract_figures(filename, output_dir, settings),
+        )
+
     def get_type(self) -> PdfParserType:
         return self.type
 
     @classmethod
-    def create(cls, type: PdfParserType = PdfParserType.PYMUPDF) -> "PdfParser":
+    def create(
+        cls,
+        type: PdfParserType | str = PdfParserType.PYMUPDF,
+        settings: Optional[PdfSettings] = None,
+        cache: Optional[ParseCache] = None,
+    ) -> "PdfParser":
+        if isinstance(type, str):
+            type = PdfParserType.from_string(type)
+        settings = settings or PdfSettings()
         if type == PdfParserType.PYMUPDF:
-            return PdfParserPymupdf(type=type)
+            return PdfParserPymupdf(type=type, settings=settings, cache=cache)
         elif type == PdfParserType.PYPDF2:
-            return PdfParserPypdf2(type=type)
+            return PdfParserPypdf2(type=type, settings=settings, cache=cache)
         elif type == PdfParserType.PIX2TEXT:
-            return PdfParserPix2Text(type=type)
+            return PdfParserPix2Text(type=type, settings=settings, cache=cache)
+        elif type == PdfParserType.HYBRID:
+            return PdfParserHybrid(type=type, settings=settings, cache=cache)
         else:
             raise ValueError(f"Unknown PDF parser: {type}")
 
@@ -44,89 +279,545 @@ class PdfParser(BaseModel):
 class PdfParserPymupdf(PdfParser):
     type: PdfParserType = PdfParserType.PYMUPDF
 
-    def read_pdf(self, filename: str, override: bool = True) -> str:
-        return read_pdf_pymupdf(filename, override=override)
+    def iter_pages(self, filename: str, override: bool = True) -> Iterator[PdfPage]:
+        return iter_pages_pymupdf(
+            filename, override=override, settings=self.settings, cache=self.cache
+        )
+
+    def extract_figures(
+        self,
+        filename: str,
+        output_dir: str | Path,
+        settings: Optional[FigureExtractSettings] = None,
+    ) -> Optional[Figures]:
+        return extract_figures_pymupdf(filename, output_dir, settings)
 
 
 class PdfParserPypdf2(PdfParser):
     type: PdfParserType = PdfParserType.PYPDF2
 
-    def read_pdf(self, filename: str, override: bool = True) -> str:
-        return read_pdf_pypdf2(filename, override=override)
+    def iter_pages(self, filename: str, override: bool = True) -> Iterator[PdfPage]:
+        return iter_pages_pypdf2(filename, override=override, cache=self.cache)
 
 
 class PdfParserPix2Text(PdfParser):
     type: PdfParserType = PdfParserType.PIX2TEXT
 
     def read_pdf(self, filename: str, override: bool = True) -> str:
-        return read_pdf_pix2text(filename, override=override)
+        return read_pdf_pix2text(filename, override=override, settings=self.settings)
+
+    async def aread_document(self, filename: str, override: bool = True) -> Document:
+        if self.settings.max_pix2text_workers <= 1:
+            return await super().aread_document(filename, override=override)
+        # 多个常驻进程可以同时识别多篇论文，无需经过串行的解析线程
+        existing = _pix2text_existing(filename, override)
+        if existing is not None:
+            return Document(existing)
+        logger.info(f"read_pdf_pix2text(): Parsing PDF {filename}...")
+        loop = asyncio.get_running_loop()
+        text, pages, elapsed = await loop.run_in_executor(
+            _get_pix2text_pool(self.settings),
+            _recognize_pdf_pix2text,
+            filename,
+            self.settings.pix2text_cpu_threads,
+        )
+        _record_pix2text(filename, pages, elapsed)
+        return Document(text)
+
+    def iter_pages(self, filename: str, override: bool = True) -> Iterator[PdfPage]:
+        # Pix2Text 以整篇文档为单位生成 Markdown 及图片，只能整体返回
+        yield PdfPage(number=1, total=1, text=self.read_pdf(filename, override))
+
+
+class PdfParserHybrid(PdfParser):
+    type: PdfParserType = PdfParserType.HYBRID
+
+    def iter_pages(self, filename: str, override: bool = True) -> Iterator[PdfPage]:
+        return iter_pages_hybrid(
+            filename, override=override, settings=self.settings, cache=self.cache
+        )
+
+    def extract_figures(
+        self,
+        filename: str,
+        output_dir: str | Path,
+        settings: Optional[FigureExtractSettings] = None,
+    ) -> Optional[Figures]:
+        return extract_figures_pymupdf(filename, output_dir, settings)
 
 
-def read_pdf_pymupdf(filename: str, override: bool = True) -> str:
+def _iter_cached(
+    cache: Optional[ParseCache],
+    filename: str,
+    type: PdfParserType,
+    override: bool,
+    parse: Callable[[], Iterator[PdfPage]],
+) -> Iterator[PdfPage]:
+    """优先从缓存中逐页读取，未命中时逐页解析并写入缓存
+
+    所有页都解析完成后才会保存到缓存，中途失败或提前结束迭代不会留下不完整的结果。
+    """
+    if cache is None:
+        yield from parse()
+        return
+    key = cache.key(filename, type.value, type.version)
+    if not override:
+        cached = cache.get_pages(key)
+        if cached is not None:
+            logger.debug(f"Parsed text of {filename} found in cache ({type.value})")
+            for i, text in enumerate(cached):
+                yield PdfPage(number=i + 1, total=len(cached), text=text)
+            return
+    writer = cache.writer(key, type.value)
+    for page in parse():
+        writer.write(page.text)
+        yield page
+    writer.commit()
+
+
+def read_pdf_pymupdf(
+    filename: str,
+    override: bool = True,
+    settings: Optional[PdfSettings] = None,
+    cache: Optional[ParseCache] = None,
+) -> str:
+    pages = iter_pages_pymupdf(filename, override, settings, cache)
+    return "".join(p.text for p in pages)
+
+
+def iter_pages_pymupdf(
+    filename: str,
+    override: bool = True,
+    settings: Optional[PdfSettings] = None,
+    cache: Optional[ParseCache] = None,
+) -> Iterator[PdfPage]:
     try:
         # 将PDF转换为Markdown
-        from pymupdf4llm import to_markdown  # type: ignore
-
-        po = Path(filename)
-        p_md = po.parent / (po.stem + ".md")
-        if p_md.exists() and not override:
-            logger.debug(f"File {p_md} exists, return its content")
-            return p_md.read_text()
-        logger.info(f"read_pdf_pymupdf(): Parsing PDF {filename}...")
-        text = to_markdown(filename)
-        p_md.write_text(text)
-        return text
+        import pymupdf4llm  # type: ignore # noqa: F401
     except ImportError as e:
         logger.error("Please install pymupdf4llm, e.g., pip install pymupdf4llm")
         raise e
 
+    def parse() -> Iterator[PdfPage]:
+        logger.info(f"read_pdf_pymupdf(): Parsing PDF {filename}...")
+        shards = _page_shards(filename, settings or PdfSettings())
+        total = sum(len(s) for s in shards)
+        if len(shards) <= 1:
+            texts = _to_markdown_serial(filename)
+        else:
+            texts = _to_markdown_parallel(
+                filename, shards, (settings or PdfSettings()).max_workers
+            )
+        for i, text in enumerate(texts):
+            yield PdfPage(number=i + 1, total=total, text=text)
+
+    return _iter_cached(cache, filename, PdfParserType.PYMUPDF, override, parse)
 
-def read_pdf_pypdf2(filename: str, override: bool = True) -> str:
-    try:
-        from PyPDF2 import PdfFileReader  # type: ignore
 
-        po = Path(filename)
-        p_md = po.parent / (po.stem + ".md")
-        if p_md.exists() and not override:
-            logger.debug(f"File {p_md} exists, return its content")
-            return p_md.read_text()
-        logger.info(f"read_pdf_pypdf2(): Parsing PDF {filename}...")
-        text = ""
-        pdf = PdfFileReader(filename)
-        for page in pdf.pages:
-            text += page.extract_text() + "\n"
-        p_md.write_text(text)
-        return text
+def _page_shards(filename: str, settings: PdfSettings) -> List[List[int]]:
+    """将页码切分为连续的若干段，每段由一个进程解析
+
+    段数为进程数的数倍，使各进程的负载更均衡；只有一段时不并行解析。
+    """
+    import pymupdf  # type: ignore
+
+    with pymupdf.open(filename) as doc:
+        page_count = doc.page_count
+        # 可重排版的文档（如 EPUB）会被重新排版为一页，无法按页切分
+        if doc.is_reflowable:
+            return [list(range(page_count))]
+    workers = min(
+        settings.max_workers, page_count // max(1, settings.min_pages_per_worker)
+    )
+    if workers <= 1:
+        return [list(range(page_count))]
+    count = min(page_count, workers * 4)
+    bounds = [page_count * i // count for i in range(count + 1)]
+    return [list(range(bounds[i], bounds[i + 1])) for i in range(count)]
+
+
+def _to_markdown_serial(filename: str) -> Iterator[str]:
+    """逐页转换为 Markdown
+
+    pymupdf4llm 根据全文的字号分布判断标题级别，因此先统计全文的字号，再逐页转换。
+    """
+    import pymupdf  # type: ignore
+    from pymupdf4llm import to_markdown  # type: ignore
+
+    with pymupdf.open(filename) as doc:
+        pages = list(range(doc.page_count))
+        headers = _HeaderLevels.from_font_sizes(_doc_font_sizes(doc, pages))
+        for pno in pages:
+            yield to_markdown(doc, pages=[pno], hdr_info=headers, show_progress=False)
+
+
+def _to_markdown_parallel(
+    filename: str, shards: List[List[int]], workers: int
+) -> Iterator[str]:
+    """在多个进程中按页解析，再按页码顺序逐页返回，结果与单进程解析一致
+
+    pymupdf4llm 根据全文的字号分布判断标题级别，因此分两轮：
+    先并行统计各段的字号，汇总后再将相同的标题级别传给各进程转换为 Markdown。
+    """
+    pool = _get_process_pool(workers)
+    logger.debug(
+        f"read_pdf_pymupdf(): {sum(len(s) for s in shards)} pages "
+        f"in {len(shards)} shards, {_PROCESS_POOL_WORKERS} workers"
+    )
+    font_sizes: Counter = Counter()
+    for counts in pool.map(_font_sizes, [filename] * len(shards), shards):
+        font_sizes.update(counts)
+    headers = _HeaderLevels.from_font_sizes(font_sizes)
+    parts = pool.map(
+        _shard_to_markdown, [filename] * len(shards), shards, [headers] * len(shards)
+    )
+    for texts in parts:
+        yield from texts
+
+
+def _get_process_pool(workers: int) -> ProcessPoolExecutor:
+    global _PROCESS_POOL, _PROCESS_POOL_WORKERS
+    with _PROCESS_POOL_LOCK:
+        if _PROCESS_POOL is None or _PROCESS_POOL_WORKERS != workers:
+            if _PROCESS_POOL is not None:
+                _PROCESS_POOL.shutdown(wait=False)
+            # 解析在线程中执行，fork 带有线程的进程并不安全，因此使用 spawn
+            _PROCESS_POOL_WORKERS = workers
+            _PROCESS_POOL = ProcessPoolExecutor(
+                max_workers=_PROCESS_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _PROCESS_POOL
+
+
+class _HeaderLevels:
+    """与 pymupdf4llm.IdentifyHeaders 相同的标题级别判断，但由汇总后的字号分布构造"""
+
+    def __init__(self, header_id: Dict[int, str], body_limit: float):
+        self.header_id = header_id
+        self.body_limit = body_limit
+
+    @classmethod
+    def from_font_sizes(
+        cls, font_sizes: Dict[int, int], body_limit: float = 12
+    ) -> "_HeaderLevels":
+        # 出现最多的字号视为正文，更大的字号依次为各级标题
+        ranked = sorted(font_sizes.items(), key=lambda i: i[1], reverse=True)
+        if ranked:
+            body_limit = min(body_limit, ranked[0][0])
+        sizes = sorted([f for f in font_sizes if f > body_limit], reverse=True)[:6]
+        header_id = {size: "#" * (i + 1) + " " for i, size in enumerate(sizes)}
+        return cls(header_id, body_limit)
+
+    def get_header_id(self, span: dict, page=None) -> str:
+        fontsize = round(span["size"])
+        if fontsize <= self.body_limit:
+            return ""
+        return self.header_id.get(fontsize, "") or "###### "
+
+
+def _font_sizes(filename: str, pages: List[int]) -> Dict[int, int]:
+    """统计若干页中各字号的字符数（与 IdentifyHeaders 的统计方式一致）"""
+    import pymupdf  # type: ignore
+
+    with pymupdf.open(filename) as doc:
+        return _doc_font_sizes(doc, pages)
+
+
+def _doc_font_sizes(doc, pages: List[int]) -> Dict[int, int]:
+    import pymupdf  # type: ignore
+    from pymupdf4llm.helpers.pymupdf_rag import is_white  # type: ignore
+
+    font_sizes: Dict[int, int] = {}
+    for pno in pages:
+        page = doc.load_page(pno)
+        blocks = page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"]
+        for span in [
+            s
+            for b in blocks
+            for line in b["lines"]
+            for s in line["spans"]
+            if not is_white(s["text"])
+        ]:
+            size = round(span["size"])
+            font_sizes[size] = font_sizes.get(size, 0) + len(span["text"].strip())
+    return font_sizes
+
+
+def _shard_to_markdown(
+    filename: str, pages: List[int], headers: _HeaderLevels
+) -> List[str]:
+    import pymupdf  # type: ignore
+    from pymupdf4llm import to_markdown  # type: ignore
+
+    with pymupdf.open(filename) as doc:
+        return [
+            to_markdown(doc, pages=[pno], hdr_info=headers, show_progress=False)
+            for pno in pages
+        ]
+
+
+def read_pdf_pypdf2(
+    filename: str, override: bool = True, cache: Optional[ParseCache] = None
+) -> str:
+    return "".join(p.text for p in iter_pages_pypdf2(filename, override, cache))
+
+
+def iter_pages_pypdf2(
+    filename: str, override: bool = True, cache: Optional[ParseCache] = None
+) -> Iterator[PdfPage]:
+    try:
+        from PyPDF2 import PdfReader  # type: ignore
     except ImportError as e:
         logger.error("Please install PyPDF2, e.g., pip install PyPDF2")
         raise e
 
+    def parse() -> Iterator[PdfPage]:
+        logger.info(f"read_pdf_pypdf2(): Parsing PDF {filename}...")
+        pdf = PdfReader(filename)
+        total = len(pdf.pages)
+        for i, page in enumerate(pdf.pages):
+            yield PdfPage(number=i + 1, total=total, text=page.extract_text() + "\n")
 
-def read_pdf_pix2text(filename: str, override: bool = True) -> str:
-    try:
-        from pix2text import Pix2Text  # type: ignore
-
-        # 整理文件路径
-        po = Path(filename)
-        p_md_dir = po.parent / po.stem
-        p_md = p_md_dir / "output.md"
-        # 检查是否已经存在
-        if p_md.exists() and not override:
-            logger.debug(f"File {p_md} exists, return its content")
-            return p_md.read_text()
-        # 解析PDF
-        logger.info(f"read_pdf_pix2text(): Parsing PDF {filename}...")
-        p2t = Pix2Text.from_config(device=check_set_gpu())
-        doc = p2t.recognize_pdf(
-            filename, table_as_image=True, text_contain_formula=False
-        )
-        doc.to_markdown(p_md_dir)
-        text = (p_md_dir / "output.md").read_text()
+    return _iter_cached(cache, filename, PdfParserType.PYPDF2, override, parse)
+
+
+def read_pdf_pix2text(
+    filename: str, override: bool = True, settings: Optional[PdfSettings] = None
+) -> str:
+    text = _pix2text_existing(filename, override)
+    if text is not None:
         return text
+    # 解析PDF
+    logger.info(f"read_pdf_pix2text(): Parsing PDF {filename}...")
+    settings = settings or PdfSettings()
+    if settings.max_pix2text_workers > 1:
+        future = _get_pix2text_pool(settings).submit(
+            _recognize_pdf_pix2text, filename, settings.pix2text_cpu_threads
+        )
+        text, pages, elapsed = future.result()
+    else:
+        text, pages, elapsed = _recognize_pdf_pix2text(
+            filename, settings.pix2text_cpu_threads
+        )
+    _record_pix2text(filename, pages, elapsed)
+    return text
+
+
+def _pix2text_output_dir(filename: str) -> Path:
+    po = Path(filename)
+    return po.parent / po.stem
+
+
+def _pix2text_existing(filename: str, override: bool) -> Optional[str]:
+    # 检查是否已经存在
+    p_md = _pix2text_output_dir(filename) / "output.md"
+    if p_md.exists() and not override:
+        logger.debug(f"File {p_md} exists, return its content")
+        return p_md.read_text()
+    return None
+
+
+def _recognize_pdf_pix2text(filename: str, threads: int) -> Tuple[str, int, float]:
+    """使用常驻的 Pix2Text 模型识别 PDF，返回 Markdown 文本、页数及识别耗时"""
+    p2t = _load_pix2text(threads)
+    p_md_dir = _pix2text_output_dir(filename)
+    start = time.perf_counter()
+    doc = p2t.recognize_pdf(filename, table_as_image=True, text_contain_formula=False)
+    doc.to_markdown(p_md_dir)
+    elapsed = time.perf_counter() - start
+    return (p_md_dir / "output.md").read_text(), len(doc.pages), elapsed
+
+
+def _load_pix2text(threads: int):
+    """加载 Pix2Text 模型，每个进程只加载一次"""
+    global _PIX2TEXT
+    with _PIX2TEXT_LOCK:
+        if _PIX2TEXT is None:
+            try:
+                _set_cpu_threads(threads)
+                from pix2text import Pix2Text  # type: ignore
+            except ImportError as e:
+                logger.error("Please install pix2text, e.g., pip install pix2text")
+                raise e
+            start = time.perf_counter()
+            _PIX2TEXT = Pix2Text.from_config(device=check_set_gpu())
+            logger.info(
+                f"Pix2Text model loaded in {time.perf_counter() - start:.1f}s "
+                f"({threads} CPU threads)"
+            )
+        return _PIX2TEXT
+
+
+def _set_cpu_threads(threads: int):
+    """限制推理库使用的 CPU 线程数，避免多个进程争抢 CPU 核
+
+    环境变量需要在加载 torch、onnxruntime 之前设置才会生效。
+    """
+    for name in ["OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"]:
+        os.environ[name] = str(threads)
+    try:
+        import torch  # type: ignore
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _get_pix2text_pool(settings: PdfSettings) -> ProcessPoolExecutor:
+    global _PIX2TEXT_POOL, _PIX2TEXT_POOL_WORKERS
+    workers = settings.max_pix2text_workers
+    with _PROCESS_POOL_LOCK:
+        if _PIX2TEXT_POOL is None or _PIX2TEXT_POOL_WORKERS != workers:
+            if _PIX2TEXT_POOL is not None:
+                _PIX2TEXT_POOL.shutdown(wait=False)
+            # 各进程启动时即加载模型，第一篇论文无需等待
+            _PIX2TEXT_POOL_WORKERS = workers
+            _PIX2TEXT_POOL = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_load_pix2text,
+                initargs=(settings.pix2text_cpu_threads,),
+            )
+        return _PIX2TEXT_POOL
+
+
+def _record_pix2text(filename: str, pages: int, elapsed: float):
+    with _PIX2TEXT_STATS_LOCK:
+        _PIX2TEXT_STATS.documents += 1
+        _PIX2TEXT_STATS.pages += pages
+        _PIX2TEXT_STATS.seconds += elapsed
+        total = _PIX2TEXT_STATS.model_copy()
+    rate = pages / elapsed if elapsed > 0 else 0.0
+    logger.info(
+        f"read_pdf_pix2text(): {Path(filename).name}: {pages} pages in "
+        f"{elapsed:.1f}s ({rate:.2f} pages/s); total: {total}"
+    )
+
+
+def iter_pages_hybrid(
+    filename: str,
+    override: bool = True,
+    settings: Optional[PdfSettings] = None,
+    cache: Optional[ParseCache] = None,
+) -> Iterator[PdfPage]:
+    """先用 PyMuPDF 提取文本层，只将扫描页、乱码页和公式较多的页面交给 Pix2Text 识别
+
+    大多数页面都有可用文本层的论文，解析速度与 PyMuPDF 相当。
+    """
+    try:
+        import pymupdf4llm  # type: ignore # noqa: F401
     except ImportError as e:
-        logger.error("Please install pix2text, e.g., pip install pix2text")
+        logger.error("Please install pymupdf4llm, e.g., pip install pymupdf4llm")
         raise e
 
+    settings = settings or PdfSettings()
+
+    def parse() -> Iterator[PdfPage]:
+        import pymupdf  # type: ignore
+        from pymupdf4llm import to_markdown  # type: ignore
+
+        logger.info(f"read_pdf_hybrid(): Parsing PDF {filename}...")
+        reasons: Counter = Counter()
+        ocr_pages, ocr_elapsed = 0, 0.0
+        with pymupdf.open(filename) as doc:
+            pages = list(range(doc.page_count))
+            headers = _HeaderLevels.from_font_sizes(_doc_font_sizes(doc, pages))
+            for pno in pages:
+                reason = _page_ocr_reason(doc.load_page(pno), settings)
+                if reason is None:
+                    text = to_markdown(
+                        doc, pages=[pno], hdr_info=headers, show_progress=False
+                    )
+                else:
+                    logger.debug(f"read_pdf_hybrid(): OCR page {pno + 1} ({reason})")
+                    reasons[reason] += 1
+                    text, elapsed = _ocr_page_pix2text(
+                        filename, pno, settings.pix2text_cpu_threads
+                    )
+                    ocr_pages += 1
+                    ocr_elapsed += elapsed
+                yield PdfPage(number=pno + 1, total=len(pages), text=text)
+        logger.info(
+            f"read_pdf_hybrid(): {ocr_pages}/{len(pages)} pages recognized by "
+            f"Pix2Text {dict(reasons)}"
+        )
+        if ocr_pages:
+            _record_pix2text(filename, ocr_pages, ocr_elapsed)
+
+    return _iter_cached(cache, filename, PdfParserType.HYBRID, override, parse)
+
+
+# 常见的数学字体：Computer Modern、AMS、STIX、Cambria Math 等
+_MATH_FONT = re.compile(
+    r"CMMI|CMSY|CMEX|CMBSY|MSAM|MSBM|EUFM|RSFS|STIX|Math|Symbol", re.IGNORECASE
+)
+
+
+def _is_math_char(c: str) -> bool:
+    # 数学运算符、杂项数学符号、数学字母数字符号
+    code = ord(c)
+    return (
+        0x2200 <= code <= 0x22FF
+        or 0x27C0 <= code <= 0x27EF
+        or 0x2980 <= code <= 0x2AFF
+        or 0x1D400 <= code <= 0x1D7FF
+    )
+
+
+def _is_garbled_char(c: str) -> bool:
+    # 字体缺少 Unicode 映射时 PyMuPDF 输出替换字符、私用区或控制字符
+    return c == "\ufffd" or unicodedata.category(c) in ("Co", "Cc", "Cs")
+
+
+def _page_ocr_reason(page, settings: PdfSettings) -> Optional[str]:
+    """判断页面是否需要 OCR，需要时返回原因，否则返回 None"""
+    import pymupdf  # type: ignore
+
+    blocks = page.get_text("dict", flags=pymupdf.TEXTFLAGS_TEXT)["blocks"]
+    chars, garbled, formula = 0, 0, 0
+    for span in [s for b in blocks for line in b["lines"] for s in line["spans"]]:
+        text = "".join(span["text"].split())
+        math_font = _MATH_FONT.search(span["font"]) is not None
+        chars += len(text)
+        garbled += sum(1 for c in text if _is_garbled_char(c))
+        formula += sum(1 for c in text if math_font or _is_math_char(c))
+    if chars < settings.ocr_min_chars:
+        # 文本很少的页面：有图片则为扫描页，否则为空白页，无需 OCR
+        return "image-only" if page.get_images() else None
+    if garbled / chars > settings.ocr_max_garbled_ratio:
+        return "garbled"
+    if formula / chars > settings.ocr_max_formula_ratio:
+        return "formula"
+    return None
+
+
+def _ocr_page_pix2text(filename: str, pno: int, threads: int) -> Tuple[str, float]:
+    """使用常驻的 Pix2Text 模型识别一页，返回 Markdown 文本及识别耗时
+
+    单页的结果先写入临时目录，不会覆盖 pix2text 解析器在 PDF 同名目录中的 output.md；
+    图片随后复制到 PDF 同名目录中，与 pix2text 解析器一致。
+    """
+    p2t = _load_pix2text(threads)
+    p_md_dir = _pix2text_output_dir(filename)
+    start = time.perf_counter()
+    doc = p2t.recognize_pdf(
+        filename, page_numbers=[pno], table_as_image=True, text_contain_formula=False
+    )
+    with tempfile.TemporaryDirectory(prefix="hongxiu-ocr-") as tmp_dir:
+        doc.to_markdown(tmp_dir)
+        text = (Path(tmp_dir) / "output.md").read_text()
+        shutil.copytree(
+            tmp_dir,
+            p_md_dir,
+            ignore=shutil.ignore_patterns("output.md"),
+            dirs_exist_ok=True,
+        )
+        # 图片链接中可能包含临时目录的路径
+        text = text.replace(tmp_dir, str(p_md_dir))
+    elapsed = time.perf_counter() - start
+    return text + "\n\n", elapsed
+
 
 def read_pdf(
     filename: str,
@@ -139,5 +830,8 @@ def read_pdf(
         return read_pdf_pypdf2(filename, override=override)
     elif pdf_parser == PdfParserType.PIX2TEXT:
         return read_pdf_pix2text(filename, override=override)
+    elif pdf_parser == PdfParserType.HYBRID:
+        pages = iter_pages_hybrid(filename, override=override)
+        return "".join(p.text for p in pages)
     else:
         raise ValueError(f"Unknown PDF parser: {pdf_parser}")
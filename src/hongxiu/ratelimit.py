@@ -0,0 +1,300 @@
+import asyncio
+import email.utils
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+from loguru import logger
+from pydantic import BaseModel
+
+from .config import Config, ConfigItem
+
+T = TypeVar("T")
+
+# 可重试的 HTTP 状态码：限流、服务端错误以及 Anthropic 的 529 过载
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+# 没有状态码的可重试异常，如超时、连接中断
+RETRYABLE_ERROR_NAMES = {"APITimeoutError", "APIConnectionError", "TimeoutError"}
+
+
+class RateLimitSettings(BaseModel):
+    """模型提供商的限流参数
+
+    Args:
+        requests_per_minute (float): 每分钟请求数上限，0 表示不限制
+        tokens_per_minute (float): 每分钟 token 数上限，0 表示不限制
+        max_concurrency (int): 并发请求数上限
+        min_concurrency (int): 并发请求数下限
+        target_latency (float): 目标响应时间（秒），超出时视为拥塞并降低并发
+        max_retries (int): 最大重试次数
+        backoff_base (float): 指数退避的初始等待时间（秒）
+        backoff_max (float): 指数退避的最长等待时间（秒）
+    """
+
+    requests_per_minute: float = 0
+    tokens_per_minute: float = 0
+    max_concurrency: int = 8
+    min_concurrency: int = 1
+    target_latency: float = 120
+    max_retries: int = 6
+    backoff_base: float = 1.0
+    backoff_max: float = 60.0
+
+
+class TokenBucket:
+    """令牌桶
+
+    允许预支令牌：令牌不足时余额变为负数，调用方按返回的时间等待即可，
+    这样先到的请求先被满足，不会被后来的请求插队。
+    """
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60
+        self.capacity = rate_per_minute
+        self.__tokens = self.capacity
+        self.__updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """预留令牌
+
+        Args:
+            amount (float): 需要的令牌数量
+
+        Returns:
+            float: 需要等待的时间（秒）
+        """
+        if self.rate <= 0:
+            return 0.0
+        with self.__lock:
+            self.__refill()
+            self.__tokens -= amount
+            if self.__tokens >= 0:
+                return 0.0
+            return -self.__tokens / self.rate
+
+    def adjust(self, amount: float):
+        """根据实际用量修正余额，amount 为正表示多用了令牌"""
+        if self.rate <= 0:
+            return
+        with self.__lock:
+            self.__refill()
+            self.__tokens -= amount
+
+    def __refill(self):
+        now = time.monotonic()
+        self.__tokens = min(
+            self.capacity, self.__tokens + (now - self.__updated) * self.rate
+        )
+        self.__updated = now
+
+
+class RateLimiter:
+    """单个模型提供商的调度器
+
+    - 令牌桶同时限制每分钟请求数和每分钟 token 数；
+    - 并发数按 AIMD 调整：请求正常完成时加性增加，遇到限流或响应过慢时乘性减少；
+    - 失败的请求按带抖动的指数退避重试，并遵守服务端返回的 Retry-After。
+
+    限流和并发状态在同一进程内按提供商共享，并且与事件循环无关，
+    因此多次 asyncio.run() 之间也能正确生效。
+    """
+
+    def __init__(self, provider: str, settings: RateLimitSettings):
+        self.provider = provider
+        self.settings = settings
+        self.__requests = TokenBucket(settings.requests_per_minute)
+        self.__tokens = TokenBucket(settings.tokens_per_minute)
+        self.__limit = float(settings.max_concurrency)
+        self.__in_flight = 0
+        self.__blocked_until = 0.0
+        self.__last_decrease = 0.0
+        self.__lock = threading.Lock()
+
+    @property
+    def concurrency(self) -> int:
+        """当前允许的并发请求数"""
+        return int(self.__limit)
+
+    @property
+    def in_flight(self) -> int:
+        """正在进行（含等待令牌）的请求数"""
+        with self.__lock:
+            return self.__in_flight
+
+    async def run(self, fn: Callable[[], Awaitable[T]], estimated_tokens: int = 0) -> T:
+        """在限流约束下执行请求，失败时自动重试
+
+        Args:
+            fn (Callable[[], Awaitable[T]]): 发起请求的协程工厂，每次重试都会重新调用
+            estimated_tokens (int): 预估的 token 数量，用于每分钟 token 数限制
+
+        Returns:
+            T: 请求结果
+        """
+        attempt = 0
+        while True:
+            await self.__acquire(estimated_tokens)
+            start = time.monotonic()
+            try:
+                result = await fn()
+            except asyncio.CancelledError:
+                # 被取消的请求（如对冲请求中落败的一方）不参与并发调整
+                self.__release(time.monotonic() - start, congested=None)
+                raise
+            except Exception as e:
+                throttled = is_rate_limit_error(e)
+                self.__release(time.monotonic() - start, congested=throttled)
+                if attempt >= self.settings.max_retries or not is_retryable_error(e):
+                    raise
+                attempt += 1
+                delay = self.__backoff(attempt, retry_after(e))
+                logger.warning(
+                    f"RateLimiter({self.provider}): {type(e).__name__}, retry "
+                    f"{attempt}/{self.settings.max_retries} in {delay:.1f}s "
+                    f"(concurrency: {self.concurrency})"
+                )
+                if throttled:
+                    # 限流时暂停该提供商的所有请求，而不仅仅是当前请求
+                    with self.__lock:
+                        self.__blocked_until = max(
+                            self.__blocked_until, time.monotonic() + delay
+                        )
+                await asyncio.sleep(delay)
+                continue
+            latency = time.monotonic() - start
+            self.__release(latency, congested=latency > self.settings.target_latency)
+            return result
+
+    def adjust_tokens(self, amount: int):
+        """请求完成后，用实际 token 用量与预估值的差修正每分钟 token 数的余额"""
+        self.__tokens.adjust(amount)
+
+    async def __acquire(self, estimated_tokens: int):
+        # 并发控制：并发上限会动态变化，因此采用轮询而不是信号量
+        while True:
+            with self.__lock:
+                wait = self.__blocked_until - time.monotonic()
+                if wait <= 0 and self.__in_flight < max(1, int(self.__limit)):
+                    self.__in_flight += 1
+                    break
+            await asyncio.sleep(max(0.05, min(wait, 1.0)))
+        wait = max(self.__requests.reserve(1), self.__tokens.reserve(estimated_tokens))
+        if wait > 0:
+            logger.debug(f"RateLimiter({self.provider}): waiting {wait:.1f}s")
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                # 等待期间被取消（如对冲请求中落败的一方）时归还并发名额和预留的令牌
+                self.__requests.adjust(-1)
+                self.__tokens.adjust(-estimated_tokens)
+                self.__release(0.0, congested=None)
+                raise
+
+    def __release(self, latency: float, congested: Optional[bool]):
+        with self.__lock:
+            self.__in_flight -= 1
+            now = time.monotonic()
+            if congested is None:
+                return
+            if congested:
+                # 同一拥塞事件往往会让多个并发请求同时失败，只减少一次
+                if now - self.__last_decrease > latency:
+                    self.__limit = max(self.settings.min_concurrency, self.__limit / 2)
+                    self.__last_decrease = now
+                    logger.info(
+                        f"RateLimiter({self.provider}): concurrency decreased "
+                        f"to {self.concurrency}"
+                    )
+            else:
+                self.__limit = min(
+                    self.settings.max_concurrency, self.__limit + 1 / self.__limit
+                )
+
+    def __backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.settings.backoff_base)
+        # full jitter
+        ceiling = min(
+            self.settings.backoff_max, self.settings.backoff_base * 2**attempt
+        )
+        return random.uniform(0, ceiling)
+
+
+def status_code(e: BaseException) -> Optional[int]:
+    code = getattr(e, "status_code", None)
+    if code is None:
+        code = getattr(getattr(e, "response", None), "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_rate_limit_error(e: BaseException) -> bool:
+    return status_code(e) == 429 or "RateLimit" in type(e).__name__
+
+
+def is_retryable_error(e: BaseException) -> bool:
+    if is_rate_limit_error(e):
+        return True
+    code = status_code(e)
+    if code is not None:
+        return code in RETRYABLE_STATUS_CODES
+    return type(e).__name__ in RETRYABLE_ERROR_NAMES or isinstance(
+        e, (TimeoutError, ConnectionError)
+    )
+
+
+def retry_after(e: BaseException) -> Optional[float]:
+    """从异常携带的响应头中读取 Retry-After（秒或 HTTP 日期）"""
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after-ms")
+    if value:
+        try:
+            return float(value) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        date = email.utils.parsedate_to_datetime(value)
+        return max(0.0, date.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(config: Config, provider: str) -> RateLimiter:
+    """获取提供商的调度器，同一进程内同一提供商共享一个调度器
+
+    参数先读取 rate_limits.default，再用 rate_limits.<provider> 覆盖。
+
+    Args:
+        config (Config): 应用配置
+        provider (str): 模型提供商
+
+    Returns:
+        RateLimiter: 调度器
+    """
+    with _LIMITERS_LOCK:
+        if provider not in _LIMITERS:
+            cfg = config.rate_limits or ConfigItem()
+            values: Dict[str, Any] = {}
+            for section in [cfg.default, cfg.get(provider)]:
+                if isinstance(section, ConfigItem):
+                    values.update(
+                        {k: v for k, v in section.to_dict().items() if v is not None}
+                    )
+            settings = RateLimitSettings(**values)
+            logger.debug(f"get_rate_limiter(): {provider}: {settings}")
+            _LIMITERS[provider] = RateLimiter(provider, settings)
+        return _LIMITERS[provider]
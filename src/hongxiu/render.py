@@ -1,14 +1,16 @@
 import io
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List
 
-from graphviz import Digraph  # type: ignore
 from loguru import logger
 from pydantic import BaseModel
 
 from .utils import color_gradient, color_luminance, package_path
 from .model import Mindmap, Summary
 
+if TYPE_CHECKING:
+    from graphviz import Digraph  # type: ignore
+
 
 def render_summary_to_markdown(
     data: str | dict | Summary, output: Path, override: bool = False
@@ -38,21 +40,14 @@ def render_summary_to_markdown(
 
     if data.summary:
         buf.write("## 总结\n\n")
-        for title in data.summary:
+        for title, value in data.summary.items():
             buf.write(f"### {title}\n\n")
-            for subtitle in data.summary[title]:
-                buf.write(f"#### {subtitle}\n\n")
-                if isinstance(data.summary[title][subtitle], list):
-                    for item in data.summary[title][subtitle]:
-                        buf.write(f"- {item}\n")
-                if isinstance(data.summary[title][subtitle], dict):
-                    for item in data.summary[title][subtitle]:
-                        buf.write(
-                            f"- **{item}:** {data.summary[title][subtitle][item]}\n"
-                        )
-                else:
-                    buf.write(data.summary[title][subtitle])
-                buf.write("\n\n")
+            if isinstance(value, dict):
+                for subtitle, subvalue in value.items():
+                    buf.write(f"#### {subtitle}\n\n")
+                    render_summary_to_markdown_value(buf, subvalue)
+            else:
+                render_summary_to_markdown_value(buf, value)
 
     result = buf.getvalue()
     if not override and output.exists():
@@ -64,6 +59,18 @@ def render_summary_to_markdown(
     return result
 
 
+def render_summary_to_markdown_value(buf: io.StringIO, value):
+    if isinstance(value, list):
+        for item in value:
+            buf.write(f"- {item}\n")
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            buf.write(f"- **{key}:** {item}\n")
+    else:
+        buf.write(str(value))
+    buf.write("\n\n")
+
+
 def clean_key(key: str) -> str:
     if key.startswith("(") and key.endswith(")"):
         key = key.rstrip(")").lstrip("(")
@@ -265,13 +272,27 @@ def render_mindmap_to_dot(
 
     logger.info(f"Rendering Mindmap via GraphViz ({p_pdf})")
 
+    dot = render_mindmap_to_digraph(data)
+
+    # 输出
+    logger.debug(f"render_mindmap_to_dot(): dot: {p_dot}, pdf: {p_pdf}")
+    dot.render(p_dot, format="pdf", outfile=p_pdf)
+    return dot.source
+
+
+def render_mindmap_to_digraph(data: str | dict | Mindmap) -> "Digraph":
+    """
+    由 Mindmap 对象生成 Graphviz 图（不调用 Graphviz 程序）
+    """
     # 所有 data 都转换为目标 Mindmap 对象
     if isinstance(data, str):
         data = Mindmap.model_validate_json(data)
     elif isinstance(data, dict):
         data = Mindmap(**data)
 
-    # 开始渲染 DOT
+    # 开始渲染 DOT，graphviz 只在渲染脑图时才导入
+    from graphviz import Digraph  # type: ignore
+
     dot = Digraph(comment=data.metadata.title)
     dot.attr(rankdir="LR", layout="dot")
     dot.node_attr.update(
@@ -388,11 +409,7 @@ def render_mindmap_to_dot(
     # root
     root = {data.metadata.title: data.mindmap}
     dfs(root, 0, 0)
-
-    # 输出
-    logger.debug(f"render_mindmap_to_dot(): dot: {p_dot}, pdf: {p_pdf}")
-    dot.render(p_dot, format="pdf", outfile=p_pdf)
-    return dot.source
+    return dot
 
 
 def render_mindmap_to_pdf(
@@ -0,0 +1,426 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+from pydantic import BaseModel, PrivateAttr
+
+from .config import Config, ConfigItem
+from .utils import percentile
+
+# usage 模块依赖 LangChain，这里只用于类型标注，避免拖慢 CLI 启动
+if TYPE_CHECKING:
+    from .usage import TokenUsage
+
+DEFAULT_TRACE_PATH = "~/.cache/hongxiu/trace.jsonl"
+
+
+class ModelPrice(BaseModel):
+    """模型价格（美元 / 百万 token）
+
+    Args:
+        input (float): 输入 token 的价格
+        output (float): 输出 token 的价格
+        cache_read (Optional[float]): 命中提示词缓存的输入 token 的价格，为 None 时按 input 计价
+        cache_write (Optional[float]): 写入提示词缓存的输入 token 的价格，为 None 时按 input 计价
+    """
+
+    input: float = 0.0
+    output: float = 0.0
+    cache_read: Optional[float] = None
+    cache_write: Optional[float] = None
+
+    def cost(self, usage: "TokenUsage") -> float:
+        """计算 token 用量对应的费用（美元）"""
+        cache_read = self.input if self.cache_read is None else self.cache_read
+        cache_write = self.input if self.cache_write is None else self.cache_write
+        uncached = (
+            usage.input_tokens - usage.cache_read_tokens - usage.cache_creation_tokens
+        )
+        return (
+            max(0, uncached) * self.input
+            + usage.cache_read_tokens * cache_read
+            + usage.cache_creation_tokens * cache_write
+            + usage.output_tokens * self.output
+        ) / 1_000_000
+
+
+class Span:
+    """一个计时区间，结束时写入追踪文件
+
+    Args:
+        name (str): 阶段名称，如 parse、llm、xelatex
+        attrs (Dict[str, Any]): 附加属性，如调用链名称、模型、token 用量
+    """
+
+    def __init__(self, name: str, attrs: Dict[str, Any]):
+        parent = _SPAN.get()
+        self.name = name
+        self.attrs = attrs
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = _TRACE_ID.get()
+        self.paper = _PAPER.get()
+        self.status = "ok"
+        self.error: Optional[str] = None
+        self.start = time.time()
+        self.duration = 0.0
+        self.__start = time.perf_counter()
+
+    def set(self, **attrs: Any):
+        """设置附加属性"""
+        self.attrs.update(attrs)
+
+    def set_usage(self, llm: str, usage: "TokenUsage"):
+        """记录 token 用量，并按配置的价格计算费用"""
+        self.set(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=usage.cache_read_tokens,
+            cache_creation_tokens=usage.cache_creation_tokens,
+        )
+        tracer = get_tracer()
+        cost = tracer.cost(llm, usage) if tracer is not None else None
+        if cost is not None:
+            self.set(cost=cost)
+
+    def end(self, error: Optional[BaseException] = None):
+        self.duration = time.perf_counter() - self.__start
+        if error is not None:
+            if isinstance(error, asyncio.CancelledError):
+                self.status = "cancelled"
+            else:
+                self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+
+    def to_record(self) -> Dict[str, Any]:
+        record: Dict[str, Any] = {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "paper": self.paper,
+            "start": self.start,
+            "duration": self.duration,
+            "status": self.status,
+        }
+        if self.error is not None:
+            record["error"] = self.error
+        if self.attrs:
+            record["attrs"] = self.attrs
+        return record
+
+
+class Tracer(BaseModel):
+    """将 span 以 JSONL 格式追加到追踪文件
+
+    每次运行有各自的 run_id，hongxiu report 默认只汇总最近一次运行。
+
+    Args:
+        path (Path): 追踪文件路径
+        run_id (str): 本次运行的 ID
+        pricing (Dict[str, ModelPrice]): provider:model_name -> 价格
+    """
+
+    path: Path
+    run_id: str = ""
+    pricing: Dict[str, ModelPrice] = {}
+    __lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **data):
+        super().__init__(**data)
+        if not self.run_id:
+            self.run_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, span: Span):
+        record = {"run_id": self.run_id, **span.to_record()}
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self.__lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def price(self, llm: str) -> Optional[ModelPrice]:
+        """查找模型价格，也可以按前缀匹配（如 openai:gpt-4o-mini-2024-07-18）"""
+        if llm in self.pricing:
+            return self.pricing[llm]
+        prefixes = [k for k in self.pricing if llm.startswith(k)]
+        if prefixes:
+            return self.pricing[max(prefixes, key=len)]
+        return None
+
+    def cost(self, llm: str, usage: "TokenUsage") -> Optional[float]:
+        """计算费用（美元），未配置价格时返回 None"""
+        price = self.price(llm)
+        if price is None:
+            return None
+        return price.cost(usage)
+
+
+_TRACER: Optional[Tracer] = None
+_TRACE_ID: ContextVar[Optional[str]] = ContextVar("hongxiu_trace_id", default=None)
+_PAPER: ContextVar[Optional[str]] = ContextVar("hongxiu_paper", default=None)
+_SPAN: ContextVar[Optional[Span]] = ContextVar("hongxiu_span", default=None)
+# 同一进程内同一篇论文（如先下载、再总结）共享一个 trace_id
+_TRACE_IDS: Dict[str, str] = {}
+_TRACE_IDS_LOCK = threading.Lock()
+
+
+def create_tracer(config: Config) -> Optional[Tracer]:
+    """根据配置创建追踪器
+
+    Args:
+        config (Config): 应用配置，读取其中的 tracing 和 pricing 部分
+
+    Returns:
+        Optional[Tracer]: 追踪器，未启用追踪时返回 None
+    """
+    cfg = config.tracing or ConfigItem()
+    if not cfg.get("enabled", True):
+        return None
+    pricing = (config.pricing or ConfigItem()).to_dict()
+    return Tracer(
+        path=Path(cfg.get("path", DEFAULT_TRACE_PATH)).expanduser(),
+        pricing={k: ModelPrice(**v) for k, v in pricing.items() if v},
+    )
+
+
+def set_tracer(tracer: Optional[Tracer]):
+    """设置当前进程使用的追踪器，为 None 时不再写入追踪文件"""
+    global _TRACER
+    _TRACER = tracer
+
+
+def get_tracer() -> Optional[Tracer]:
+    return _TRACER
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """记录一个阶段的耗时
+
+    span 之间的父子关系以及所属论文通过 contextvars 传递，
+    因此在 asyncio 任务及 asyncio.to_thread() 中同样有效。
+
+    Args:
+        name (str): 阶段名称
+        **attrs: 附加属性
+
+    Yields:
+        Span: 当前 span，可以通过 set() 添加属性
+    """
+    s = Span(name, attrs)
+    token = _SPAN.set(s)
+    error: Optional[BaseException] = None
+    try:
+        yield s
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _SPAN.reset(token)
+        s.end(error)
+        tracer = _TRACER
+        if tracer is not None:
+            try:
+                tracer.write(s)
+            except OSError as e:
+                logger.warning(f"Failed to write trace: {e}")
+
+
+@contextmanager
+def trace_paper(paper: str, **attrs: Any) -> Iterator[str]:
+    """将其中的所有 span 关联到同一篇论文（共享 trace_id）
+
+    已经处于同一篇论文的追踪中时（如 aprocess() 中调用 asummarize()），不会重复创建。
+
+    Args:
+        paper (str): 论文标识，通常为 PDF 文件名（不含扩展名）
+        **attrs: paper span 的附加属性
+
+    Yields:
+        str: trace_id
+    """
+    with _TRACE_IDS_LOCK:
+        trace_id = _TRACE_IDS.setdefault(paper, uuid.uuid4().hex[:16])
+    if _TRACE_ID.get() == trace_id:
+        yield trace_id
+        return
+    trace_token = _TRACE_ID.set(trace_id)
+    paper_token = _PAPER.set(paper)
+    try:
+        with span("paper", **attrs):
+            yield trace_id
+    finally:
+        _PAPER.reset(paper_token)
+        _TRACE_ID.reset(trace_token)
+
+
+class _Stats(BaseModel):
+    count: int = 0
+    errors: int = 0
+    total: float = 0.0
+    p50: float = 0.0
+    p95: float = 0.0
+
+
+class _ModelStats(BaseModel):
+    calls: int = 0
+    cache_hits: int = 0
+    input_tokens: int = 0
+    cache_read_tokens: int = 0
+    output_tokens: int = 0
+    cost: float = 0.0
+
+
+class TraceReport(BaseModel):
+    """一次或多次运行的追踪汇总
+
+    Args:
+        runs (List[str]): 汇总的运行 ID
+        papers (int): 论文数量
+        wall_time (float): 首个 span 开始至最后一个 span 结束的时间（秒）
+        stages (Dict[str, _Stats]): 各阶段的耗时，llm 按调用链区分
+        models (Dict[str, _ModelStats]): 各模型的 token 用量和费用
+        slowest (List[Dict[str, Any]]): 耗时最长的论文
+    """
+
+    runs: List[str]
+    papers: int
+    wall_time: float
+    stages: Dict[str, _Stats]
+    models: Dict[str, _ModelStats]
+    slowest: List[Dict[str, Any]]
+
+    @property
+    def cost(self) -> float:
+        return sum(m.cost for m in self.models.values())
+
+    def __str__(self) -> str:
+        lines = [
+            f"runs:       {', '.join(self.runs)}",
+            f"papers:     {self.papers}",
+            f"wall time:  {self.wall_time:.1f} s",
+            f"cost:       ${self.cost:.4f}",
+            "",
+            f"{'stage':<28}{'count':>7}{'errors':>8}{'total (s)':>11}"
+            f"{'p50 (s)':>10}{'p95 (s)':>10}",
+        ]
+        for name, s in sorted(self.stages.items(), key=lambda i: -i[1].total):
+            lines.append(
+                f"{name:<28}{s.count:>7}{s.errors:>8}{s.total:>11.1f}"
+                f"{s.p50:>10.2f}{s.p95:>10.2f}"
+            )
+        lines += [
+            "",
+            f"{'model':<40}{'calls':>7}{'cached':>8}{'input':>11}"
+            f"{'cache read':>12}{'output':>10}{'cost ($)':>11}",
+        ]
+        for name, m in sorted(self.models.items(), key=lambda i: -i[1].cost):
+            lines.append(
+                f"{name:<40}{m.calls:>7}{m.cache_hits:>8}{m.input_tokens:>11}"
+                f"{m.cache_read_tokens:>12}{m.output_tokens:>10}{m.cost:>11.4f}"
+            )
+        if self.slowest:
+            lines += ["", f"{'slowest papers':<40}{'time (s)':>10}{'cost ($)':>11}"]
+            for p in self.slowest:
+                lines.append(
+                    f"{p['paper']:<40}{p['duration']:>10.1f}{p['cost']:>11.4f}"
+                )
+        return "\n".join(lines)
+
+
+def load_trace(path: Path) -> List[Dict[str, Any]]:
+    """读取追踪文件，忽略无法解析的行"""
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def summarize_trace(
+    records: List[Dict[str, Any]], run: Optional[str] = None, top: int = 5
+) -> TraceReport:
+    """汇总追踪记录，找出耗时和费用的主要来源
+
+    Args:
+        records (List[Dict[str, Any]]): load_trace() 读取的记录
+        run (Optional[str]): 运行 ID，为 all 时汇总全部运行，为 None 时只汇总最近一次运行
+        top (int): 列出耗时最长的论文数量
+
+    Returns:
+        TraceReport: 汇总结果
+    """
+    if run is None and records:
+        run = records[-1].get("run_id")
+    if run != "all":
+        records = [r for r in records if r.get("run_id") == run]
+
+    durations: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    models: Dict[str, _ModelStats] = defaultdict(_ModelStats)
+    papers: Dict[str, Dict[str, Any]] = defaultdict(
+        lambda: {"duration": 0.0, "cost": 0.0}
+    )
+    for r in records:
+        attrs = r.get("attrs") or {}
+        name = r["name"]
+        paper = r.get("paper") or "-"
+        if name == "paper":
+            # 下载与处理为不同的 paper span，耗时累加
+            papers[paper]["duration"] += r["duration"]
+            continue
+        if name == "llm":
+            name = f"llm[{attrs.get('chain', '?')}]"
+            m = models[attrs.get("llm", "?")]
+            if attrs.get("cache_hit"):
+                m.cache_hits += 1
+            else:
+                m.calls += 1
+            m.input_tokens += attrs.get("input_tokens", 0)
+            m.cache_read_tokens += attrs.get("cache_read_tokens", 0)
+            m.output_tokens += attrs.get("output_tokens", 0)
+            m.cost += attrs.get("cost", 0.0)
+            papers[paper]["cost"] += attrs.get("cost", 0.0)
+        durations[name].append(r["duration"])
+        if r.get("status") == "error":
+            errors[name] += 1
+
+    stages = {}
+    for name, samples in durations.items():
+        samples.sort()
+        stages[name] = _Stats(
+            count=len(samples),
+            errors=errors[name],
+            total=sum(samples),
+            p50=percentile(samples, 0.5),
+            p95=percentile(samples, 0.95),
+        )
+    slowest = sorted(
+        ({"paper": k, **v} for k, v in papers.items() if k != "-"),
+        key=lambda p: -p["duration"],
+    )[:top]
+    wall_time = 0.0
+    if records:
+        wall_time = max(r["start"] + r["duration"] for r in records) - min(
+            r["start"] for r in records
+        )
+    return TraceReport(
+        runs=sorted({r["run_id"] for r in records if r.get("run_id")}),
+        papers=len([k for k in papers if k != "-"]),
+        wall_time=wall_time,
+        stages=stages,
+        models=dict(models),
+        slowest=slowest,
+    )
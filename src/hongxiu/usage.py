@@ -0,0 +1,76 @@
+import threading
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from pydantic import BaseModel
+
+
+class TokenUsage(BaseModel):
+    """LLM 调用的 token 用量
+
+    Args:
+        calls (int): 调用次数
+        input_tokens (int): 输入 token 数量（包含命中缓存的部分）
+        output_tokens (int): 输出 token 数量
+        cache_read_tokens (int): 命中提示词缓存的输入 token 数量
+        cache_creation_tokens (int): 写入提示词缓存的输入 token 数量
+    """
+
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_creation_tokens: int = 0
+
+    def add(self, other: "TokenUsage"):
+        self.calls += other.calls
+        self.input_tokens += other.input_tokens
+        self.output_tokens += other.output_tokens
+        self.cache_read_tokens += other.cache_read_tokens
+        self.cache_creation_tokens += other.cache_creation_tokens
+
+    def add_usage_metadata(self, usage_metadata: dict):
+        """累加 LangChain 消息中的 usage_metadata"""
+        details = usage_metadata.get("input_token_details") or {}
+        self.calls += 1
+        self.input_tokens += usage_metadata.get("input_tokens") or 0
+        self.output_tokens += usage_metadata.get("output_tokens") or 0
+        self.cache_read_tokens += details.get("cache_read") or 0
+        self.cache_creation_tokens += details.get("cache_creation") or 0
+
+    @property
+    def cache_ratio(self) -> float:
+        """命中提示词缓存的输入 token 比例"""
+        if self.input_tokens == 0:
+            return 0.0
+        return self.cache_read_tokens / self.input_tokens
+
+    def __str__(self) -> str:
+        return (
+            f"calls: {self.calls}, input: {self.input_tokens} "
+            f"(cached: {self.cache_read_tokens}, {self.cache_ratio:.0%}; "
+            f"cache write: {self.cache_creation_tokens}), "
+            f"output: {self.output_tokens}"
+        )
+
+
+class UsageCallbackHandler(BaseCallbackHandler):
+    """从 LangChain 回调中收集 token 用量"""
+
+    # 直接在事件循环中执行，避免被调度到线程池
+    run_inline = True
+
+    def __init__(self):
+        super().__init__()
+        self.usage = TokenUsage()
+        self.__lock = threading.Lock()
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage_metadata = getattr(message, "usage_metadata", None)
+                if usage_metadata:
+                    with self.__lock:
+                        self.usage.add_usage_metadata(usage_metadata)
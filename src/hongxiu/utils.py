@@ -1,8 +1,7 @@
-import os
 from pathlib import Path
 import re
 import struct
-from typing import Optional, Tuple
+from typing import Optional, Sequence, Tuple
 
 from loguru import logger
 
@@ -10,6 +9,8 @@ from loguru import logger
 def download_paper(paper: str, output_dir: str) -> Path:
     import requests
 
+    from .tracing import span, trace_paper
+
     re_arxiv = re.compile(r"\d{4}\.\d{4:5}")  # arXiv ID
 
     if paper.startswith("http"):  # both http or https are included
@@ -39,28 +40,40 @@ def download_paper(paper: str, output_dir: str) -> Path:
         return paper_path
     # 下载
     logger.info(f"Downloading paper from {url} to {paper_path}")
-    r = requests.get(url)
+    with trace_paper(paper_path.stem, op="download"), span("download", url=url) as s:
+        r = requests.get(url)
+        s.set(status_code=r.status_code, size=len(r.content))
     with open(paper_path, "wb") as f:
         f.write(r.content)
     return paper_path
 
 
-def latex_to_pdf(latex_file: Path, output: Path, override: bool = False):
-    if not override and output.exists():
-        logger.warning(f"{output} is exist, please use --override to override it.")
-        return
+# 中日韩字符大致一个字对应一个 token，其他字符大致四个字符对应一个 token
+_RE_CJK = re.compile(
+    r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]"
+)
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的 token 数量，无需依赖具体模型的分词器"""
+    cjk = len(_RE_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def percentile(samples: Sequence[float], p: float) -> float:
+    """已排序样本的分位数（最近邻法），没有样本时返回 0
+
+    Args:
+        samples (Sequence[float]): 从小到大排序的样本
+        p (float): 分位数，取值 0~1
 
-    logger.info(f"Converting {latex_file} to {output}")
-    # 由于xelatex直接生成到当前目录，所以需要切换到输出目录
-    current_dir = os.getcwd()
-    os.chdir(output.parent)
-    latex_file = latex_file.relative_to(output.parent)
-    os.system(f"xelatex --shell-escape -interaction=batchmode {latex_file}")
-    # 清理临时文件
-    os.system(
-        f"rm -f {latex_file.stem}.aux {latex_file.stem}.log {latex_file.stem}.out"
-    )
-    os.chdir(current_dir)
+    Returns:
+        float: 分位数对应的样本值
+    """
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, round(p * len(samples)) - 1))
+    return samples[index]
 
 
 def hex_to_rgba(hex_color: str) -> Tuple[int, int, int, int]:
@@ -97,13 +110,13 @@ def check_set_gpu(override=None):
         if override is None:
             if torch.cuda.is_available():
                 device = torch.device("cuda")
-                print(f"Using GPU: {torch.cuda.get_device_name(0)}")
+                logger.info(f"Using GPU: {torch.cuda.get_device_name(0)}")
             elif torch.backends.mps.is_available():
                 device = torch.device("mps")
-                print(f"Using MPS: {torch.backends.mps.is_available()}")
+                logger.info(f"Using MPS: {torch.backends.mps.is_available()}")
             else:
                 device = torch.device("cpu")
-                print(f"Using CPU: {torch.device('cpu')}")
+                logger.info(f"Using CPU: {torch.device('cpu')}")
         else:
             device = torch.device(override)
         return device
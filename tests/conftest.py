@@ -0,0 +1,84 @@
+import os
+import stat
+from pathlib import Path
+
+import pytest
+
+from hongxiu.bench import generate_corpus
+from hongxiu.cmd import load_config
+from hongxiu.fake_llm import FakeLLMServer
+
+# 模拟的 xelatex：记录调用参数，-ini 时生成格式文件，否则生成 PDF；
+# 格式文件中含有 STALE 时报告格式错误，.tex 中含有 FAIL 时编译失败
+_XELATEX = """#!/bin/sh
+[ "$1" = "--version" ] && { echo "XeTeX 3.14 fake"; exit 0; }
+echo "$@" >> "$FAKE_TOOLS_LOG"
+d=.; fmt=; ini=
+for a in "$@"; do
+  case $a in
+    -output-directory=*) d=${a#*=};;
+    -jobname=*) j=${a#*=};;
+    -fmt=*) fmt=${a#*=};;
+    -ini) ini=1;;
+    *.tex) f=$a;;
+  esac
+done
+if [ -n "$ini" ]; then echo fmt > "$j.fmt"; echo ini > "$j.log"; exit 0; fi
+s=$(basename "$f" .tex)
+if [ -n "$fmt" ] && grep -q STALE "$fmt.fmt"; then
+  echo "Fatal format file error" > "$d/$s.log"; exit 1
+fi
+grep -q FAIL "$f" && exit 1
+echo "%PDF $s" > "$d/$s.pdf"
+"""
+
+# 模拟的 dot：生成 -o 指定的文件
+_DOT = """#!/bin/sh
+out=; next=
+for a in "$@"; do
+  [ -n "$next" ] && { out=$a; next=; }
+  case $a in -o) next=1;; -o*) out=${a#-o};; esac
+done
+echo "%PDF dot" > "$out"
+"""
+
+
+@pytest.fixture
+def fake_tools(tmp_path, monkeypatch) -> Path:
+    """将模拟的 xelatex、dot 加入 PATH，返回记录 xelatex 调用参数的日志文件"""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    for name, script in [("xelatex", _XELATEX), ("dot", _DOT)]:
+        p = bin_dir / name
+        p.write_text(script)
+        p.chmod(p.stat().st_mode | stat.S_IEXEC)
+    log = tmp_path / "tools.log"
+    log.touch()
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    monkeypatch.setenv("FAKE_TOOLS_LOG", str(log))
+    return log
+
+
+@pytest.fixture
+def fake_llm():
+    with FakeLLMServer() as server:
+        yield server
+
+
+@pytest.fixture
+def config(fake_llm):
+    """使用模拟 LLM 服务的配置，不读写用户目录中的缓存和追踪文件"""
+    cfg = load_config(None)
+    cfg.fake_llm = {"base_url": fake_llm.base_url}
+    cfg.llm = "fake:gpt-fake"
+    cfg.cache = {"enabled": False}
+    cfg.parse_cache = {"enabled": False}
+    cfg.tracing = {"enabled": False}
+    cfg.latex = {"format": False}
+    return cfg
+
+
+@pytest.fixture
+def papers(tmp_path):
+    """合成的论文 PDF"""
+    return generate_corpus(tmp_path / "papers", 2, 3, seed=1)
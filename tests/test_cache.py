@@ -0,0 +1,80 @@
+import sqlite3
+import time
+from contextlib import closing
+
+from hongxiu.cache import LLMCache, ParseCache
+
+
+def test_maybe_prune_runs_at_most_once_per_interval(tmp_path):
+    cache = LLMCache(path=tmp_path / "llm.sqlite", max_age_days=1)
+    cache.set("a", chain="summary", model="openai:gpt", value="x")
+    cache.set("b", chain="summary", model="openai:gpt", value="y")
+    assert cache.prune() == 0
+
+    # 两个条目都已过期
+    stale = time.time() - 2 * 86400
+    with closing(sqlite3.connect(cache.path)) as conn, conn:
+        conn.execute("UPDATE responses SET accessed_at = ?", (stale,))
+
+    # 刚刚淘汰过，未到间隔时不会再次淘汰
+    assert cache.maybe_prune() == 0
+    assert cache.stats()["entries"] == 2
+
+    with closing(sqlite3.connect(cache.path)) as conn, conn:
+        conn.execute("UPDATE meta SET value = ?", (stale,))
+    assert cache.maybe_prune() == 2
+    assert cache.stats()["entries"] == 0
+
+
+def test_parse_cache_prunes_least_recently_used_by_size(tmp_path):
+    cache = ParseCache(path=tmp_path / "parsed.sqlite")
+    cache.set("old", parser="pymupdf", value="a" * 1000)
+    cache.set("new", parser="pymupdf", value="b" * 1000)
+    with closing(sqlite3.connect(cache.path)) as conn, conn:
+        conn.execute("UPDATE parsed SET accessed_at = 0 WHERE key = 'old'")
+        # 上限只能容纳其中一个条目（压缩后的大小）
+        (size,) = conn.execute("SELECT MAX(size) FROM parsed").fetchone()
+
+    assert cache.prune(max_size_mb=size / 1024 / 1024, max_age_days=0) == 1
+    assert cache.get("old") is None
+    assert cache.get("new") == "b" * 1000
+
+
+def test_llm_cache_counts_hits(tmp_path):
+    cache = LLMCache(path=tmp_path / "llm.sqlite")
+    assert cache.get("a") is None
+    cache.set("a", chain="summary", model="openai:gpt", value='{"text": "x"}')
+    assert cache.get("a") == '{"text": "x"}'
+    assert cache.get("a") == '{"text": "x"}'
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"]) == (1, 2)
+    assert stats["groups"][0]["chain"] == "summary"
+
+
+def test_parse_cache_key_depends_on_content_parser_and_version(tmp_path):
+    a, b, c = tmp_path / "a.pdf", tmp_path / "b.pdf", tmp_path / "c.pdf"
+    a.write_bytes(b"%PDF same")
+    b.write_bytes(b"%PDF same")
+    c.write_bytes(b"%PDF other")
+    key = ParseCache.key(a, "pymupdf", "0.0.17")
+    # 只与文件内容有关，与文件名无关
+    assert ParseCache.key(b, "pymupdf", "0.0.17") == key
+    assert ParseCache.key(c, "pymupdf", "0.0.17") != key
+    assert ParseCache.key(a, "pypdf2", "0.0.17") != key
+    assert ParseCache.key(a, "pymupdf", "0.0.18") != key
+
+
+def test_parse_cache_returns_pages_written(tmp_path):
+    cache = ParseCache(path=tmp_path / "parsed.sqlite")
+    pages = ["# 第一页\n\n公式 $x^2$\n", "", "Page three " * 1000]
+    writer = cache.writer("k", parser="pymupdf")
+    for page in pages:
+        writer.write(page)
+    assert cache.get("k") is None
+    writer.commit()
+
+    cached = cache.get_pages("k")
+    assert cached is not None and len(cached) == 3
+    assert list(cached) == pages
+    assert cache.get("k") == "".join(pages)
+    assert cache.stats()["hits"] == 2
@@ -0,0 +1,162 @@
+import asyncio
+
+import pytest
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.runnables import RunnableGenerator, RunnableLambda
+from pydantic import BaseModel
+
+from hongxiu.cache import LLMCache
+from hongxiu.chain import Chain, ChainBackend
+from hongxiu.hedge import HedgeSettings, LatencyHistogram, get_latency_histogram
+from hongxiu.ratelimit import RateLimiter, RateLimitSettings
+
+
+class Answer(BaseModel):
+    text: str
+
+
+def backend(model: str, delay: float, error: Exception | None = None, **kwargs):
+    async def respond(prompt_value) -> Answer:
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return Answer(text=model)
+
+    return ChainBackend(
+        provider="fake",
+        model=model,
+        prompt=ChatPromptTemplate.from_messages([("user", "{text}")]),
+        runnable=RunnableLambda(respond),
+        latency=LatencyHistogram(),
+        **kwargs,
+    )
+
+
+def test_latency_excludes_rate_limiter_queueing():
+    limiter = RateLimiter("fake", RateLimitSettings(max_concurrency=1))
+    chain = Chain(
+        name="test", backends=[backend("a", 0.2, limiter=limiter)], output=Answer
+    )
+
+    async def main():
+        await asyncio.gather(chain.ainvoke({"text": "1"}), chain.ainvoke({"text": "2"}))
+
+    asyncio.run(main())
+    latency = chain.backends[0].latency
+    assert latency is not None and len(latency) == 2
+    # 第二个请求排队等待了约 0.2 秒，不计入响应时间
+    assert latency.percentile(1.0) < 0.35
+
+
+def test_failed_requests_are_not_recorded():
+    chain = Chain(
+        name="test", backends=[backend("a", 0.0, ValueError("bad"))], output=Answer
+    )
+    with pytest.raises(ValueError):
+        asyncio.run(chain.ainvoke({"text": "1"}))
+    assert len(chain.backends[0].latency or []) == 0
+
+
+def test_hedged_request_records_cancelled_loser_as_lower_bound():
+    chain = Chain(
+        name="test",
+        backends=[backend("slow", 5.0), backend("fast", 0.0)],
+        output=Answer,
+        hedge=HedgeSettings(default_delay=0.1),
+    )
+    result = asyncio.run(chain.ainvoke({"text": "1"}))
+    assert result.text == "fast"
+    slow, fast = (b.latency for b in chain.backends)
+    assert slow is not None and len(slow) == 1
+    assert 0.1 <= slow.percentile(0.5) < 5.0
+    assert fast is not None and len(fast) == 1
+
+
+def test_latency_histograms_are_per_chain():
+    summary = get_latency_histogram("fake:a", "summary")
+    assert get_latency_histogram("fake:a", "summary") is summary
+    assert get_latency_histogram("fake:a", "mindmap") is not summary
+
+
+def test_hedge_delay_uses_percentile_after_min_samples():
+    settings = HedgeSettings(percentile=0.5, min_samples=3, default_delay=60.0)
+    latency = LatencyHistogram(window=3)
+    latency.record(1.0)
+    assert latency.hedge_delay(settings) == 60.0
+    for value in [2.0, 3.0, 4.0]:
+        latency.record(value)
+    # 只保留最近的 3 个样本
+    assert len(latency) == 3
+    assert latency.hedge_delay(settings) == 3.0
+
+
+def test_cached_response_skips_the_model(tmp_path):
+    calls = []
+
+    async def respond(prompt_value) -> Answer:
+        calls.append(prompt_value.to_string())
+        return Answer(text=f"answer {len(calls)}")
+
+    def make_chain(model: str) -> Chain:
+        return Chain(
+            name="test",
+            backends=[
+                ChainBackend(
+                    provider="fake",
+                    model=model,
+                    prompt=ChatPromptTemplate.from_messages([("user", "{text}")]),
+                    runnable=RunnableLambda(respond),
+                )
+            ],
+            output=Answer,
+            cache=LLMCache(path=tmp_path / "llm.sqlite"),
+        )
+
+    chain = make_chain("a")
+    assert asyncio.run(chain.ainvoke({"text": "1"})).text == "answer 1"
+    assert asyncio.run(chain.ainvoke({"text": "1"})).text == "answer 1"
+    assert len(calls) == 1
+    # 提示词或模型不同时缓存键不同
+    assert asyncio.run(chain.ainvoke({"text": "2"})).text == "answer 2"
+    assert asyncio.run(make_chain("b").ainvoke({"text": "1"})).text == "answer 3"
+
+
+def test_streaming_reports_partial_outputs():
+    async def stream(prompt_value):
+        for text in ["", "a", "ab", "abc"]:
+            await asyncio.sleep(0)
+            yield {"text": text} if text else {}
+
+    async def respond(prompt_value) -> Answer:
+        raise AssertionError("streaming chains should not call the runnable")
+
+    chain = Chain(
+        name="test",
+        backends=[
+            ChainBackend(
+                provider="fake",
+                model="a",
+                prompt=ChatPromptTemplate.from_messages([("user", "{text}")]),
+                runnable=RunnableLambda(respond),
+                stream_runnable=RunnableGenerator(stream),
+            )
+        ],
+        output=Answer,
+    )
+    partials = []
+    result = asyncio.run(chain.ainvoke({"text": "1"}, partials.append))
+    # 空的中间结果不回调，完整输出经过校验
+    assert partials == [{"text": "a"}, {"text": "ab"}, {"text": "abc"}]
+    assert result == Answer(text="abc")
+
+
+def test_failed_backend_falls_back_to_next():
+    chain = Chain(
+        name="test",
+        backends=[backend("a", 0.0, ValueError("bad")), backend("b", 0.0)],
+        output=Answer,
+        hedge=HedgeSettings(default_delay=60.0),
+    )
+    # 无需等待对冲延迟，失败后立即切换到下一个模型
+    result = asyncio.run(asyncio.wait_for(chain.ainvoke({"text": "1"}), 5))
+    assert result.text == "b"
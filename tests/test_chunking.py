@@ -0,0 +1,35 @@
+from hongxiu.chunking import chunk_text, load_map_reduce_settings
+from hongxiu.cmd import load_config
+from hongxiu.utils import estimate_tokens
+
+
+def test_chunk_text_keeps_sections_together():
+    sections = [f"# Section {i}\n\n" + "word " * 100 + "\n\n" for i in range(6)]
+    chunks = chunk_text("".join(sections), max_tokens=300)
+    assert len(chunks) == 3
+    assert chunks[0] == sections[0] + sections[1]
+    assert "".join(chunks) == "".join(sections)
+
+
+def test_chunk_text_splits_long_sections_within_limit():
+    paragraphs = ["sentence " * 200 for _ in range(3)]
+    text = "# Long\n\n" + "\n\n".join(paragraphs) + "x" * 5000
+    chunks = chunk_text(text, max_tokens=600)
+    assert len(chunks) > 3
+    assert all(estimate_tokens(chunk) <= 600 for chunk in chunks)
+
+
+def test_map_reduce_settings_use_model_overrides():
+    config = load_config(None)
+    config.map_reduce = {
+        "mode": "auto",
+        "default": {"context_tokens": 1000, "chunk_tokens": 200},
+        "models": {"fake:big": {"context_tokens": 5000}},
+    }
+    default = load_map_reduce_settings(config, "fake:small")
+    assert (default.context_tokens, default.chunk_tokens) == (1000, 200)
+    assert default.should_split(1001) and not default.should_split(1000)
+    big = load_map_reduce_settings(config, "fake:big")
+    assert (big.context_tokens, big.chunk_tokens) == (5000, 200)
+    config.map_reduce = {"mode": "never"}
+    assert not load_map_reduce_settings(config, "fake:big").should_split(10**9)
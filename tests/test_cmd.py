@@ -0,0 +1,19 @@
+import subprocess
+import sys
+
+# 只在调用模型、解析 PDF 或渲染时才需要的重量级依赖
+HEAVY_MODULES = ["langchain_core", "langchain_openai", "fitz", "pix2text", "graphviz"]
+
+
+def test_cli_startup_does_not_import_heavy_modules():
+    code = (
+        "import sys\n"
+        "from hongxiu.cmd import load_config\n"
+        "from hongxiu.engine import Engine\n"
+        "Engine(load_config(None))\n"
+        f"print(sorted(m for m in {HEAVY_MODULES!r} if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
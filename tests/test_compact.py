@@ -0,0 +1,102 @@
+from hongxiu.compact import (
+    CompactionSettings,
+    compact_text,
+    strip_acknowledgements,
+    strip_headers_footers,
+    strip_references,
+)
+
+SETTINGS = CompactionSettings()
+
+
+def test_headers_footers_removed_at_page_edges():
+    body = ["Intro.", "Method details.", "Results follow.", "Discussion.", "Next."]
+    pages = [
+        "\n\n".join(
+            [
+                "Journal of Tests, Vol. 1",
+                f"Opening of section {'ABCD'[n - 1]}.",
+                *body,
+                str(n),
+            ]
+        )
+        for n in range(1, 5)
+    ]
+    text = "\n-----\n\n".join(pages)
+    result = strip_headers_footers(text, SETTINGS)
+    assert "Journal of Tests" not in result
+    assert "-----" not in result
+    for n in range(1, 5):
+        assert f"Opening of section {'ABCD'[n - 1]}." in result
+    assert result.count("Results follow.") == 4
+
+
+def test_repeated_body_lines_kept_without_page_breaks():
+    # PyPDF2 等解析器的输出没有分页符，无法区分页眉页脚与正文
+    text = "\n".join(
+        ["Journal of Tests, Vol. 1", "Let x be given.", "where", "Proof.", "x > 0."] * 4
+    )
+    assert strip_headers_footers(text, SETTINGS) == text
+
+
+def test_references_removed_until_appendix():
+    text = "\n".join(
+        [
+            "## 5 Conclusion",
+            "We conclude.",
+            "## References",
+            "[1] A. Author. A paper. 2020.",
+            "## A Proofs",
+            "Proof of lemma.",
+        ]
+    )
+    result = strip_references(text)
+    assert "A paper" not in result
+    assert "We conclude." in result
+    assert "Proof of lemma." in result
+
+
+def test_acknowledgements_removed_until_next_section():
+    text = "\n".join(
+        [
+            "## Acknowledgments",
+            "We thank everyone.",
+            # 致谢中的加粗行不是新的章节
+            "**Funding**",
+            "Grant 42.",
+            "## 6 Limitations",
+            "Only tested on toy data.",
+        ]
+    )
+    result = strip_acknowledgements(text)
+    assert "We thank everyone." not in result
+    assert "Grant 42." not in result
+    assert "Only tested on toy data." in result
+
+
+def test_compact_text_reports_removed_tokens_per_rule():
+    text = "\n".join(
+        [
+            "# Title",
+            "Body with ![figure](images/fig1.png) inline.",
+            "",
+            "",
+            "",
+            "- 3 -",
+            "Page 4 of 10",
+            "More body.",
+            "## References",
+            "[1] " + "cited work " * 20,
+        ]
+    )
+    result, report = compact_text(text, SETTINGS)
+    assert result == "# Title\nBody with  inline.\n\nMore body.\n"
+    assert report.removed["references"] > 0
+    assert report.removed["page_numbers"] > 0
+    assert report.removed["image_links"] > 0
+    assert report.tokens_after < report.tokens_before
+    assert report.ratio > 0
+
+    disabled, report = compact_text(text, CompactionSettings(enabled=False))
+    assert disabled == text
+    assert report.tokens_after == report.tokens_before
@@ -0,0 +1,72 @@
+import pytest
+
+from hongxiu.document import Document
+
+PAGES = [
+    "Title\n\nAbstract text.\n\n# 1 Introduction\n\nIntro 数学.\n\n",
+    "## 1.1 Background\n\nPrior work.\n\n![](images/fig1.png)\n\n"
+    "**Figure 1:** Overview of the\nmethod.\n\n",
+    "# 2 Experiments\n\nTable 2: Results\n\n<img src='images/t2.png'>\n\n"
+    "# References\n\n[1] A paper.\n",
+]
+
+
+@pytest.fixture
+def document() -> Document:
+    return Document.from_pages(PAGES)
+
+
+def test_document_indexes_pages_sections_captions_and_images(document):
+    assert document.page_count == 3
+    assert [document.page_text(i + 1) for i in range(3)] == PAGES
+    assert document.page_of(0) == 1
+    assert document.page_of(len(PAGES[0])) == 2
+
+    sections = document.sections()
+    assert [(s.title, s.level, s.page) for s in sections] == [
+        ("1 Introduction", 1, 1),
+        ("1.1 Background", 2, 2),
+        ("2 Experiments", 1, 3),
+        ("References", 1, 3),
+    ]
+    # 章节包含其子章节，到下一个同级标题之前结束
+    intro = document.text[sections[0].start : sections[0].end]
+    assert "Prior work." in intro and "2 Experiments" not in intro
+
+    captions = document.captions()
+    assert [(c.kind, c.number, c.page) for c in captions] == [
+        ("FIGURE", 1, 2),
+        ("TABLE", 2, 3),
+    ]
+    assert captions[0].text == "**Figure 1:** Overview of the method."
+    assert [(i.link, i.page) for i in document.images()] == [
+        ("images/fig1.png", 2),
+        ("images/t2.png", 3),
+    ]
+
+
+def test_select_keeps_front_matter_and_chosen_sections(document):
+    text = document.select(lambda s: s.title != "References")
+    assert text.startswith("Title\n\nAbstract text.")
+    assert "Prior work." in text and "Results" in text
+    assert "[1] A paper." not in text
+    # 子章节随上级章节保留，不会重复
+    assert text.count("Prior work.") == 1
+    assert document.select(lambda s: False) == "Title\n\nAbstract text.\n\n"
+
+
+def test_document_round_trips_through_bytes(document):
+    restored = Document.from_bytes(document.to_bytes())
+    assert restored.text == document.text
+    assert restored.page_count == 3
+    assert restored.sections() == document.sections()
+    assert restored.captions() == document.captions()
+    assert restored.images() == document.images()
+    assert repr(restored) == repr(document)
+
+
+def test_image_context_merges_nearby_windows(document):
+    context = document.image_context(before=20, after=20)
+    assert "images/fig1.png" in context and "images/t2.png" in context
+    assert "Abstract text." not in context
+    assert Document("no images").image_context() == ""
@@ -0,0 +1,128 @@
+import asyncio
+
+from hongxiu.engine import Engine, bounded_as_completed
+from hongxiu.pdf_parser import PdfParser
+
+
+def test_bounded_as_completed_limits_concurrency_and_isolates_failures():
+    running = 0
+    peak = 0
+
+    def task(key: int):
+        async def run():
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(0.05)
+            running -= 1
+            if key == 2:
+                raise ValueError("bad paper")
+            return key * 10
+
+        return run
+
+    async def main():
+        tasks = {k: task(k) for k in range(5)}
+        return dict([item async for item in bounded_as_completed(tasks, jobs=2)])
+
+    results = asyncio.run(main())
+    assert peak == 2
+    # 失败的任务结果为 None，不影响其他任务
+    assert results == {0: 0, 1: 10, 2: None, 3: 30, 4: 40}
+
+
+def test_summarize_many_writes_each_summary(config, fake_tools, papers, tmp_path):
+    engine = Engine(config)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    async def main():
+        return [
+            item async for item in engine.summarize_many(papers, output_dir, jobs=2)
+        ]
+
+    results = dict(asyncio.run(main()))
+    assert set(results) == set(papers)
+    assert all(summary is not None for summary in results.values())
+    for paper in papers:
+        assert (output_dir / f"{paper.stem}.summary.pdf").exists()
+
+
+def test_process_parses_once_and_builds_both_outputs(
+    config, fake_tools, papers, tmp_path
+):
+    engine = Engine(config)
+    stages = []
+    engine.on_stage(lambda name, seconds: stages.append(name))
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    summary, mindmap = asyncio.run(engine.aprocess(papers[0], output_dir))
+    assert summary is not None and mindmap is not None
+    assert stages.count("parse") == 1
+    assert {"summary", "mindmap", "xelatex", "graphviz"} <= set(stages)
+    stem = papers[0].stem
+    assert (output_dir / f"{stem}.summary.pdf").exists()
+    assert (output_dir / f"{stem}.mindmap.pdf").exists()
+
+
+def test_long_paper_is_summarized_in_chunks(config, fake_tools, papers, tmp_path):
+    config.map_reduce = {"mode": "always", "default": {"chunk_tokens": 400}}
+    engine = Engine(config)
+    summary = asyncio.run(engine.asummarize(papers[0], tmp_path / "paper.summary.pdf"))
+    assert summary is not None
+    usage = engine.usage()
+    assert usage["summary_chunk"].calls > 1
+    assert usage["summary_reduce"].calls >= 1
+    assert "summary" not in usage
+
+
+def test_streamed_summary_replaces_partial_output(config, fake_tools, papers, tmp_path):
+    config.stream = True
+    config.stream_interval = 0
+    engine = Engine(config)
+    output = tmp_path / "paper.summary.pdf"
+    summary = asyncio.run(engine.asummarize(papers[0], output))
+    assert summary is not None
+    assert (tmp_path / "paper.summary.md").exists()
+    assert not (tmp_path / "paper.summary.partial.json").exists()
+
+
+def test_figures_are_extracted_while_summarizing(
+    config, fake_tools, papers, tmp_path, monkeypatch
+):
+    engine = Engine(config)
+    stages = []
+    engine.on_stage(lambda name, seconds: stages.append(name))
+    stages_at_extraction = []
+
+    async def extract_figures(self, filename, output_dir, settings=None):
+        stages_at_extraction.extend(stages)
+        return None
+
+    monkeypatch.setattr(PdfParser, "aextract_figures", extract_figures)
+    asyncio.run(engine.asummarize(papers[0], tmp_path / "paper.summary.pdf"))
+    # 抽取图片时总结尚未完成
+    assert "parse" in stages_at_extraction
+    assert "summary" not in stages_at_extraction
+    assert "summary" in stages
+
+
+def test_unchanged_paper_is_not_rebuilt(config, fake_tools, papers, tmp_path):
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+
+    def process() -> list:
+        engine = Engine(config)
+        stages = []
+        engine.on_stage(lambda name, seconds: stages.append(name))
+        asyncio.run(engine.aprocess(papers[0], output_dir))
+        return stages
+
+    assert "summary" in process()
+    # 输入未变化时无需解析、调用模型或重新渲染
+    assert process() == []
+    # 压缩规则变化后，模型的输入随之变化
+    config.compaction = {"references": False}
+    stages = process()
+    assert {"parse", "summary", "mindmap"} <= set(stages)
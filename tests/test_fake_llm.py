@@ -0,0 +1,71 @@
+import json
+import random
+import urllib.error
+import urllib.request
+
+import pytest
+from pydantic import BaseModel
+
+from hongxiu.fake_llm import FakeLLMServer, FakeLLMSettings, generate_from_schema
+from hongxiu.model import Summary
+
+
+class Answer(BaseModel):
+    text: str
+    score: float
+    tags: list[str]
+
+
+def post(server: FakeLLMServer, request: dict) -> dict:
+    req = urllib.request.Request(
+        f"{server.base_url}/chat/completions",
+        data=json.dumps(request).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+    )
+    with urllib.request.urlopen(req, timeout=10) as response:
+        return json.loads(response.read())
+
+
+def test_fake_server_returns_tool_call_matching_schema():
+    request = {
+        "model": "gpt-fake",
+        "messages": [{"role": "user", "content": "hello"}],
+        "tools": [
+            {
+                "type": "function",
+                "function": {
+                    "name": "Answer",
+                    "parameters": Answer.model_json_schema(),
+                },
+            }
+        ],
+    }
+    with FakeLLMServer(FakeLLMSettings(latency_median=0.01, seed=1)) as server:
+        calls = [
+            post(server, request)["choices"][0]["message"]["tool_calls"][0]["function"]
+            for _ in range(2)
+        ]
+        assert server.stats["requests"] == 2
+
+    # 相同的提示词返回相同的结果
+    call = calls[0]
+    assert calls[1] == call
+    assert call["name"] == "Answer"
+    Answer.model_validate_json(call["arguments"])
+
+
+def test_fake_server_injects_rate_limit_errors():
+    settings = FakeLLMSettings(latency_median=0.01, rate_limit_rate=1.0, retry_after=2)
+    with FakeLLMServer(settings) as server:
+        with pytest.raises(urllib.error.HTTPError) as e:
+            post(server, {"messages": [{"role": "user", "content": "hello"}]})
+        assert server.stats["429"] == 1
+    assert e.value.code == 429
+    assert e.value.headers["Retry-After"] == "2.0"
+
+
+def test_generated_summary_is_valid():
+    value = generate_from_schema(
+        Summary.model_json_schema(), random.Random(1), name="Summary"
+    )
+    Summary.model_validate(value)
@@ -0,0 +1,45 @@
+import pymupdf
+
+from hongxiu.figure_extract import extract_figures_pymupdf
+
+
+def test_figures_are_extracted_above_their_captions(tmp_path):
+    paper = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page()
+    # 位图及其说明
+    pixmap = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 60, 40), False)
+    pixmap.clear_with(120)
+    page.insert_image(pymupdf.Rect(150, 72, 450, 272), pixmap=pixmap)
+    page.insert_text((150, 290), "Figure 1: A raster image.", fontsize=10)
+    # 正文中提到图片的句子不是图片说明
+    page.insert_text((72, 340), "Figure 3 shows the results in detail.", fontsize=10)
+    # 矢量绘图及其说明，坐标轴标签位于绘图区域之外
+    page.draw_rect(pymupdf.Rect(150, 400, 450, 600), color=(0, 0, 0), fill=(0, 0, 1))
+    page.draw_line((160, 590), (440, 410), color=(1, 0, 0))
+    page.insert_text((140, 612), "0", fontsize=8)
+    page.insert_text((150, 640), "Figure 2. A vector plot.", fontsize=10)
+    doc.save(paper)
+    doc.close()
+
+    figures = extract_figures_pymupdf(paper, tmp_path / "figures").figures
+    assert [f.desc for f in figures] == [
+        "Figure 1: A raster image.",
+        "Figure 2. A vector plot.",
+    ]
+    assert all(f.type == "FIGURE" for f in figures)
+    for figure in figures:
+        assert (tmp_path / "figures" / figure.link).stat().st_size > 0
+    assert figures[1].link == "figure-2.png"
+
+
+def test_small_drawings_are_not_figures(tmp_path):
+    paper = tmp_path / "paper.pdf"
+    doc = pymupdf.open()
+    page = doc.new_page()
+    page.draw_rect(pymupdf.Rect(150, 100, 160, 110), color=(0, 0, 0), fill=(0, 0, 0))
+    page.insert_text((150, 125), "Figure 1: An icon.", fontsize=10)
+    doc.save(paper)
+    doc.close()
+
+    assert extract_figures_pymupdf(paper, tmp_path / "figures").figures == []
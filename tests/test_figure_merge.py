@@ -0,0 +1,20 @@
+from hongxiu.figure_merge import image_links, merge_figures
+from hongxiu.model import Figure, Metadata, Summary
+
+
+def test_merge_figures_is_idempotent():
+    summary = Summary(
+        metadata=Metadata(title="Paper"),
+        summary={
+            "方法": ["we propose an attention model", "training details"],
+            "实验": {"结果": "benchmark accuracy and latency"},
+        },
+    )
+    figures = [
+        Figure(link="a.png", type="FIGURE", desc="attention model"),
+        Figure(link="b.png", type="FIGURE", desc="benchmark accuracy"),
+    ]
+    merged = merge_figures(summary, figures)
+    assert sorted(image_links(merged.summary)) == ["a.png", "b.png"]
+    # 再次合并同样的图片不会重复插入
+    assert merge_figures(merged, figures).summary == merged.summary
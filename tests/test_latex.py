@@ -0,0 +1,85 @@
+import asyncio
+import os
+
+import pytest
+
+from hongxiu import latex
+from hongxiu.latex import LatexSettings, alatex_to_pdf, latex_to_pdf
+
+
+def test_concurrent_builds_in_one_directory_are_isolated(fake_tools, tmp_path):
+    cwd = os.getcwd()
+    sources = []
+    for name in ["a", "b", "c", "d"]:
+        p = tmp_path / f"{name}.tex"
+        p.write_text(f"\\documentclass{{article}}\n% {name}\n")
+        sources.append(p)
+    settings = LatexSettings(jobs=4, format=False)
+
+    async def main():
+        await asyncio.gather(
+            *[
+                alatex_to_pdf(p, p.with_suffix(".pdf"), settings=settings)
+                for p in sources
+            ]
+        )
+
+    asyncio.run(main())
+    assert os.getcwd() == cwd
+    for p in sources:
+        assert p.with_suffix(".pdf").read_text().strip() == f"%PDF {p.stem}"
+    # 中间文件随临时目录删除，不会留在 .tex 所在目录
+    assert (
+        sorted(p.suffix for p in tmp_path.glob("[a-d].*"))
+        == [".pdf"] * 4 + [".tex"] * 4
+    )
+
+
+def test_failed_build_keeps_log_and_previous_output(fake_tools, tmp_path):
+    p_tex = tmp_path / "broken.tex"
+    p_tex.write_text("\\documentclass{article}\n% FAIL\n")
+    p_pdf = tmp_path / "broken.pdf"
+    p_pdf.write_text("old")
+    with pytest.raises(RuntimeError, match="failed"):
+        latex_to_pdf(p_tex, p_pdf, override=True, settings=LatexSettings(format=False))
+    assert p_tex.with_suffix(".log").exists()
+    assert p_pdf.read_text() == "old"
+
+
+@pytest.fixture
+def poster(fake_tools, tmp_path, monkeypatch):
+    # 每个测试使用独立的格式文件状态
+    monkeypatch.setattr(latex, "_FORMAT_FAILED", set())
+    monkeypatch.setattr(latex, "_ENGINE_VERSIONS", {})
+    p_tex = tmp_path / "poster.tex"
+    p_tex.write_text(
+        "\\documentclass{article}\n\\usepackage{tikz}\n"
+        f"{latex._END_OF_DUMP}\n\\begin{{document}}\nposter\n\\end{{document}}\n"
+    )
+    return p_tex
+
+
+def test_preamble_format_is_built_once_and_reused(poster, fake_tools, tmp_path):
+    settings = LatexSettings(format_dir=str(tmp_path / "format"))
+    for _ in range(2):
+        latex_to_pdf(poster, tmp_path / "poster.pdf", override=True, settings=settings)
+    calls = fake_tools.read_text().splitlines()
+    assert len([c for c in calls if "-ini" in c]) == 1
+    assert len([c for c in calls if "-fmt=" in c]) == 2
+    assert len(list((tmp_path / "format").glob("*.fmt"))) == 1
+
+
+def test_stale_format_falls_back_to_plain_compile(poster, fake_tools, tmp_path):
+    settings = LatexSettings(format_dir=str(tmp_path / "format"))
+    latex_to_pdf(poster, tmp_path / "poster.pdf", override=True, settings=settings)
+    (p_format,) = (tmp_path / "format").glob("*.fmt")
+    p_format.write_text("STALE")
+
+    (tmp_path / "poster.pdf").unlink()
+    latex_to_pdf(poster, tmp_path / "poster.pdf", override=True, settings=settings)
+    assert (tmp_path / "poster.pdf").exists()
+    # 失效的格式文件被删除，本进程内不再使用
+    assert not p_format.exists()
+    latex_to_pdf(poster, tmp_path / "poster.pdf", override=True, settings=settings)
+    last = fake_tools.read_text().splitlines()[-1]
+    assert "-fmt=" not in last and "-ini" not in last
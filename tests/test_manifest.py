@@ -0,0 +1,50 @@
+from hongxiu.manifest import Manifest, get_manifest
+
+
+def test_artifact_is_fresh_until_inputs_or_content_change(tmp_path):
+    manifest = Manifest(tmp_path / "paper.manifest.json")
+    artifact = tmp_path / "paper.summary.tex"
+    inputs = {"summary": "1", "template": "a"}
+    assert not manifest.is_fresh(artifact, inputs)
+
+    artifact.write_text("poster")
+    # 没有记录的产物需要重新生成
+    assert not manifest.is_fresh(artifact, inputs)
+    manifest.record(artifact, inputs)
+    assert manifest.is_fresh(artifact, inputs)
+    assert not manifest.is_fresh(artifact, {**inputs, "template": "b"})
+    assert not manifest.is_fresh(artifact, {"summary": "1"})
+
+    # 清单保存在文件中，重新加载后仍然有效
+    reloaded = Manifest(tmp_path / "paper.manifest.json")
+    assert reloaded.is_fresh(artifact, inputs)
+    artifact.write_text("edited by hand")
+    assert not reloaded.is_fresh(artifact, inputs)
+
+
+def test_adopted_artifacts_are_kept_and_recorded(tmp_path):
+    manifest = Manifest(tmp_path / "paper.manifest.json")
+    artifact = tmp_path / "paper.summary.json"
+    artifact.write_text("{}")
+    inputs = {"text": "1"}
+    # 升级前生成的结果直接沿用
+    assert manifest.is_fresh(artifact, inputs, adopt=True)
+    assert manifest.is_fresh(artifact, inputs)
+
+    # 手动修改的内容得以保留
+    artifact.write_text('{"edited": true}')
+    assert manifest.is_fresh(artifact, inputs, adopt=True)
+    assert manifest.is_fresh(artifact, inputs)
+    # 输入变化时仍需重新生成
+    assert not manifest.is_fresh(artifact, {"text": "2"}, adopt=True)
+
+
+def test_disabled_manifest_only_checks_existence(tmp_path):
+    manifest = get_manifest(tmp_path / "paper.manifest.json", enabled=False)
+    artifact = tmp_path / "paper.summary.pdf"
+    assert not manifest.is_fresh(artifact, {"x": "1"})
+    artifact.write_text("pdf")
+    assert manifest.is_fresh(artifact, {"x": "1"})
+    manifest.record(artifact, {"x": "1"})
+    assert not (tmp_path / "paper.manifest.json").exists()
+    assert get_manifest(tmp_path / "paper.manifest.json", enabled=False) is manifest
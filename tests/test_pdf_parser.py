@@ -0,0 +1,122 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from hongxiu import pdf_parser
+from hongxiu.bench import generate_corpus
+from hongxiu.cache import ParseCache
+from hongxiu.pdf_parser import (
+    PdfParser,
+    PdfSettings,
+    _HeaderLevels,
+    _is_garbled_char,
+    _is_math_char,
+    _page_shards,
+    iter_pages_hybrid,
+    read_pdf_pymupdf,
+)
+
+
+def test_pix2text_workers_recognize_documents_concurrently(monkeypatch, tmp_path):
+    # 两篇论文都开始识别后才能通过屏障，串行识别时屏障会超时
+    barrier = threading.Barrier(2, timeout=5)
+    pool = ThreadPoolExecutor(max_workers=2)
+
+    def recognize(filename: str, threads: int):
+        barrier.wait()
+        return f"# {filename}\n", 1, 0.1
+
+    monkeypatch.setattr(pdf_parser, "_get_pix2text_pool", lambda settings: pool)
+    monkeypatch.setattr(pdf_parser, "_recognize_pdf_pix2text", recognize)
+    parser = PdfParser.create("pix2text", PdfSettings(pix2text_workers=2))
+    papers = [str(tmp_path / "a.pdf"), str(tmp_path / "b.pdf")]
+
+    async def main():
+        return await asyncio.gather(*[parser.aread_document(p) for p in papers])
+
+    try:
+        documents = asyncio.run(main())
+    finally:
+        pool.shutdown()
+    assert [d.text for d in documents] == [f"# {p}\n" for p in papers]
+
+
+def test_header_levels_rank_sizes_above_body_text():
+    headers = _HeaderLevels.from_font_sizes({10: 5000, 8: 300, 16: 200, 20: 50})
+    assert headers.get_header_id({"size": 20.2}) == "# "
+    assert headers.get_header_id({"size": 16}) == "## "
+    assert headers.get_header_id({"size": 10}) == ""
+    assert headers.get_header_id({"size": 8}) == ""
+    # 统计时未出现的较大字号视为最低级别的标题
+    assert headers.get_header_id({"size": 14}) == "###### "
+
+
+def test_parallel_parse_matches_serial_parse(tmp_path):
+    (paper,) = generate_corpus(tmp_path, 1, 6, seed=1)
+    settings = PdfSettings(workers=2, min_pages_per_worker=2)
+    shards = _page_shards(str(paper), settings)
+    assert len(shards) > 1
+    assert sum(shards, []) == list(range(6))
+
+    serial = read_pdf_pymupdf(str(paper), settings=PdfSettings(workers=1))
+    parallel = read_pdf_pymupdf(str(paper), settings=settings)
+    assert parallel == serial
+    assert "# 1 " in serial or "## 1 " in serial
+
+
+def test_iter_pages_caches_only_completed_parses(tmp_path):
+    (paper,) = generate_corpus(tmp_path, 1, 3, seed=1)
+    cache = ParseCache(path=tmp_path / "parsed.sqlite")
+    parser = PdfParser.create("pymupdf", PdfSettings(workers=1), cache=cache)
+
+    # 提前结束迭代时不写入缓存
+    pages = parser.iter_pages(str(paper), override=False)
+    first = next(pages)
+    pages.close()
+    assert (first.number, first.total) == (1, 3)
+    assert cache.stats()["entries"] == 0
+
+    parsed = list(parser.iter_pages(str(paper), override=False))
+    assert [p.number for p in parsed] == [1, 2, 3]
+    assert cache.stats()["entries"] == 1
+    # 命中缓存时同样逐页返回
+    cached = list(parser.iter_pages(str(paper), override=False))
+    assert cached == parsed
+    assert cache.stats()["hits"] == 1
+
+
+def test_ocr_character_classes():
+    assert _is_math_char("∑") and _is_math_char("≤") and _is_math_char("𝑥")
+    assert not _is_math_char("x") and not _is_math_char("模")
+    assert _is_garbled_char("\ufffd") and _is_garbled_char("\ue000")
+    assert not _is_garbled_char("a") and not _is_garbled_char("é")
+
+
+def test_hybrid_parser_only_ocrs_pages_without_text(tmp_path, monkeypatch):
+    import pymupdf
+
+    paper = tmp_path / "scanned.pdf"
+    doc = pymupdf.open()
+    text = doc.new_page()
+    text.insert_textbox(pymupdf.Rect(72, 72, 540, 740), "Plain text layer. " * 40)
+    scanned = doc.new_page()
+    pixmap = pymupdf.Pixmap(pymupdf.csRGB, pymupdf.IRect(0, 0, 40, 40), False)
+    pixmap.clear_with(200)
+    scanned.insert_image(pymupdf.Rect(72, 72, 540, 740), pixmap=pixmap)
+    doc.new_page()  # 空白页
+    doc.save(paper)
+    doc.close()
+
+    ocr_pages = []
+
+    def ocr(filename: str, pno: int, threads: int):
+        ocr_pages.append(pno)
+        return f"OCR page {pno + 1}\n", 0.1
+
+    monkeypatch.setattr(pdf_parser, "_ocr_page_pix2text", ocr)
+    monkeypatch.setattr(pdf_parser, "_record_pix2text", lambda *args: None)
+    pages = list(iter_pages_hybrid(str(paper)))
+    assert ocr_pages == [1]
+    assert "Plain text layer." in pages[0].text
+    assert pages[1].text == "OCR page 2\n"
+    assert [p.number for p in pages] == [1, 2, 3]
@@ -0,0 +1,29 @@
+import asyncio
+
+import pytest
+
+from hongxiu.ratelimit import RateLimiter, RateLimitSettings
+
+
+def test_cancel_while_waiting_for_bucket_releases_slot():
+    # 每分钟 3 个请求、并发 1（moonshot 的默认值），第 4 个请求需要等待令牌
+    limiter = RateLimiter(
+        "test", RateLimitSettings(requests_per_minute=3, max_concurrency=1)
+    )
+
+    async def request() -> str:
+        return "ok"
+
+    async def main():
+        for _ in range(3):
+            assert await limiter.run(request) == "ok"
+        task = asyncio.create_task(limiter.run(request))
+        await asyncio.sleep(0.1)
+        # 此时请求已占用并发名额，正在等待令牌
+        assert limiter.in_flight == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert limiter.in_flight == 0
+
+    asyncio.run(main())
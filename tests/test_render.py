@@ -0,0 +1,18 @@
+from hongxiu.model import Metadata, Mindmap
+from hongxiu.render import render_mindmap_to_digraph
+
+
+def test_mindmap_digraph_is_built_without_graphviz(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mindmap = Mindmap(
+        metadata=Metadata(title="Paper"),
+        mindmap={
+            "Method": {"Encoder": ["uses attention"], "Decoder": ["autoregressive"]},
+            "Results": ["SOTA"],
+        },
+    )
+    source = render_mindmap_to_digraph(mindmap).source
+    for label in ["Paper", "Method", "Encoder", "uses attention", "Results", "SOTA"]:
+        assert f"label={label} " in source or f'label="{label}" ' in source
+    # 只构建图，不调用 Graphviz 程序生成文件
+    assert list(tmp_path.iterdir()) == []
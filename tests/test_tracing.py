@@ -0,0 +1,67 @@
+import pytest
+
+from hongxiu.tracing import (
+    ModelPrice,
+    Tracer,
+    load_trace,
+    set_tracer,
+    span,
+    summarize_trace,
+    trace_paper,
+)
+from hongxiu.usage import TokenUsage
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = Tracer(
+        path=tmp_path / "trace.jsonl",
+        pricing={"fake:": ModelPrice(input=1.0, output=2.0, cache_read=0.5)},
+    )
+    set_tracer(tracer)
+    yield tracer
+    set_tracer(None)
+
+
+def test_price_is_matched_by_prefix_and_counts_cached_tokens(tracer):
+    usage = TokenUsage(
+        calls=1, input_tokens=1_000_000, cache_read_tokens=400_000, output_tokens=10
+    )
+    assert tracer.cost("fake:gpt-fake", usage) == pytest.approx(0.6 + 0.2 + 0.00002)
+    assert tracer.cost("openai:gpt-4o", usage) is None
+
+
+def test_summarize_trace_groups_stages_models_and_papers(tracer):
+    usage = TokenUsage(calls=1, input_tokens=1000, output_tokens=100)
+    for paper in ["a", "b"]:
+        with trace_paper(paper):
+            with span("parse"):
+                pass
+            with span("llm", chain="summary", llm="fake:gpt-fake") as s:
+                s.set_usage("fake:gpt-fake", usage)
+            with span("llm", chain="mindmap", llm="fake:gpt-fake", cache_hit=True):
+                pass
+            with pytest.raises(RuntimeError), span("xelatex"):
+                raise RuntimeError("xelatex failed")
+    # 其他运行的记录不计入
+    set_tracer(Tracer(path=tracer.path, run_id="other"))
+    with span("parse"):
+        pass
+    set_tracer(tracer)
+
+    records = load_trace(tracer.path)
+    report = summarize_trace(records, run=tracer.run_id)
+    assert report.runs == [tracer.run_id]
+    assert report.papers == 2
+    assert report.stages["parse"].count == 2
+    assert report.stages["llm[summary]"].count == 2
+    assert report.stages["xelatex"].errors == 2
+    model = report.models["fake:gpt-fake"]
+    assert (model.calls, model.cache_hits, model.input_tokens) == (2, 2, 2000)
+    assert report.cost == pytest.approx(2 * (1000 * 1.0 + 100 * 2.0) / 1_000_000)
+    assert {p["paper"] for p in report.slowest} == {"a", "b"}
+    assert "llm[summary]" in str(report)
+
+    # 默认只汇总最近一次运行
+    assert summarize_trace(records).runs == ["other"]
+    assert len(summarize_trace(records, run="all").runs) == 2
@@ -0,0 +1,30 @@
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from hongxiu.usage import TokenUsage, UsageCallbackHandler
+
+
+def test_usage_counts_prompt_cache_tokens():
+    handler = UsageCallbackHandler()
+    for cache_read in [0, 900]:
+        message = AIMessage(
+            content="{}",
+            usage_metadata={
+                "input_tokens": 1000,
+                "output_tokens": 50,
+                "total_tokens": 1050,
+                "input_token_details": {"cache_read": cache_read},
+            },
+        )
+        handler.on_llm_end(LLMResult(generations=[[ChatGeneration(message=message)]]))
+
+    usage = handler.usage
+    assert (usage.calls, usage.input_tokens, usage.output_tokens) == (2, 2000, 100)
+    assert usage.cache_read_tokens == 900
+    assert usage.cache_ratio == 0.45
+
+    total = TokenUsage()
+    total.add(usage)
+    total.add(usage)
+    assert (total.calls, total.cache_read_tokens) == (4, 1800)
+    assert TokenUsage().cache_ratio == 0.0